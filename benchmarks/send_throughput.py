@@ -0,0 +1,90 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+Measure throughput of :py:func:`Model.send_app` with a mocked node interface.
+
+Messages are sent with the model logger at INFO, where the send path skips
+debug decoding, and at DEBUG, where every message is parsed back for the log,
+as it used to be at any level. Records go to a null handler, so only the
+decoding and formatting is measured.
+
+Run with::
+
+    python benchmarks/send_throughput.py [count]
+"""
+import asyncio
+import logging
+import sys
+import time
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Model
+from bluetooth_mesh.interfaces import NodeInterface
+from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
+
+
+class BenchmarkModel(Model):
+    MODEL_ID = (None, 0x1001)
+    OPCODES = {GenericOnOffOpcode.GENERIC_ONOFF_STATUS}
+
+
+def model() -> Model:
+    element = mock.MagicMock()
+    element.application.node_interface = asynctest.MagicMock(NodeInterface)
+    element.application.shaper = None
+    element.path = "/benchmark/element0"
+    return BenchmarkModel(element)
+
+
+async def throughput(level: int, count: int) -> float:
+    onoff = model()
+    onoff.logger = logging.getLogger("benchmark")
+    onoff.logger.setLevel(level)
+
+    start = time.perf_counter()
+    for tid in range(count):
+        await onoff.send_app(
+            0x0100,
+            0,
+            GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED,
+            dict(onoff=tid % 2, tid=tid % 256),
+        )
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    loop = asyncio.get_event_loop()
+    for name, level in (("DEBUG", logging.DEBUG), ("INFO", logging.INFO)):
+        rate = loop.run_until_complete(throughput(level, count))
+        print("{:5}: {:8.0f} msg/s ({} messages)".format(name, rate, count))
+
+
+if __name__ == "__main__":
+    main()
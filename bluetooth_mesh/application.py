@@ -66,6 +66,7 @@ from bluetooth_mesh.interfaces import (
 )
 from bluetooth_mesh.messages import AccessMessage
 from bluetooth_mesh.models import ConfigClient, ModelConfig
+from bluetooth_mesh.shaper import OutboundShaper
 from bluetooth_mesh.tokenring import TokenRing
 from bluetooth_mesh.utils import MeshError, ParsedMeshMessage
 
@@ -526,6 +527,9 @@ class Application(
         self.node_interface = None
         self.management_interface = None
 
+        # set to an OutboundShaper to rate limit messages sent by all models
+        self.shaper = None  # type: Optional[OutboundShaper]
+
         self._join_complete = None
 
     async def _get_acl_interface(self):
@@ -797,6 +801,18 @@ class Application(
     def get_model_instance(self, element: int, model: Type["Model"]) -> "Model":
         return self.elements[element][model]
 
+    def expectation_counts(self) -> Dict[Tuple[int, Type["Model"]], Dict[int, int]]:
+        """
+        Live expectation counts of all models with pending waiters, keyed by
+        element index and model class. See
+        :py:func:`bluetooth_mesh.models.Model.expectation_counts`.
+        """
+        return {
+            (index, model_class): counts
+            for index, element in self.elements.items()
+            for model_class, counts in element.expectation_counts().items()
+        }
+
     async def join(self):
         """
         Try to join a mesh network by broadcasting Unprovisioned Device Beacons,
@@ -1065,7 +1081,12 @@ class Element(LocationMixin):
 
         for model in self._models.values():
             if message["opcode"] in model.OPCODES:
-                model.message_received(source, app_index, destination, message)
+                if model.dispatch_queue is not None:
+                    model.dispatch_queue.put_nowait(
+                        model.message_received, source, app_index, destination, message
+                    )
+                else:
+                    model.message_received(source, app_index, destination, message)
                 return
 
     def dev_key_message_received(
@@ -1094,7 +1115,16 @@ class Element(LocationMixin):
 
         for model in self._models.values():
             if message["opcode"] in model.OPCODES:
-                model.dev_key_message_received(source, remote, net_index, message)
+                if model.dispatch_queue is not None:
+                    model.dispatch_queue.put_nowait(
+                        model.dev_key_message_received,
+                        source,
+                        remote,
+                        net_index,
+                        message,
+                    )
+                else:
+                    model.dev_key_message_received(source, remote, net_index, message)
                 return
 
     def update_model_configuration(
@@ -1116,6 +1146,19 @@ class Element(LocationMixin):
     def __getitem__(self, model_class: Type["Model"]) -> "Model":
         return self._models[model_class]
 
+    def expectation_counts(self) -> Dict[Type["Model"], Dict[int, int]]:
+        """
+        Live expectation counts per opcode of models with pending waiters.
+        """
+        counts = {}
+
+        for model_class, model in self._models.items():
+            model_counts = model.expectation_counts()
+            if model_counts:
+                counts[model_class] = model_counts
+
+        return counts
+
     @property
     def models(self) -> List[Tuple[int, bool, bool]]:
         """
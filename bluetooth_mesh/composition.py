@@ -0,0 +1,167 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+import os
+import time
+from json.decoder import JSONDecodeError
+from typing import Any, Optional, Tuple, Union
+from uuid import UUID
+
+import construct
+from marshmallow import Schema, ValidationError, fields
+
+from bluetooth_mesh.messages.config import ConfigCompositionDataStatus
+
+
+class StoredCompositionSchema(Schema):
+    cid = fields.Integer()
+    pid = fields.Integer()
+    vid = fields.Integer()
+    fingerprint = fields.Raw(allow_none=True)
+    stored = fields.Float(allow_none=True)
+    data = fields.String()
+
+
+class StoredCompositionCacheSchema(Schema):
+    nodes = fields.Dict(
+        keys=fields.String(), values=fields.Nested(StoredCompositionSchema)
+    )
+
+
+class CompositionDataCache:
+    """
+    Composition data of known nodes, stored on disk.
+
+    Entries are keyed by node address or UUID and remember the node's company,
+    product and version identifiers. An entry can also hold a `fingerprint`:
+    a cheap-to-read value, such as a firmware version, that changes whenever
+    the composition data may have changed. A lookup with a different
+    fingerprint is a miss.
+
+    If `max_age` is given, entries older than that many seconds are misses,
+    so entries expire even when there is no fingerprint to compare.
+
+    Changes are written to disk by :py:func:`save`, which :py:func:`put`
+    calls unless told otherwise, so storing a batch of entries can be saved
+    once.
+    """
+
+    PATH = "~/.cache/bluetooth-mesh"
+
+    @property
+    def path(self):
+        return os.path.expanduser(self.PATH)
+
+    def __init__(self, name: str = "composition", *, max_age: Optional[float] = None):
+        self.name = name
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.data = self._load()
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+
+        try:
+            with open(os.path.join(self.path, self.name), "r") as cachefile:
+                return StoredCompositionCacheSchema().loads(cachefile.read())["nodes"]
+        except (FileNotFoundError, JSONDecodeError, ValidationError, KeyError):
+            return {}
+
+    def save(self):
+        with open(os.path.join(self.path, self.name), "w") as cachefile:
+            cachefile.write(StoredCompositionCacheSchema().dumps(dict(nodes=self.data)))
+
+    @staticmethod
+    def _key(node: Union[int, UUID]) -> str:
+        return str(node) if isinstance(node, UUID) else "%04x" % node
+
+    def get(
+        self,
+        node: Union[int, UUID],
+        fingerprint: Optional[Any] = None,
+        identity: Optional[Tuple[int, int, int]] = None,
+    ) -> Optional[Any]:
+        """
+        Parsed composition data status of `node`, or None if it's unknown or
+        stale.
+
+        :param node: Node address or UUID
+        :param fingerprint: Current fingerprint of the node
+        :param identity: If known, the node's (CID, PID, VID)
+        """
+        entry = self.data.get(self._key(node))
+
+        if entry is None or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+
+        if self.max_age is not None and (
+            entry.get("stored") is None or time.time() - entry["stored"] > self.max_age
+        ):
+            self.misses += 1
+            return None
+
+        if identity is not None and identity != (
+            entry["cid"],
+            entry["pid"],
+            entry["vid"],
+        ):
+            self.misses += 1
+            return None
+
+        try:
+            params = ConfigCompositionDataStatus.parse(bytes.fromhex(entry["data"]))
+        except (ValueError, construct.ConstructError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return params
+
+    def put(
+        self,
+        node: Union[int, UUID],
+        params: Any,
+        fingerprint: Optional[Any] = None,
+        *,
+        save: bool = True,
+    ):
+        """
+        Store parsed composition data status of `node`.
+
+        :param save: Write the cache to disk, see :py:func:`save`
+        """
+        self.data[self._key(node)] = dict(
+            cid=params["zero"]["cid"],
+            pid=params["zero"]["pid"],
+            vid=params["zero"]["vid"],
+            fingerprint=fingerprint,
+            stored=time.time(),
+            data=ConfigCompositionDataStatus.build(params).hex(),
+        )
+
+        if save:
+            self.save()
+
+    def drop(self, node: Union[int, UUID]):
+        self.data.pop(self._key(node), None)
+        self.save()
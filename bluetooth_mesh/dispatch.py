@@ -0,0 +1,174 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements asynchronous dispatch of received messages.
+"""
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from enum import Enum
+from inspect import isawaitable
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+__all__ = [
+    "DispatchQueue",
+    "Overflow",
+]
+
+
+class Overflow(Enum):
+    """
+    What to do with a message when the queue is full.
+    """
+
+    #: Discard the oldest queued message to make room.
+    DROP_OLDEST = "drop_oldest"
+
+    #: Keep queued messages. New ones wait in a bounded backlog until a worker
+    #: frees a slot, and are discarded if the backlog is full as well.
+    BLOCK = "block"
+
+
+class DispatchQueue:
+    """
+    Bounded queue of handler calls, processed by worker tasks.
+
+    Messages received from the socket or D-Bus are put into the queue and the
+    reader returns immediately, so a slow handler delays only its own queue.
+    Handlers may return an awaitable, which the worker awaits before taking
+    the next message.
+
+    With :py:attr:`Overflow.BLOCK`, a message that doesn't fit is parked
+    until a slot is free, keeping the order of messages. Parked messages are
+    counted in :py:attr:`blocked`. At most `backlog` messages are parked;
+    newer ones are discarded and counted in :py:attr:`dropped`.
+
+    :param maxsize: Maximum number of queued messages
+    :param workers: Number of worker tasks
+    :param overflow: Policy for messages that don't fit in the queue
+    :param backlog: Maximum number of parked messages, by default `maxsize`
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 256,
+        workers: int = 1,
+        overflow: Overflow = Overflow.DROP_OLDEST,
+        backlog: Optional[int] = None,
+        logger: logging.Logger = None,
+    ):
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.backlog = maxsize if backlog is None else backlog
+        self.logger = logger or logging.getLogger(type(self).__name__)
+
+        self.processed = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+        self._items = deque()  # type: Deque[Tuple[float, Callable, Tuple[Any, ...]]]
+        self._parked = deque()  # type: Deque[Tuple[float, Callable, Tuple[Any, ...]]]
+        self._ready = asyncio.Event()
+        self._workers = [
+            asyncio.ensure_future(self._work()) for _ in range(workers)
+        ]  # type: List[asyncio.Future]
+
+    def put_nowait(self, handler: Callable, *args: Any):
+        """
+        Queue a call of `handler` with `args`.
+        """
+        item = (asyncio.get_event_loop().time(), handler, args)
+
+        if len(self._items) >= self.maxsize:
+            if self.overflow is Overflow.BLOCK:
+                if len(self._parked) >= self.backlog:
+                    self.dropped += 1
+                    return
+
+                self.blocked += 1
+                self._parked.append(item)
+                return
+
+            self._items.popleft()
+            self.dropped += 1
+
+        self._items.append(item)
+        self._ready.set()
+
+    def _unpark(self):
+        while self._parked and len(self._items) < self.maxsize:
+            self._items.append(self._parked.popleft())
+
+    async def _work(self):
+        loop = asyncio.get_event_loop()
+
+        while True:
+            if not self._items:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            enqueued, handler, args = self._items.popleft()
+            self._unpark()
+
+            latency = loop.time() - enqueued
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+            try:
+                result = handler(*args)
+                if isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                self.logger.exception("Handler %s failed", handler)
+            finally:
+                self.processed += 1
+
+    def __len__(self):
+        return len(self._items) + len(self._parked)
+
+    @property
+    def mean_latency(self) -> float:
+        """
+        Average time between queueing a message and handling it, in seconds.
+        """
+        return self.total_latency / self.processed if self.processed else 0.0
+
+    async def close(self):
+        """
+        Stop the workers. Queued messages are discarded.
+        """
+        for worker in self._workers:
+            worker.cancel()
+
+        for worker in self._workers:
+            with suppress(asyncio.CancelledError):
+                await worker
+
+        self._items.clear()
+        self._parked.clear()
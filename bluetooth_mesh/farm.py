@@ -0,0 +1,664 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements a farm of simulated nodes, reachable through a
+loopback transport instead of BlueZ.
+
+Attach a :py:class:`VirtualFarm` to an application and its client models
+talk to the simulated nodes as they would to real ones::
+
+    farm = VirtualFarm(latency=0.02, loss=0.01)
+    farm.add_nodes(2000)
+    farm.attach(application)
+
+    await application.elements[0][GenericOnOffClient].get_light_status(
+        list(farm.nodes), app_index=0
+    )
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import ConfigOpcode, StatusCode
+from bluetooth_mesh.messages.generic.light.lightness import LightLightnessOpcode
+from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
+from bluetooth_mesh.messages.silvair.gateway_config_server import (
+    DhcpFlag,
+    GatewayConfigServerOpcode,
+    GatewayConfigServerSubOpcode,
+)
+from bluetooth_mesh.messages.silvair.gateway_config_server import (
+    StatusCode as GatewayStatusCode,
+)
+from bluetooth_mesh.messages.time import TimeOpcode, TimeRole
+from bluetooth_mesh.utils import message_params
+
+__all__ = [
+    "LoopbackNodeInterface",
+    "VirtualConfigServer",
+    "VirtualFarm",
+    "VirtualGatewayConfigServer",
+    "VirtualLightLightnessServer",
+    "VirtualModel",
+    "VirtualNode",
+    "VirtualOnOffServer",
+    "VirtualTimeServer",
+]
+
+#: Messages with the same source, destination and TID within this time are
+#: retransmissions
+TID_TIMEOUT = 6.0
+
+Reply = Optional[Tuple[int, Any]]
+
+
+class _Transition:
+    """
+    Value moving linearly from `start` to `target` between `begin` and `end`.
+
+    Nothing is scheduled: the current value is computed when it's needed, so
+    thousands of nodes in transition cost no timers.
+    """
+
+    __slots__ = ("start", "target", "begin", "end")
+
+    def __init__(self, value: int):
+        self.start = self.target = value
+        self.begin = self.end = 0.0
+
+    def set(self, target: int, now: float, transition_time: float, delay: float):
+        self.start = self.value(now)
+        self.target = target
+        self.begin = now + delay
+        self.end = self.begin + transition_time
+
+    def value(self, now: float) -> int:
+        if now >= self.end:
+            return self.target
+
+        if now <= self.begin:
+            return self.start
+
+        progress = (now - self.begin) / (self.end - self.begin)
+        return round(self.start + (self.target - self.start) * progress)
+
+    def remaining(self, now: float) -> float:
+        return max(0.0, self.end - now)
+
+
+class VirtualModel:
+    """
+    Server state machine of a simulated node.
+
+    `HANDLERS` maps opcodes to names of methods called with `(source,
+    destination, params)`. A handler returns the reply as an `(opcode,
+    params)` tuple, or None.
+    """
+
+    HANDLERS = {}  # type: Dict[int, str]
+
+    def __init__(self, node: "VirtualNode"):
+        self.node = node
+        self._transactions = {}  # type: Dict[Tuple[int, int], Tuple[int, float]]
+
+    def new_transaction(self, source: int, destination: int, tid: int) -> bool:
+        """
+        Check whether a message with `tid` from `source` to `destination`
+        starts a new transaction, or repeats the previous one.
+        """
+        now = self.node.time()
+        previous = self._transactions.get((source, destination))
+        self._transactions[source, destination] = (tid, now)
+
+        return previous is None or previous[0] != tid or now - previous[1] > TID_TIMEOUT
+
+
+class VirtualOnOffServer(VirtualModel):
+    HANDLERS = {
+        GenericOnOffOpcode.GENERIC_ONOFF_GET: "get",
+        GenericOnOffOpcode.GENERIC_ONOFF_SET: "set",
+        GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED: "set_unack",
+    }
+
+    def __init__(self, node: "VirtualNode"):
+        super().__init__(node)
+        self.onoff = _Transition(0)
+
+    @property
+    def present(self) -> int:
+        now = self.node.time()
+
+        # turning on is visible as soon as the transition starts
+        if self.onoff.target and now >= self.onoff.begin:
+            return self.onoff.target
+
+        return self.onoff.target if now >= self.onoff.end else self.onoff.start
+
+    def get(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        remaining = self.onoff.remaining(self.node.time())
+        status = dict(present_onoff=self.present)
+
+        if remaining:
+            status.update(target_onoff=self.onoff.target, remaining_time=remaining)
+
+        return GenericOnOffOpcode.GENERIC_ONOFF_STATUS, status
+
+    def set_unack(self, source: int, destination: int, params: Any) -> Reply:
+        if self.new_transaction(source, destination, params["tid"]):
+            self.onoff.set(
+                params["onoff"],
+                self.node.time(),
+                params.get("transition_time") or 0.0,
+                params.get("delay") or 0.0,
+            )
+
+        return None
+
+    def set(self, source: int, destination: int, params: Any) -> Reply:
+        self.set_unack(source, destination, params)
+        return self.get(source, destination, params)
+
+
+class VirtualLightLightnessServer(VirtualModel):
+    HANDLERS = {
+        LightLightnessOpcode.LIGHT_LIGHTNESS_GET: "get",
+        LightLightnessOpcode.LIGHT_LIGHTNESS_SET: "set",
+        LightLightnessOpcode.LIGHT_LIGHTNESS_SET_UNACKNOWLEDGED: "set_unack",
+    }
+
+    def __init__(self, node: "VirtualNode"):
+        super().__init__(node)
+        self.lightness = _Transition(0)
+
+    def get(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        now = self.node.time()
+        remaining = self.lightness.remaining(now)
+        status = dict(present_lightness=self.lightness.value(now))
+
+        if remaining:
+            status.update(
+                target_lightness=self.lightness.target, remaining_time=remaining
+            )
+
+        return LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS, status
+
+    def set_unack(self, source: int, destination: int, params: Any) -> Reply:
+        if self.new_transaction(source, destination, params["tid"]):
+            self.lightness.set(
+                params["lightness"],
+                self.node.time(),
+                params.get("transition_time") or 0.0,
+                params.get("delay") or 0.0,
+            )
+
+        return None
+
+    def set(self, source: int, destination: int, params: Any) -> Reply:
+        self.set_unack(source, destination, params)
+        return self.get(source, destination, params)
+
+
+class VirtualTimeServer(VirtualModel):
+    """
+    Time server with a clock that runs `drift` seconds fast per second.
+    """
+
+    HANDLERS = {
+        TimeOpcode.TIME_GET: "get",
+        TimeOpcode.TIME_SET: "set",
+        TimeOpcode.TIME_ROLE_GET: "get_role",
+        TimeOpcode.TIME_ROLE_SET: "set_role",
+    }
+
+    def __init__(self, node: "VirtualNode", drift: float = 0.0):
+        super().__init__(node)
+        self.drift = drift
+        self.role = TimeRole.NONE
+        self.tai_utc_delta = timedelta(seconds=37)
+        self.uncertainty = timedelta(0)
+        self.time_authority = False
+
+        self._offset = 0.0
+        self._set_at = node.time()
+
+    def now(self) -> datetime:
+        elapsed = self.node.time() - self._set_at
+        offset = self._offset + elapsed * self.drift
+        return datetime.now(timezone.utc) + timedelta(seconds=offset)
+
+    def get(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        return (
+            TimeOpcode.TIME_STATUS,
+            dict(
+                date=self.now(),
+                uncertainty=self.uncertainty,
+                time_authority=self.time_authority,
+                tai_utc_delta=self.tai_utc_delta,
+            ),
+        )
+
+    def set(self, source: int, destination: int, params: Any) -> Reply:
+        self._offset = (params["date"] - datetime.now(timezone.utc)).total_seconds()
+        self._set_at = self.node.time()
+        self.uncertainty = params["uncertainty"]
+        self.time_authority = params["time_authority"]
+        self.tai_utc_delta = params["tai_utc_delta"]
+
+        return self.get(source, destination, params)
+
+    def get_role(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        return TimeOpcode.TIME_ROLE_STATUS, dict(time_role=self.role)
+
+    def set_role(self, source: int, destination: int, params: Any) -> Reply:
+        self.role = params["time_role"]
+        return self.get_role(source, destination, params)
+
+
+class VirtualGatewayConfigServer(VirtualModel):
+    HANDLERS = {
+        GatewayConfigServerOpcode.SILVAIR_GATEWAY: "handle",
+    }
+
+    def __init__(self, node: "VirtualNode"):
+        super().__init__(node)
+        self.configuration = dict(
+            chip_revision_id=1,
+            mtu_size=1500,
+            mac_address="02:00:00:00:%02x:%02x" % divmod(node.address, 0x100),
+            server_port_number=8080,
+            reconnect_interval=10,
+            server_address_length=9,
+            server_address="localhost",
+            dns_ip_address="0.0.0.0",
+            ip_address="0.0.0.0",
+            gateway_ip_address="0.0.0.0",
+            netmask=0,
+            flags=DhcpFlag.DHCP_ENABLED_AUTO_DNS,
+            status_code=GatewayStatusCode.STATUS_SUCCESS,
+        )
+
+    def handle(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        subopcode = params["subopcode"]
+
+        if subopcode in (
+            GatewayConfigServerSubOpcode.GATEWAY_PACKETS_GET,
+            GatewayConfigServerSubOpcode.GATEWAY_PACKETS_CLEAR,
+        ):
+            return (
+                GatewayConfigServerOpcode.SILVAIR_GATEWAY,
+                dict(
+                    subopcode=GatewayConfigServerSubOpcode.GATEWAY_PACKETS_STATUS,
+                    payload=dict(
+                        total_eth_rx_errors=0,
+                        total_eth_tx_errors=0,
+                        bandwidth=0,
+                        connection_state=dict(
+                            conn_state=0, link_status=1, last_error=0
+                        ),
+                    ),
+                ),
+            )
+
+        if subopcode != GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET:
+            self.configuration.update(
+                (key, value)
+                for key, value in params["payload"].items()
+                if key in self.configuration
+            )
+
+        return (
+            GatewayConfigServerOpcode.SILVAIR_GATEWAY,
+            dict(
+                subopcode=GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_STATUS,
+                payload=dict(self.configuration),
+            ),
+        )
+
+
+def _model_key(model: Any) -> Tuple[Optional[int], int]:
+    return model.get("vendor_id"), model["model_id"]
+
+
+class VirtualConfigServer(VirtualModel):
+    """
+    The part of Configuration Server used by
+    :py:func:`bluetooth_mesh.models.ConfigClient.apply_configuration`.
+
+    Subscriptions are registered in the farm, so group messages reach the
+    node once it's subscribed.
+    """
+
+    HANDLERS = {
+        ConfigOpcode.CONFIG_APPKEY_ADD: "add_app_key",
+        ConfigOpcode.CONFIG_MODEL_APP_BIND: "bind_app_key",
+        ConfigOpcode.CONFIG_MODEL_SUBSCRIPTION_ADD: "add_subscription",
+        ConfigOpcode.CONFIG_MODEL_PUBLICATION_SET: "set_publication",
+    }
+
+    def __init__(self, node: "VirtualNode"):
+        super().__init__(node)
+        self.app_keys = {}  # type: Dict[int, bytes]
+        self.bindings = set()  # type: Set[Tuple[int, int, Tuple[Optional[int], int]]]
+        self.subscriptions = (
+            set()
+        )  # type: Set[Tuple[int, int, Tuple[Optional[int], int]]]
+        self.publications = {}  # type: Dict[Tuple[int, Tuple[Optional[int], int]], Any]
+
+    def add_app_key(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        self.app_keys[params["app_key_index"]] = params["app_key"]
+        return (
+            ConfigOpcode.CONFIG_APPKEY_STATUS,
+            dict(params, status=StatusCode.SUCCESS),
+        )
+
+    def bind_app_key(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        self.bindings.add(
+            (
+                params["element_address"],
+                params["app_key_index"],
+                _model_key(params["model"]),
+            )
+        )
+        return (
+            ConfigOpcode.CONFIG_MODEL_APP_STATUS,
+            dict(params, status=StatusCode.SUCCESS),
+        )
+
+    def add_subscription(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        self.subscriptions.add(
+            (params["element_address"], params["address"], _model_key(params["model"]))
+        )
+        self.node.farm.subscribe(params["address"], self.node.address)
+        return (
+            ConfigOpcode.CONFIG_MODEL_SUBSCRIPTION_STATUS,
+            dict(params, status=StatusCode.SUCCESS),
+        )
+
+    def set_publication(self, source: int, destination: int, params: Any) -> Reply:
+        # pylint: disable=W0613
+        key = (params["element_address"], _model_key(params["model"]))
+        self.publications[key] = params
+        return (
+            ConfigOpcode.CONFIG_MODEL_PUBLICATION_STATUS,
+            dict(params, status=StatusCode.SUCCESS),
+        )
+
+
+class VirtualNode:
+    """
+    A simulated node with a single element hosting `models`.
+    """
+
+    def __init__(
+        self,
+        farm: "VirtualFarm",
+        address: int,
+        models: Iterable[Callable[["VirtualNode"], VirtualModel]],
+    ):
+        self.farm = farm
+        self.address = address
+        self.models = [model(self) for model in models]
+
+        self._handlers = {
+            opcode: getattr(model, name)
+            for model in self.models
+            for opcode, name in model.HANDLERS.items()
+        }  # type: Dict[int, Callable[[int, Any], Reply]]
+
+    def time(self) -> float:
+        return asyncio.get_event_loop().time()
+
+    def __getitem__(self, model_class: Type[VirtualModel]) -> VirtualModel:
+        return next(model for model in self.models if isinstance(model, model_class))
+
+    def handle(self, source: int, destination: int, opcode: int, params: Any) -> Reply:
+        handler = self._handlers.get(opcode)
+        if handler is None:
+            return None
+
+        return handler(source, destination, params)
+
+
+class VirtualFarm:
+    """
+    A set of simulated nodes.
+
+    Every message is delivered to its destination node, or to all nodes
+    subscribed to a group. Each delivery and each reply is lost with
+    probability `loss`, and replies arrive after `latency` plus up to
+    `jitter` seconds.
+
+    :param latency: Minimum reply delay, in seconds
+    :param jitter: Maximum random addition to the reply delay
+    :param loss: Probability of losing a single message
+    :param seed: Seed of the random generator, for repeatable runs
+    """
+
+    DEFAULT_MODELS = (
+        VirtualConfigServer,
+        VirtualOnOffServer,
+        VirtualLightLightnessServer,
+        VirtualTimeServer,
+    )  # type: Sequence[Callable[[VirtualNode], VirtualModel]]
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.01,
+        jitter: float = 0.01,
+        loss: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+
+        self.nodes = {}  # type: Dict[int, VirtualNode]
+        self.groups = {}  # type: Dict[int, Set[int]]
+
+        self.delivered = 0
+        self.lost = 0
+        self.published = 0
+
+        self._random = random.Random(seed)
+
+    def add_node(
+        self,
+        address: int,
+        models: Optional[Iterable[Callable[[VirtualNode], VirtualModel]]] = None,
+    ) -> VirtualNode:
+        node = VirtualNode(
+            self, address, self.DEFAULT_MODELS if models is None else models
+        )
+        self.nodes[address] = node
+        return node
+
+    def add_nodes(self, count: int, *, start: int = 0x0100, **kwargs) -> List[int]:
+        addresses = list(range(start, start + count))
+
+        for address in addresses:
+            self.add_node(address, **kwargs)
+
+        return addresses
+
+    def subscribe(self, group: int, address: int):
+        self.groups.setdefault(group, set()).add(address)
+
+    def _lost(self) -> bool:
+        if self.loss and self._random.random() < self.loss:
+            self.lost += 1
+            return True
+
+        return False
+
+    def delay(self) -> float:
+        return self.latency + self._random.random() * self.jitter
+
+    def deliver(
+        self, source: int, destination: int, opcode: int, params: Any
+    ) -> List[Tuple[int, int, Any]]:
+        """
+        Pass a message to its recipients.
+
+        :return: Replies that were not lost, as `(node, opcode, params)`
+        """
+        if destination in self.nodes:
+            recipients = [destination]
+        else:
+            recipients = sorted(self.groups.get(destination, ()))
+
+        replies = []
+
+        for address in recipients:
+            if self._lost():
+                continue
+
+            self.delivered += 1
+            reply = self.nodes[address].handle(source, destination, opcode, params)
+
+            if reply is not None and not self._lost():
+                replies.append((address, *reply))
+
+        return replies
+
+    def attach(self, application, address: int = 0x0001):
+        """
+        Make `application` send through the farm instead of BlueZ.
+
+        Elements are created as on registration, but without exporting them
+        on D-Bus.
+        """
+        application.address = address
+
+        for index, element_class in application.ELEMENTS.items():
+            application.elements[index] = element_class(application, index)
+
+        application.node_interface = LoopbackNodeInterface(self, application)
+
+
+class LoopbackNodeInterface:
+    """
+    Stand-in for :py:class:`bluetooth_mesh.interfaces.NodeInterface` that
+    passes messages to a :py:class:`VirtualFarm`, and replies back to the
+    sending element.
+    """
+
+    def __init__(self, farm: VirtualFarm, application):
+        self.farm = farm
+        self.application = application
+
+    def _element(self, element_path: str):
+        return next(
+            element
+            for element in self.application.elements.values()
+            if element.path == element_path
+        )
+
+    def _replies(
+        self, element, destination: int, data: bytes
+    ) -> List[Tuple[int, bytes]]:
+        message = AccessMessage.parse(data)
+        source = self.application.address + element.index
+
+        return [
+            (node, AccessMessage.build(dict(opcode=opcode, params=params)))
+            for node, opcode, params in self.farm.deliver(
+                source, destination, message["opcode"], message_params(message)
+            )
+        ]
+
+    async def send(
+        self,
+        element_path: str,
+        destination: int,
+        app_index: int,
+        data: bytes,
+        force_segmented: bool = False,
+    ) -> None:
+        # pylint: disable=W0613
+        element = self._element(element_path)
+        loop = asyncio.get_event_loop()
+
+        for node, reply in self._replies(element, destination, data):
+            loop.call_later(
+                self.farm.delay(),
+                element.message_received,
+                node,
+                app_index,
+                self.application.address + element.index,
+                reply,
+            )
+
+    async def dev_key_send(
+        self,
+        element_path: str,
+        destination: int,
+        remote: bool,
+        net_index: int,
+        data: bytes,
+        force_segmented: bool = False,
+    ) -> None:
+        # pylint: disable=W0613
+        element = self._element(element_path)
+        loop = asyncio.get_event_loop()
+
+        for node, reply in self._replies(element, destination, data):
+            loop.call_later(
+                self.farm.delay(),
+                element.dev_key_message_received,
+                node,
+                True,
+                net_index,
+                reply,
+            )
+
+    async def publish(
+        self,
+        element_path: str,
+        model: int,
+        data: bytes,
+        force_segmented: bool = False,
+        vendor: Optional[int] = None,
+    ) -> None:
+        # pylint: disable=W0613
+        self.farm.published += 1
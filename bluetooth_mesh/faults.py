@@ -0,0 +1,217 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements fleet-wide monitoring of Health faults.
+"""
+import asyncio
+import logging
+from inspect import isawaitable
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from bluetooth_mesh.messages.health import HealthOpcode
+from bluetooth_mesh.models.models import HealthClient
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+from bluetooth_mesh.utils import message_params
+
+__all__ = [
+    "FaultChange",
+    "FaultMonitor",
+]
+
+
+class FaultChange(NamedTuple):
+    node: int
+    raised: List[int]
+    cleared: List[int]
+    registered: bool = False
+
+
+def _bitmap(fault_array: Iterable[int]) -> int:
+    bitmap = 0
+    for fault in fault_array:
+        # 0x00 means "no fault"
+        if fault:
+            bitmap |= 1 << fault
+    return bitmap
+
+
+def _faults(bitmap: int) -> List[int]:
+    faults = []
+    while bitmap:
+        lowest = bitmap & -bitmap
+        faults.append(lowest.bit_length() - 1)
+        bitmap ^= lowest
+    return faults
+
+
+class FaultMonitor:
+    """
+    Tracks faults of many nodes and reports only what changed.
+
+    Each node's current and registered faults are kept as two integer
+    bitmaps with one bit per fault code. Current status publications received
+    by `client` update the current faults as they arrive.
+    :py:func:`refresh` reads registered faults only of nodes whose registered
+    faults weren't read within `max_age`. Publications carry only current
+    faults, so they don't postpone the read.
+
+    `callback` is called with a :py:class:`FaultChange` whenever a node's
+    current or registered faults differ from the last known ones. It may be
+    a coroutine function, errors it raises are logged.
+
+    :param client: Health client used for publications and reads
+    :param app_index: Application key index used for reads
+    :param company_id: Company ID of the faults
+    :param scheduler: Scheduler used for bulk reads
+    """
+
+    def __init__(
+        self,
+        client: HealthClient,
+        app_index: int,
+        company_id: int,
+        *,
+        callback: Optional[Callable[[FaultChange], Any]] = None,
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ):
+        self.client = client
+        self.app_index = app_index
+        self.company_id = company_id
+        self.callback = callback
+        self.scheduler = scheduler or AdaptiveScheduler()
+
+        self.logger = logging.getLogger(type(self).__name__)
+        self.current = {}  # type: Dict[int, int]
+        self.registered = {}  # type: Dict[int, int]
+        self.reported = {}  # type: Dict[int, float]
+        self.refreshed = {}  # type: Dict[int, float]
+
+    def faults(self, node: int, *, registered: bool = False) -> List[int]:
+        """
+        Last known current, or registered, fault codes of `node`.
+        """
+        bitmaps = self.registered if registered else self.current
+        return _faults(bitmaps.get(node, 0))
+
+    def update(
+        self, node: int, fault_array: Iterable[int], *, registered: bool = False
+    ) -> Optional[FaultChange]:
+        """
+        Record current, or registered, faults of `node`.
+
+        :return: The change, or None if faults are the same as before
+        """
+        timestamps = self.refreshed if registered else self.reported
+        timestamps[node] = asyncio.get_event_loop().time()
+
+        bitmaps = self.registered if registered else self.current
+        bitmap = _bitmap(fault_array)
+        previous = bitmaps.get(node, 0)
+        bitmaps[node] = bitmap
+
+        if bitmap == previous:
+            return None
+
+        return FaultChange(
+            node=node,
+            raised=_faults(bitmap & ~previous),
+            cleared=_faults(previous & ~bitmap),
+            registered=registered,
+        )
+
+    def _callback_done(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(
+                "Fault callback failed: %r",
+                future.exception(),
+                exc_info=future.exception(),
+            )
+
+    def _notify(self, change: Optional[FaultChange]):
+        if change is None or self.callback is None:
+            return
+
+        result = self.callback(change)
+        if isawaitable(result):
+            asyncio.ensure_future(result).add_done_callback(self._callback_done)
+
+    def _current_status(self, source, app_index, destination, message):
+        # pylint: disable=W0613
+        params = message_params(message)
+        if params["company_id"] == self.company_id:
+            self._notify(self.update(source, params["fault_array"]))
+
+    def start(self):
+        """
+        Start tracking current status publications.
+        """
+        self.client.app_message_callbacks[HealthOpcode.HEALTH_CURRENT_STATUS].add(
+            self._current_status
+        )
+
+    def stop(self):
+        self.client.app_message_callbacks[HealthOpcode.HEALTH_CURRENT_STATUS].discard(
+            self._current_status
+        )
+
+    async def refresh(
+        self,
+        nodes: Iterable[int],
+        *,
+        max_age: float = 60.0,
+        timeout: Optional[float] = None,
+    ) -> List[FaultChange]:
+        """
+        Read registered faults of nodes that weren't read within `max_age`
+        seconds.
+
+        :return: Changes found by the read
+        """
+        now = asyncio.get_event_loop().time()
+        stale = [
+            node
+            for node in nodes
+            if now - self.refreshed.get(node, float("-inf")) >= max_age
+        ]
+
+        if not stale:
+            return []
+
+        results = await self.client.get_faults(
+            stale,
+            self.app_index,
+            self.company_id,
+            timeout=timeout,
+            scheduler=self.scheduler,
+        )
+
+        changes = []
+        for node, status in results.items():
+            if status is None:
+                continue
+
+            change = self.update(node, status["fault_array"], registered=True)
+            if change is not None:
+                changes.append(change)
+                self._notify(change)
+
+        return changes
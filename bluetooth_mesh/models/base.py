@@ -21,15 +21,19 @@
 #
 import asyncio
 import inspect
-from collections import defaultdict
+import logging
+from collections import Counter, OrderedDict, defaultdict
 from contextlib import suppress
 from datetime import timedelta
+from functools import partial
 from typing import (
     Any,
+    AsyncIterator,
     Awaitable,
     Callable,
     Dict,
     Hashable,
+    Iterable,
     List,
     Mapping,
     Optional,
@@ -40,21 +44,284 @@ from typing import (
 )
 from uuid import UUID
 
+from construct import Int8ul
+
+from bluetooth_mesh.dispatch import DispatchQueue, Overflow
 from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import AddressType, get_address_type
+from bluetooth_mesh.messages.generics import Delay
+from bluetooth_mesh.publication import PublicationScheduler
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+from bluetooth_mesh.shaper import Priority
 from bluetooth_mesh.utils import (
+    Coalescer,
     Gatherer,
     MessageDescription,
     ParsedMeshMessage,
     ProgressCallback,
-    construct_match,
+    compile_match,
+    message_params,
 )
 
 __all__ = [
     "Model",
     "ModelConfig",
+    "StateCache",
+    "TransactionCache",
 ]
 
 
+class ExpectationIndex:
+    """
+    Pending expectations, hashed by the fields a response is matched on.
+
+    Keys start with the opcode and are followed by whatever identifies the
+    sender, e.g. `(opcode, source, app_index, destination)`. Callbacks
+    receive the parsed message and return `True` once they are fulfilled,
+    after which they are dropped from the index.
+    """
+
+    def __init__(self):
+        self._waiters = {}  # type: Dict[Tuple, Set[Callable]]
+
+    def add(self, key: Tuple, callback: Callable[[ParsedMeshMessage], bool]):
+        self._waiters.setdefault(key, set()).add(callback)
+
+    def discard(self, key: Tuple, callback: Callable[[ParsedMeshMessage], bool]):
+        waiters = self._waiters.get(key)
+
+        if waiters is None:
+            return
+
+        waiters.discard(callback)
+
+        if not waiters:
+            del self._waiters[key]
+
+    def notify(self, key: Tuple, message: ParsedMeshMessage):
+        waiters = self._waiters.get(key)
+
+        if not waiters:
+            return
+
+        for callback in list(waiters):
+            if callback(message):
+                self.discard(key, callback)
+
+    def watch(
+        self,
+        key: Tuple,
+        callback: Callable[[ParsedMeshMessage], bool],
+        future: asyncio.Future,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Add `callback` and remove it as soon as `future` is done, cancelled or
+        - if `timeout` is given - expired.
+        """
+        self.add(key, callback)
+
+        handle = None
+        if timeout is not None:
+            handle = asyncio.get_event_loop().call_later(timeout, future.cancel)
+
+        def done(_):
+            if handle is not None:
+                handle.cancel()
+            self.discard(key, callback)
+
+        future.add_done_callback(done)
+
+    def counts(self) -> Dict[int, int]:
+        """
+        Number of live waiters per opcode.
+        """
+        counts = Counter()  # type: Dict[int, int]
+
+        for (opcode, *_), waiters in self._waiters.items():
+            counts[opcode] += len(waiters)
+
+        return dict(counts)
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+
+class StateCache:
+    """
+    Last known status of each node, per status opcode.
+
+    Entries expire `ttl` seconds after the status was received. Stale entries
+    are dropped when they are read.
+
+    :param ttl: Lifetime of an entry in seconds.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # type: Dict[Tuple[int, int], Tuple[float, Any]]
+
+    def update(
+        self, source: int, opcode: int, params: Any, ttl: Optional[float] = None
+    ):
+        expires = asyncio.get_event_loop().time() + (self.ttl if ttl is None else ttl)
+        self._entries[source, opcode] = (expires, params)
+
+    def get(self, source: int, opcode: int) -> Optional[Any]:
+        entry = self._entries.get((source, opcode))
+
+        if entry is not None and entry[0] < asyncio.get_event_loop().time():
+            del self._entries[source, opcode]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[1]
+
+    def invalidate(self, source: Optional[int] = None):
+        if source is None:
+            self._entries.clear()
+            return
+
+        for key in [key for key in self._entries if key[0] == source]:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TransactionCache:
+    """
+    Recently received transactions, identified by source, destination and
+    TID.
+
+    A message with the same identity as one received within `window` seconds
+    is a retransmission of the same transaction. At most `size` transactions
+    are remembered; the oldest ones are forgotten first.
+
+    :param window: Time after which a TID may be reused, in seconds.
+    :param size: Maximum number of remembered transactions.
+    """
+
+    def __init__(self, window: float = 6.0, size: int = 1024):
+        self.window = window
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: Dict[Tuple[int, Any, int], float]
+
+    def seen(self, source: int, destination: Any, tid: int) -> bool:
+        """
+        Record a transaction and check whether it was received before.
+        """
+        now = asyncio.get_event_loop().time()
+        key = (source, destination, tid)
+
+        received = self._entries.get(key)
+        if received is not None and now - received < self.window:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self._entries.pop(key, None)
+        self._entries[key] = now
+
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+        return False
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MessageTemplate:
+    """
+    Access message encoded once, for retransmissions.
+
+    Single-byte `fields` of the message (by default just `delay`) are patched
+    in place by :py:func:`render`, so resending the message with e.g. a
+    shorter delay doesn't build it from scratch. Fields that are not encoded,
+    such as a delay without a transition time, are ignored, and a field that
+    can't be located makes :py:func:`render` build the whole message.
+
+    :param opcode: Message opcode.
+    :param params: Message parameters.
+    :param fields: Names of the parameters that vary between retransmissions.
+    """
+
+    FIELDS = {
+        "delay": Delay(Int8ul),
+        "tid": Int8ul,
+    }
+
+    def __init__(
+        self,
+        opcode: int,
+        params: MessageDescription,
+        fields: Sequence[str] = ("delay",),
+    ):
+        self.opcode = opcode
+        self.params = params
+        self.data = AccessMessage.build(dict(opcode=opcode, params=params))
+        self.offsets = {}  # type: Dict[str, int]
+        self.rebuild = set()  # type: Set[str]
+
+        for name in fields:
+            if name not in params:
+                continue
+
+            try:
+                offset = self._locate(opcode, params, name)
+            except ValueError:
+                self.rebuild.add(name)
+                continue
+
+            if offset is not None:
+                self.offsets[name] = offset
+
+    def _locate(
+        self, opcode: int, params: MessageDescription, name: str
+    ) -> Optional[int]:
+        field = self.FIELDS[name]
+        value = field.build(params[name])
+        probe = next(i for i in (0, 1) if field.build(i) != value)
+
+        data = AccessMessage.build(dict(opcode=opcode, params={**params, name: probe}))
+        offsets = [i for i, (a, b) in enumerate(zip(self.data, data)) if a != b]
+
+        if data == self.data:
+            return None
+
+        if len(data) != len(self.data) or len(offsets) != 1:
+            raise ValueError("Cannot locate %s in message %s" % (name, self.data.hex()))
+
+        return offsets[0]
+
+    def render(self, **values: Any) -> bytes:
+        if not values:
+            return self.data
+
+        if not self.rebuild.isdisjoint(values):
+            return AccessMessage.build(
+                dict(opcode=self.opcode, params={**self.params, **values})
+            )
+
+        data = bytearray(self.data)
+
+        for name, value in values.items():
+            offset = self.offsets.get(name)
+            if offset is not None:
+                data[offset] = self.FIELDS[name].build(value)[0]
+
+        return bytes(data)
+
+
 class Model:
     """
     Base class for mesh models.
@@ -64,15 +331,24 @@ class Model:
     OPCODES = []  # type: List[int]
     PUBLISH = False  # type: bool
     SUBSCRIBE = False  # type: bool
+    PRIORITY = Priority.INTERACTIVE  # type: Priority
+    CACHED_OPCODES = set()  # type: Set[int]
 
     def __init__(self, element: "Element"):
-        self.__tid = 0
+        self.__tids = {}  # type: Dict[Optional[int], int]
         self.element = element
 
         self.logger = self.element.logger.getChild("%s" % type(self).__name__)
 
         self.app_message_callbacks = defaultdict(set)  # type: Dict[int, Set[Callable]]
         self.dev_message_callbacks = defaultdict(set)  # type: Dict[int, Set[Callable]]
+        self.app_expectations = ExpectationIndex()
+        self.dev_expectations = ExpectationIndex()
+        self.coalescer = Coalescer()
+        self.state_cache = None  # type: Optional[StateCache]
+        self.transaction_cache = TransactionCache()  # type: Optional[TransactionCache]
+        self.dispatch_queue = None  # type: Optional[DispatchQueue]
+        self.publication_scheduler = None  # type: Optional[PublicationScheduler]
         self.subscription_callbacks = defaultdict(
             set
         )  # type: Dict[Union[int, UUID], Set]
@@ -80,11 +356,26 @@ class Model:
         assert self.MODEL_ID[1] is not None, "A model has to have ID!"
         self.configuration = ModelConfig(bindings=[], subscriptions=[])
 
-    def tid(self) -> int:
-        tid = self.__tid
-        self.__tid = (tid + 1) % 255
+    def tid(self, destination: Optional[int] = None) -> int:
+        """
+        Allocate a transaction identifier for a message to `destination`.
+
+        Each destination has its own counter, so sending to many nodes doesn't
+        make TIDs seen by any single node wrap around.
+        """
+        tid = self.__tids.get(destination, 0)
+        self.__tids[destination] = (tid + 1) % 255
         return tid
 
+    def expectation_counts(self) -> Dict[int, int]:
+        """
+        Number of live :py:func:`expect_app` and :py:func:`expect_dev` waiters
+        per opcode.
+        """
+        counts = Counter(self.app_expectations.counts())
+        counts.update(self.dev_expectations.counts())
+        return dict(counts)
+
     def __str__(self):
         if self.MODEL_ID[0] is None:
             return "<Model %04x>" % self.MODEL_ID[1]
@@ -95,6 +386,106 @@ class Model:
     def _node_interface(self):
         return self.element.application.node_interface
 
+    def start_dispatch(
+        self,
+        *,
+        maxsize: int = 256,
+        workers: int = 1,
+        overflow: Overflow = Overflow.DROP_OLDEST,
+        backlog: Optional[int] = None,
+    ) -> DispatchQueue:
+        """
+        Handle received messages in worker tasks instead of the socket reader.
+
+        Once started, the element puts messages for this model into
+        :py:attr:`dispatch_queue`, so slow callbacks don't delay messages for
+        other models.
+
+        See :py:class:`bluetooth_mesh.dispatch.DispatchQueue`
+        """
+        if self.dispatch_queue is None:
+            self.dispatch_queue = DispatchQueue(
+                maxsize=maxsize,
+                workers=workers,
+                overflow=overflow,
+                backlog=backlog,
+                logger=self.logger,
+            )
+
+        return self.dispatch_queue
+
+    async def stop_dispatch(self):
+        """
+        Go back to handling received messages in the socket reader.
+        """
+        dispatch_queue, self.dispatch_queue = self.dispatch_queue, None
+
+        if dispatch_queue is not None:
+            await dispatch_queue.close()
+
+    def cached_statuses(
+        self, nodes: Iterable[int], opcode: int, refresh: bool = False
+    ) -> Tuple[Dict[int, Any], List[int]]:
+        """
+        Split `nodes` into ones with a fresh status in :py:attr:`state_cache`
+        and ones that need to be queried.
+
+        :param nodes: Node addresses
+        :param opcode: Status opcode
+        :param refresh: Ignore the cache and query all nodes
+        :return: A tuple of cached status parameters per node and a list of
+            remaining nodes
+        """
+        if self.state_cache is None or refresh:
+            return {}, list(nodes)
+
+        cached = {}  # type: Dict[int, Any]
+        remaining = []  # type: List[int]
+
+        for node in nodes:
+            params = self.state_cache.get(node, opcode)
+            if params is None:
+                remaining.append(node)
+            else:
+                cached[node] = params
+
+        return cached, remaining
+
+    def invalidate_statuses(self, destinations: Iterable[Optional[Union[int, UUID]]]):
+        """
+        Drop cached statuses of nodes whose state is about to be changed.
+
+        A message sent to a group or a virtual address may change any node,
+        so it drops the whole cache.
+
+        :param destinations: Destination addresses, None entries are ignored
+        """
+        if self.state_cache is None:
+            return
+
+        for destination in destinations:
+            if destination is None:
+                continue
+
+            if (
+                isinstance(destination, UUID)
+                or get_address_type(destination) != AddressType.UNICAST
+            ):
+                self.state_cache.invalidate()
+                return
+
+            self.state_cache.invalidate(destination)
+
+    async def _shaped(
+        self, destination: Optional[int], send: Callable[[], Awaitable[None]]
+    ):
+        shaper = self.element.application.shaper
+
+        if shaper is None:
+            await send()
+        else:
+            await shaper.submit(self.PRIORITY, destination, send)
+
     def update_configuration(self, configuration: "ModelConfig"):
         if configuration.bindings is not None:
             self.configuration.bindings = configuration.bindings
@@ -102,9 +493,17 @@ class Model:
         if configuration.publication_period is not None:
             self.configuration.publication_period = configuration.publication_period
 
+            if self.publication_scheduler is not None:
+                self.publication_scheduler.reschedule(self)
+
         if configuration.subscriptions is not None:
             self.configuration.subscriptions = configuration.subscriptions
 
+        if configuration.publication_retransmit is not None:
+            self.configuration.publication_retransmit = (
+                configuration.publication_retransmit
+            )
+
         self.logger.info("Update config of %s: %s", self.MODEL_ID, self.configuration)
 
     def message_received(
@@ -122,7 +521,24 @@ class Model:
             message,
         )
 
-        callbacks = self.app_message_callbacks[message["opcode"]]
+        opcode = message["opcode"]
+
+        if self.transaction_cache is not None and self._retransmitted(
+            source, destination, message
+        ):
+            self.logger.debug("Dropping retransmitted message from %04x", source)
+            return
+
+        if self.state_cache is not None and opcode in self.CACHED_OPCODES:
+            self.state_cache.update(source, opcode, message_params(message))
+
+        self.app_expectations.notify((opcode, source, app_index, None), message)
+        if destination is not None:
+            self.app_expectations.notify(
+                (opcode, source, app_index, destination), message
+            )
+
+        callbacks = self.app_message_callbacks[opcode]
 
         for callback in list(callbacks):
             if callback(source, app_index, destination, message):
@@ -138,6 +554,16 @@ class Model:
                 message=message,
             )
 
+    def _retransmitted(
+        self, source: int, destination: Union[int, UUID], message: ParsedMeshMessage
+    ) -> bool:
+        params = message_params(message)
+
+        if not isinstance(params, Mapping) or "tid" not in params:
+            return False
+
+        return self.transaction_cache.seen(source, destination, params["tid"])
+
     def dev_key_message_received(
         self, source: int, remote: bool, net_index: int, message: ParsedMeshMessage
     ):
@@ -149,7 +575,11 @@ class Model:
             message,
         )
 
-        callbacks = self.dev_message_callbacks[message["opcode"]]
+        opcode = message["opcode"]
+
+        self.dev_expectations.notify((opcode, source, net_index), message)
+
+        callbacks = self.dev_message_callbacks[opcode]
 
         for callback in list(callbacks):
             if callback(source, net_index, message):
@@ -162,6 +592,8 @@ class Model:
         destination: Optional[Union[int, UUID]],
         opcode: int,
         params: MessageDescription,
+        *,
+        timeout: Optional[float] = None,
     ) -> asyncio.Future:
         """
         Create an `asyncio.Future` that gets fulfilled when a specific
@@ -183,26 +615,17 @@ class Model:
 
         :param source: Sender address
         :param app_index: Index of the application key
-        :param destination: Destination address
+        :param destination: Destination address, or None to accept any
         :param opcode: Expected message opcode.
         :param params: Expected message parameters.
+        :param timeout: Cancel the future after this many seconds.
         """
 
         future = asyncio.Future()
+        match = compile_match(params) if params else None
 
-        def app_message_received(
-            _source: int,
-            _app_index: int,
-            _destination: Union[int, UUID],
-            message: ParsedMeshMessage,
-        ):
-            if (_source != source) or (_app_index != app_index):
-                return False
-
-            if destination is not None and (_destination != destination):
-                return False
-
-            if params and not construct_match(message["params"], params):
+        def app_message_received(message: ParsedMeshMessage):
+            if match and not match(message_params(message)):
                 return False
 
             if not future.done():
@@ -210,12 +633,23 @@ class Model:
 
             return True
 
-        self.app_message_callbacks[opcode].add(app_message_received)
+        self.app_expectations.watch(
+            (opcode, source, app_index, destination),
+            app_message_received,
+            future,
+            timeout,
+        )
 
         return future
 
     def expect_dev(
-        self, source: int, net_index: int, opcode: int, params: MessageDescription
+        self,
+        source: int,
+        net_index: int,
+        opcode: int,
+        params: MessageDescription,
+        *,
+        timeout: Optional[float] = None,
     ) -> asyncio.Future:
         """
         Create an `asyncio.Future` that gets fulfilled when a specific
@@ -230,17 +664,14 @@ class Model:
         :param net_index: Index of the network key
         :param opcode: Expected message opcode.
         :param params: Expected message parameters.
+        :param timeout: Cancel the future after this many seconds.
         """
 
         future = asyncio.Future()
+        match = compile_match(params) if params else None
 
-        def dev_message_received(
-            _source: int, _net_index: int, message: ParsedMeshMessage
-        ):
-            if (_source != source) or (_net_index != net_index):
-                return False
-
-            if params and not construct_match(message["params"], params):
+        def dev_message_received(message: ParsedMeshMessage):
+            if match and not match(message_params(message)):
                 return False
 
             if not future.done():
@@ -248,19 +679,32 @@ class Model:
 
             return True
 
-        self.dev_message_callbacks[opcode].add(dev_message_received)
+        self.dev_expectations.watch(
+            (opcode, source, net_index), dev_message_received, future, timeout
+        )
 
         return future
 
     async def _send_app(self, destination: int, app_index: int, data: bytes):
-        self.logger.debug(
-            "Sending: %s -> %04x [app_index %d] %s",
-            self.element.path,
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending: %s -> %04x [app_index %d] %s",
+                self.element.path,
+                destination,
+                app_index,
+                data.hex(),
+            )
+
+        await self._shaped(
             destination,
-            app_index,
-            data.hex(),
+            partial(
+                self._node_interface.send,
+                self.element.path,
+                destination,
+                app_index,
+                data,
+            ),
         )
-        await self._node_interface.send(self.element.path, destination, app_index, data)
 
     async def send_app(
         self, destination: int, app_index: int, opcode: int, params: MessageDescription
@@ -276,31 +720,42 @@ class Model:
 
         data = AccessMessage.build(dict(opcode=opcode, params=params))
 
-        message = AccessMessage.parse(data)
-        self.logger.debug(
-            "Sending: %s -> %04x [app_index %d] %r",
-            self.element.path,
-            destination,
-            app_index,
-            message,
-        )
+        # parsing the message back is only useful for the log, skip it
+        # unless someone is going to read it
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending: %s -> %04x [app_index %d] %r",
+                self.element.path,
+                destination,
+                app_index,
+                AccessMessage.parse(data),
+            )
 
         await self._send_app(destination, app_index, data)
 
     async def _send_dev(
         self, destination: int, remote: bool, net_index: int, data: bytes
     ):
-        self.logger.debug(
-            "Sending: %s -> %04x [remote %s, net_index %d] %s",
-            self.element.path,
-            destination,
-            remote,
-            net_index,
-            data.hex(),
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending: %s -> %04x [remote %s, net_index %d] %s",
+                self.element.path,
+                destination,
+                remote,
+                net_index,
+                data.hex(),
+            )
 
-        await self._node_interface.dev_key_send(
-            self.element.path, destination, remote, net_index, data
+        await self._shaped(
+            destination,
+            partial(
+                self._node_interface.dev_key_send,
+                self.element.path,
+                destination,
+                remote,
+                net_index,
+                data,
+            ),
         )
 
     async def send_dev(
@@ -328,18 +783,70 @@ class Model:
         remote = True
         data = AccessMessage.build(dict(opcode=opcode, params=params))
 
-        message = AccessMessage.parse(data)
-        self.logger.debug(
-            "Sending: %s -> %04x [remote %s, net_index %d] %r",
-            self.element.path,
-            destination,
-            remote,
-            net_index,
-            message,
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending: %s -> %04x [remote %s, net_index %d] %r",
+                self.element.path,
+                destination,
+                remote,
+                net_index,
+                AccessMessage.parse(data),
+            )
 
         await self._send_dev(destination, remote, net_index, data)
 
+    async def publish(self, opcode: int, params: MessageDescription):
+        """
+        Send a message using the model's publication settings.
+
+        Publication address, application key and retransmissions are
+        configured on the node by a Configuration Client, see
+        :py:func:`bluetooth_mesh.models.ConfigClient.set_publication`.
+
+        :param opcode: Message opcode.
+        :param params: Message parameters.
+        """
+
+        data = AccessMessage.build(dict(opcode=opcode, params=params))
+        vendor, model_id = self.MODEL_ID
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Publishing: %s %s",
+                self.element.path,
+                AccessMessage.parse(data),
+            )
+
+        await self._shaped(
+            None,
+            partial(
+                self._node_interface.publish,
+                self.element.path,
+                model_id,
+                data,
+                vendor=vendor,
+            ),
+        )
+
+    def publication_message(self) -> Optional[Tuple[int, MessageDescription]]:
+        """
+        Message published periodically by
+        :py:class:`bluetooth_mesh.publication.PublicationScheduler`, as an
+        `(opcode, params)` tuple.
+
+        By default, models don't publish anything. Override it in models that
+        keep state.
+        """
+        return None
+
+    def state_changed(self):
+        """
+        Publish :py:func:`publication_message` at once, if the model is
+        published by a :py:class:`bluetooth_mesh.publication.PublicationScheduler`.
+        """
+        if self.publication_scheduler is not None:
+            self.publication_scheduler.publish_now(self)
+
     async def repeat(
         self,
         request: Callable[[], Awaitable],
@@ -360,6 +867,34 @@ class Model:
             await request()
             await asyncio.sleep(send_interval)
 
+    async def repeat_latest(
+        self,
+        key: Hashable,
+        request: Callable[[], Awaitable],
+        *,
+        retransmissions: int = 6,
+        send_interval: float = 0.05,
+    ) -> bool:
+        """
+        Application retransmissions, superseded by a newer request with the
+        same `key`.
+
+        See :py:func:`repeat` and :py:class:`bluetooth_mesh.utils.Coalescer`.
+
+        :return: True if all retransmissions were sent, False if a newer
+            request cancelled them.
+        """
+
+        return await self.coalescer.submit(
+            key,
+            partial(
+                self.repeat,
+                request,
+                retransmissions=retransmissions,
+                send_interval=send_interval,
+            ),
+        )
+
     async def query(
         self,
         request: Callable[[], Awaitable[None]],
@@ -394,29 +929,41 @@ class Model:
 
         return status.result()
 
-    async def bulk_query(
+    async def bulk_query_iter(
         self,
         requests: Mapping[Hashable, Callable[[], Awaitable[None]]],
         statuses: Mapping[Hashable, asyncio.Future],
         *,
         send_interval: float = 0.5,
-        progress_callback: Optional[ProgressCallback] = None,
         timeout: float = 5.0,
-    ) -> Mapping[Hashable, Any]:
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ) -> AsyncIterator[Tuple[Hashable, Any]]:
         """
-        Bulk query
+        Bulk query, yielding `(key, result)` pairs as soon as each status
+        arrives, without collecting the results.
+
+        Statuses that time out are yielded with a `TimeoutError`. Leaving the
+        loop early (or closing the generator) stops sending and cancels all
+        statuses that are still pending.
+
+        Entries of `requests` and `statuses` are removed as soon as their
+        result is yielded, so nothing is kept for nodes that already answered.
+
+        See :py:func:`bulk_query`.
 
         :param requests:
         :param statuses:
         :param send_interval:
-        :param progress_callback:
         :param timeout:
+        :param scheduler:
 
         """
 
-        done = {}
-
         async def sender():
+            if scheduler is not None:
+                await scheduler.run(requests, statuses)
+                return
+
             while requests:
                 for request in list(requests.values()):
                     await request()
@@ -425,9 +972,57 @@ class Model:
         key_mapping = {status: key for key, status in statuses.items()}
 
         sender = asyncio.ensure_future(sender())
-        async for status, result in Gatherer(statuses.values(), timeout=timeout):
-            key = key_mapping[status]
-            requests.pop(key)
+        try:
+            async for status, result in Gatherer(statuses.values(), timeout=timeout):
+                key = key_mapping.pop(status)
+                requests.pop(key, None)
+                statuses.pop(key, None)
+                yield key, result
+        finally:
+            with suppress(asyncio.CancelledError):
+                sender.cancel()
+                await sender
+
+            for status in statuses.values():
+                status.cancel()
+
+    async def bulk_query(
+        self,
+        requests: Mapping[Hashable, Callable[[], Awaitable[None]]],
+        statuses: Mapping[Hashable, asyncio.Future],
+        *,
+        send_interval: float = 0.5,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: float = 5.0,
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ) -> Mapping[Hashable, Any]:
+        """
+        Bulk query
+
+        By default, outstanding requests are sent in a fixed order, with
+        `send_interval` between them. If `scheduler` is given, it decides
+        when each request is sent and `send_interval` is ignored, see
+        :py:class:`bluetooth_mesh.scheduler.AdaptiveScheduler`.
+
+        :param requests:
+        :param statuses:
+        :param send_interval:
+        :param progress_callback:
+        :param timeout:
+        :param scheduler:
+
+        """
+
+        done = {}
+
+        # the iterator removes yielded statuses, results are read from all
+        async for key, result in self.bulk_query_iter(
+            requests,
+            dict(statuses),
+            send_interval=send_interval,
+            timeout=timeout,
+            scheduler=scheduler,
+        ):
             done[key] = result
 
             if progress_callback:
@@ -435,14 +1030,9 @@ class Model:
                 if inspect.isawaitable(cb):
                     await cb
 
-        with suppress(asyncio.CancelledError):
-            sender.cancel()
-            await sender
-
         results = {}
 
-        for status in statuses.values():
-            key = key_mapping[status]
+        for key, status in statuses.items():
             if status.cancelled():
                 results[key] = asyncio.CancelledError()
             else:
@@ -450,6 +1040,63 @@ class Model:
 
         return results
 
+    async def fan_in_query(
+        self,
+        request: Callable[[], Awaitable[None]],
+        requests: Mapping[Hashable, Callable[[], Awaitable[None]]],
+        statuses: Mapping[Hashable, asyncio.Future],
+        *,
+        fan_in_timeout: float = 2.0,
+        send_interval: float = 0.5,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: float = 5.0,
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ) -> Mapping[Hashable, Any]:
+        """
+        Query many nodes with a single `request`, usually sent to a group or
+        virtual address they are subscribed to.
+
+        Statuses from all responding members are collected for up to
+        `fan_in_timeout`. Then, only the members that stayed silent are queried
+        individually with their `requests`, see :py:func:`bulk_query`.
+
+        :param request:
+        :param requests:
+        :param statuses:
+        :param fan_in_timeout:
+        :param send_interval:
+        :param progress_callback:
+        :param timeout:
+        :param scheduler:
+
+        """
+        await request()
+
+        pending = [status for status in statuses.values() if not status.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=fan_in_timeout)
+
+        silent = {
+            key: request
+            for key, request in requests.items()
+            if not statuses[key].done()
+        }
+
+        self.logger.debug(
+            "Fan-in query: %d of %d responded",
+            len(statuses) - len(silent),
+            len(statuses),
+        )
+
+        return await self.bulk_query(
+            silent,
+            statuses,
+            send_interval=send_interval,
+            progress_callback=progress_callback,
+            timeout=timeout,
+            scheduler=scheduler,
+        )
+
     async def subscribe(
         self,
         app_keys: Sequence[Tuple[int, int, "ApplicationKey"]],
@@ -552,6 +1199,9 @@ class Model:
 class ModelConfig:
     """
     Model Configuration class for mesh models.
+
+    :param publication_retransmit: Publish retransmit state, as
+        `dict(count=..., interval=timedelta(...))`
     """
 
     def __init__(
@@ -559,10 +1209,12 @@ class ModelConfig:
         bindings: List[int] = None,
         publication_period: timedelta = None,
         subscriptions: Set[Union[int, UUID]] = None,
+        publication_retransmit: Mapping[str, Any] = None,
     ):
         self.bindings = bindings
         self.publication_period = publication_period
         self.subscriptions = subscriptions
+        self.publication_retransmit = publication_retransmit
 
     def __str__(self):
         return f"<ModelConfig bindings={self.bindings}, subs={self.subscriptions}>"
@@ -22,14 +22,35 @@
 """
 This module implements mesh models, both clients and servers.
 """
+import asyncio
+import hashlib
 import inspect
 import itertools
+from array import array
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from functools import partial
-from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, Type
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    MutableSet,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 from construct import BitStruct
 
+from bluetooth_mesh.composition import CompositionDataCache
 from bluetooth_mesh.crypto import ApplicationKey, NetworkKey
 from bluetooth_mesh.messages.config import (
     CompositionData,
@@ -48,7 +69,7 @@ from bluetooth_mesh.messages.generic.light.lightness import (
 from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
 from bluetooth_mesh.messages.health import HealthOpcode
 from bluetooth_mesh.messages.properties import PropertyID
-from bluetooth_mesh.messages.scene import SceneOpcode
+from bluetooth_mesh.messages.scene import SceneOpcode, SceneStatusCode
 from bluetooth_mesh.messages.sensor import SensorOpcode
 from bluetooth_mesh.messages.silvair.debug import DebugOpcode, DebugSubOpcode
 from bluetooth_mesh.messages.silvair.gateway_config_server import (
@@ -64,15 +85,26 @@ from bluetooth_mesh.messages.silvair.light_extended_controller import (
 )
 from bluetooth_mesh.messages.silvair.network_diagnostic_server import (
     NetworkDiagnosticServerOpcode,
+    NetworkDiagnosticServerSubOpcode,
     NetworkDiagnosticSetupServerOpcode,
+    NetworkDiagnosticSetupServerSubOpcode,
 )
 from bluetooth_mesh.messages.time import TimeOpcode, TimeRole
-from bluetooth_mesh.models.base import Model
-from bluetooth_mesh.utils import ModelOperationError, ProgressCallback
+from bluetooth_mesh.models.base import MessageTemplate, Model
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+from bluetooth_mesh.shaper import Priority
+from bluetooth_mesh.topology import HopGraph
+from bluetooth_mesh.utils import (
+    MessageDescription,
+    ModelOperationError,
+    ProgressCallback,
+    message_params,
+)
 
 __all__ = [
     "ConfigServer",
     "ConfigClient",
+    "NodeConfiguration",
     "HealthServer",
     "HealthClient",
     "DebugServer",
@@ -89,7 +121,9 @@ __all__ = [
     "LightCTLClient",
     "GatewayConfigServer",
     "GatewayConfigClient",
+    "GatewayConfiguration",
     "LightExtendedControllerSetupClient",
+    "PropertyTable",
 ]
 
 AppKeyStatus = NamedTuple(
@@ -147,6 +181,53 @@ ModelPublicationStatus = NamedTuple(
     ],
 )
 
+PropertyTable = NamedTuple(
+    "PropertyTable",
+    [
+        ("nodes", List[int]),
+        ("properties", List[int]),
+        ("values", List[List[Optional[Any]]]),
+    ],
+)
+
+ArapTable = NamedTuple(
+    "ArapTable",
+    [
+        ("addresses", array),
+        ("ivi", array),
+        ("sequence", array),
+    ],
+)
+
+NodeConfiguration = NamedTuple(
+    "NodeConfiguration",
+    [
+        # (net_key_index, app_key_index, app_key)
+        ("app_keys", Sequence[Tuple[int, int, ApplicationKey]]),
+        # (element_address, app_key_index, model)
+        ("bindings", Sequence[Tuple[int, int, Type[Model]]]),
+        # (element_address, subscription_address, model)
+        ("subscriptions", Sequence[Tuple[int, int, Type[Model]]]),
+        # (element_address, publication_address, app_key_index, model)
+        ("publications", Sequence[Tuple[int, int, int, Type[Model]]]),
+    ],
+)
+
+
+class GatewayConfiguration(NamedTuple):
+    """
+    Desired gateway configuration. Fields left as None are not changed.
+    """
+
+    mtu: Optional[int] = None
+    mac: Optional[str] = None
+    server: Optional[Tuple[str, int]] = None
+    reconnect: Optional[int] = None
+    dns: Optional[str] = None
+    ip: Optional[str] = None
+    gateway: Optional[str] = None
+    netmask: Optional[int] = None
+
 
 class ConfigServer(Model):
     MODEL_ID = (None, 0x0000)
@@ -181,6 +262,7 @@ class ConfigClient(Model):
         ConfigOpcode.CONFIG_VENDOR_MODEL_APP_LIST,
         ConfigOpcode.CONFIG_VENDOR_MODEL_SUBSCRIPTION_LIST,
     }
+    PRIORITY = Priority.CONFIG
 
     @staticmethod
     def _get_model_id(model):
@@ -191,17 +273,9 @@ class ConfigClient(Model):
 
         return dict(model_id=model_id)
 
-    async def get_param(
-        self,
-        nodes: Iterable[int],
-        net_index: int,
-        request: dict,
-        status: dict,
-        *,
-        send_interval: float = 1.0,
-        progress_callback: Optional[ProgressCallback] = None,
-        timeout: Optional[float] = None,
-    ) -> Dict[int, Optional[Any]]:
+    def _param_queries(
+        self, nodes: Iterable[int], net_index: int, request: dict, status: dict
+    ):
         requests = {
             node: partial(
                 self.send_dev,
@@ -223,6 +297,42 @@ class ConfigClient(Model):
             for node in nodes
         }
 
+        return requests, statuses
+
+    async def get_param_iter(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        request: dict,
+        status: dict,
+        *,
+        send_interval: float = 1.0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, Optional[Any]]]:
+        """
+        Streaming variant of :py:func:`get_param`, yielding `(node, params)`
+        as soon as each node responds, or `(node, None)` when it times out.
+        """
+        requests, statuses = self._param_queries(nodes, net_index, request, status)
+
+        async for node, result in self.bulk_query_iter(
+            requests, statuses, send_interval=send_interval, timeout=timeout
+        ):
+            yield node, None if isinstance(result, Exception) else result["params"]
+
+    async def get_param(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        request: dict,
+        status: dict,
+        *,
+        send_interval: float = 1.0,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        requests, statuses = self._param_queries(nodes, net_index, request, status)
+
         async def _progress_callback(address, result, done, total):
             if isinstance(result, TimeoutError):
                 self.logger.warning("Callback timeout for addr %s", address)
@@ -250,13 +360,57 @@ class ConfigClient(Model):
 
     async def get_composition_data(
         self,
-        nodes: Sequence[int],
+        nodes: Iterable[int],
         net_index: int,
         send_interval: float = 2.0,
         progress_callback: Optional[ProgressCallback] = None,
         timeout: float = None,
-    ) -> CompositionData:
-        return await self.get_param(
+        *,
+        cache: Optional[CompositionDataCache] = None,
+        probe: Optional[Callable[[Sequence[int]], Awaitable[Mapping[int, Any]]]] = None,
+        identities: Optional[Mapping[int, Tuple[int, int, int]]] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Get page 0 of composition data.
+
+        With `cache`, nodes with a stored entry are not asked for their
+        composition data, and fetched pages are stored. If `probe` is given,
+        it's awaited with the list of nodes and should return a fingerprint
+        per node (e.g. :py:func:`DebugClient.get_firmware_version`). Entries
+        stored with a different fingerprint are fetched again.
+
+        `identities` are the known (CID, PID, VID) of nodes, e.g. from the
+        provisioning database. Entries stored for a device with a different
+        identity, such as one that was since replaced, are fetched again.
+
+        :return: Composition data page 0 per node, None for nodes that didn't
+            respond.
+        """
+        nodes = list(nodes)
+        cached = {}  # type: Dict[int, Any]
+        fingerprints = {}  # type: Mapping[int, Any]
+        identities = identities or {}
+
+        if cache is not None:
+            if probe is not None:
+                fingerprints = await probe(nodes)
+
+            remaining = []
+            for node in nodes:
+                params = cache.get(
+                    node, fingerprints.get(node), identity=identities.get(node)
+                )
+                if params is None:
+                    remaining.append(node)
+                else:
+                    cached[node] = params
+
+            if not remaining:
+                return cached
+
+            nodes = remaining
+
+        results = await self.get_param(
             nodes,
             net_index,
             request=dict(
@@ -276,6 +430,15 @@ class ConfigClient(Model):
             timeout=timeout or 2 * send_interval * len(nodes),
         )
 
+        if cache is not None:
+            for node, params in results.items():
+                if params is not None:
+                    cache.put(node, params, fingerprints.get(node), save=False)
+
+            cache.save()
+
+        return {**cached, **results}
+
     async def get_default_ttl(
         self,
         nodes: Sequence[int],
@@ -502,8 +665,8 @@ class ConfigClient(Model):
             net_index=net_index,
             opcode=ConfigOpcode.CONFIG_APPKEY_UPDATE,
             params=dict(
-                app_key_index=0,
-                net_key_index=0,
+                app_key_index=app_key_index,
+                net_key_index=net_key_index,
                 app_key=app_key.bytes,
             ),
         )
@@ -559,6 +722,48 @@ class ConfigClient(Model):
             model,
         )
 
+    async def unbind_app_key(
+        self,
+        destination: int,
+        net_index: int,
+        element_address: int,
+        app_key_index: int,
+        model: Type[Model],
+    ) -> ModelBindStatus:
+        status = self.expect_dev(
+            destination,
+            net_index=net_index,
+            opcode=ConfigOpcode.CONFIG_MODEL_APP_STATUS,
+            params=dict(
+                element_address=element_address,
+                app_key_index=app_key_index,
+                model=self._get_model_id(model),
+            ),
+        )
+
+        request = partial(
+            self.send_dev,
+            destination,
+            net_index=net_index,
+            opcode=ConfigOpcode.CONFIG_MODEL_APP_UNBIND,
+            params=dict(
+                element_address=element_address,
+                app_key_index=app_key_index,
+                model=self._get_model_id(model),
+            ),
+        )
+
+        status = await self.query(request, status)
+
+        if status["params"]["status"] != StatusCode.SUCCESS:
+            raise ModelOperationError("Cannot unbind app key", status)
+
+        return ModelBindStatus(
+            status["params"]["element_address"],
+            status["params"]["app_key_index"],
+            model,
+        )
+
     async def get_network_transmission(
         self, destination: int, net_index: int
     ) -> Tuple[int, int]:
@@ -944,6 +1149,332 @@ class ConfigClient(Model):
 
         return status["params"]["beacon"]
 
+    @staticmethod
+    def _app_key_step(node: int, net_key_index: int, app_key_index: int, app_key):
+        # keys may be persisted, so they hold a digest instead of the key
+        return (
+            node,
+            "app_key",
+            net_key_index,
+            app_key_index,
+            hashlib.sha256(app_key.bytes).hexdigest(),
+        )
+
+    @staticmethod
+    def _stored_steps(
+        applied: Iterable[Hashable],
+    ) -> Dict[int, Dict[Tuple, Hashable]]:
+        # application keys and publications are set per index and per model,
+        # so a different value replaces the applied one
+        stored = defaultdict(dict)  # type: Dict[int, Dict[Tuple, Hashable]]
+
+        for key in applied:
+            if not isinstance(key, tuple) or len(key) < 2:
+                continue
+
+            if key[1] == "app_key":
+                stored[key[0]][("app_key", key[2], key[3])] = key
+            elif key[1] == "publication":
+                stored[key[0]][("publication", key[2], key[5])] = key
+
+        return stored
+
+    def _configuration_steps(
+        self,
+        node: int,
+        net_index: int,
+        configuration: NodeConfiguration,
+        previous: Optional[NodeConfiguration] = None,
+        stored: Optional[Mapping[Tuple, Hashable]] = None,
+    ) -> Iterable[
+        Tuple[Optional[Hashable], Callable[[], Awaitable[Any]], Optional[Hashable]]
+    ]:
+        """
+        Steps bringing `node` from `previous` to `configuration`, as tuples of
+        (key added to applied steps, step, key removed from applied steps).
+
+        `stored` maps application key indices and publishing models to keys
+        of steps that set them, see :py:func:`_stored_steps`.
+        """
+        previous = previous or NodeConfiguration([], [], [], [])
+        stored = dict(stored or {})
+
+        for net_key_index, app_key_index, app_key in previous.app_keys:
+            stored.setdefault(
+                ("app_key", net_key_index, app_key_index),
+                self._app_key_step(node, net_key_index, app_key_index, app_key),
+            )
+
+        for element_address, address, app_key_index, model in previous.publications:
+            stored.setdefault(
+                ("publication", element_address, model.MODEL_ID),
+                (
+                    node,
+                    "publication",
+                    element_address,
+                    address,
+                    app_key_index,
+                    model.MODEL_ID,
+                ),
+            )
+
+        # removals go first, in reverse dependency order
+        publications = {
+            (element_address, model.MODEL_ID)
+            for element_address, _, _, model in configuration.publications
+        }
+        for element_address, _, app_key_index, model in previous.publications:
+            if (element_address, model.MODEL_ID) in publications:
+                continue
+
+            # unassigned address disables publication
+            yield None, partial(
+                self.set_publication,
+                node,
+                net_index,
+                element_address=element_address,
+                publication_address=0,
+                app_key_index=app_key_index,
+                model=model,
+            ), stored[("publication", element_address, model.MODEL_ID)]
+
+        subscriptions = {
+            (element_address, address, model.MODEL_ID)
+            for element_address, address, model in configuration.subscriptions
+        }
+        for element_address, address, model in previous.subscriptions:
+            if (element_address, address, model.MODEL_ID) in subscriptions:
+                continue
+
+            yield None, partial(
+                self.del_subscription,
+                node,
+                net_index,
+                element_address=element_address,
+                subscription_address=address,
+                model=model,
+            ), (node, "subscription", element_address, address, model.MODEL_ID)
+
+        bindings = {
+            (element_address, app_key_index, model.MODEL_ID)
+            for element_address, app_key_index, model in configuration.bindings
+        }
+        for element_address, app_key_index, model in previous.bindings:
+            if (element_address, app_key_index, model.MODEL_ID) in bindings:
+                continue
+
+            yield None, partial(
+                self.unbind_app_key,
+                node,
+                net_index,
+                element_address=element_address,
+                app_key_index=app_key_index,
+                model=model,
+            ), (node, "binding", element_address, app_key_index, model.MODEL_ID)
+
+        app_keys = {
+            (net_key_index, app_key_index)
+            for net_key_index, app_key_index, _ in configuration.app_keys
+        }
+        for net_key_index, app_key_index, app_key in previous.app_keys:
+            if (net_key_index, app_key_index) in app_keys:
+                continue
+
+            yield None, partial(
+                self.delete_app_key,
+                node,
+                net_index,
+                app_key_index=app_key_index,
+                net_key_index=net_key_index,
+            ), stored[("app_key", net_key_index, app_key_index)]
+
+        # keys are needed before bindings, bindings before publications
+        for net_key_index, app_key_index, app_key in configuration.app_keys:
+            key = self._app_key_step(node, net_key_index, app_key_index, app_key)
+            replaced = stored.get(("app_key", net_key_index, app_key_index))
+
+            if replaced is None or replaced == key:
+                yield key, partial(
+                    self.add_app_key,
+                    node,
+                    net_index,
+                    app_key_index=app_key_index,
+                    net_key_index=net_key_index,
+                    app_key=app_key,
+                ), None
+                continue
+
+            # the node already stores a different key at this index
+            yield key, partial(
+                self.update_app_key,
+                node,
+                net_index,
+                net_key_index=net_key_index,
+                app_key_index=app_key_index,
+                app_key=app_key,
+            ), replaced
+
+        for element_address, app_key_index, model in configuration.bindings:
+            yield (
+                node,
+                "binding",
+                element_address,
+                app_key_index,
+                model.MODEL_ID,
+            ), partial(
+                self.bind_app_key,
+                node,
+                net_index,
+                element_address=element_address,
+                app_key_index=app_key_index,
+                model=model,
+            ), None
+
+        for element_address, address, model in configuration.subscriptions:
+            yield (
+                node,
+                "subscription",
+                element_address,
+                address,
+                model.MODEL_ID,
+            ), partial(
+                self.add_subscription,
+                node,
+                net_index,
+                element_address=element_address,
+                subscription_address=address,
+                model=model,
+            ), None
+
+        for (
+            element_address,
+            address,
+            app_key_index,
+            model,
+        ) in configuration.publications:
+            key = (
+                node,
+                "publication",
+                element_address,
+                address,
+                app_key_index,
+                model.MODEL_ID,
+            )
+            replaced = stored.get(("publication", element_address, model.MODEL_ID))
+
+            # a new publication replaces the previous one
+            yield key, partial(
+                self.set_publication,
+                node,
+                net_index,
+                element_address=element_address,
+                publication_address=address,
+                app_key_index=app_key_index,
+                model=model,
+            ), None if replaced == key else replaced
+
+    async def apply_configuration(
+        self,
+        configurations: Mapping[int, NodeConfiguration],
+        net_index: int,
+        *,
+        previous: Optional[Mapping[int, NodeConfiguration]] = None,
+        applied: Optional[MutableSet[Hashable]] = None,
+        concurrency: int = 16,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[int, Optional[Exception]]:
+        """
+        Bring many nodes to a target configuration.
+
+        If `previous` configurations of nodes are given, publications,
+        subscriptions, bindings and application keys they contain but the
+        target doesn't are removed first. Then, in dependency order,
+        application keys are added, bindings, subscriptions and finally
+        publications are set. Up to `concurrency` nodes are configured at the
+        same time, while the outbound rate is limited by the application's
+        shaper, if any.
+
+        Keys of completed steps are added to `applied`, and steps already in
+        it are skipped. Keep `applied` in persistent storage to resume an
+        interrupted run: steps are idempotent, so repeating the one that was
+        in flight during a crash is harmless. A key covers all values applied
+        by its step, so steps changed in the plan since are run again, and
+        an application key changed at an index already stored on the node
+        (according to `previous` or `applied`) is updated instead of added.
+        Removals drop the keys of the steps they undo.
+
+        A node stops at the first failed step. Running the same plan again
+        retries it from there. Unexpected errors stop only the node they
+        occurred on.
+
+        :param configurations: Target configuration per node address
+        :param net_index: Index of the network key
+        :param previous: Configuration per node address the nodes had before
+        :param applied: Keys of already completed steps
+        :param concurrency: Number of nodes configured at the same time
+        :param progress_callback: Called with `(node, result, results,
+            configurations)` when a node is finished
+        :return: None for each configured node, or the exception that stopped it
+        """
+        applied = set() if applied is None else applied
+        previous = previous or {}
+        semaphore = asyncio.Semaphore(concurrency)
+        results = {}  # type: Dict[int, Optional[Exception]]
+
+        stored = self._stored_steps(applied)
+
+        async def configure(node, configuration):
+            async with semaphore:
+                try:
+                    for key, step, removes in self._configuration_steps(
+                        node,
+                        net_index,
+                        configuration,
+                        previous.get(node),
+                        stored.get(node),
+                    ):
+                        if key is not None and key in applied:
+                            continue
+
+                        await step()
+
+                        if removes is not None:
+                            applied.discard(removes)
+                        if key is not None:
+                            applied.add(key)
+                except (asyncio.TimeoutError, ModelOperationError) as ex:
+                    self.logger.warning("Cannot configure %04x: %r", node, ex)
+                    results[node] = ex
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:  # pylint: disable=broad-except
+                    self.logger.exception("Cannot configure %04x", node)
+                    results[node] = ex
+                else:
+                    results[node] = None
+
+            if progress_callback is not None:
+                aw = progress_callback(node, results[node], results, configurations)
+                if inspect.isawaitable(aw):
+                    await aw
+
+        outcomes = await asyncio.gather(
+            *(
+                configure(node, configuration)
+                for node, configuration in configurations.items()
+            ),
+            return_exceptions=True,
+        )
+
+        # only a failing progress callback gets here
+        for node, outcome in zip(configurations, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(
+                    "Progress callback failed for %04x: %r", node, outcome
+                )
+
+        return {node: results[node] for node in configurations}
+
 
 class HealthServer(Model):
     MODEL_ID = (None, 0x0002)
@@ -974,6 +1505,7 @@ class HealthClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    PRIORITY = Priority.DIAGNOSTICS
 
     async def attention(self, destination: int, app_index: int, attention: int) -> int:
         status = self.expect_app(
@@ -1000,17 +1532,176 @@ class HealthClient(Model):
         return status["params"]["attention"]
 
     async def attention_unack(self, destination: int, app_index: int, attention: int):
+        template = MessageTemplate(
+            HealthOpcode.HEALTH_ATTENTION_SET_UNACKNOWLEDGED,
+            dict(
+                attention=attention,
+            ),
+        )
+
+        request = partial(self._send_app, destination, app_index, template.render())
+
+        await self.repeat(request)
+
+    async def fault_get(self, destination: int, app_index: int, company_id: int) -> Any:
+        status = self.expect_app(
+            destination,
+            app_index=app_index,
+            destination=None,
+            opcode=HealthOpcode.HEALTH_FAULT_STATUS,
+            params=dict(company_id=company_id),
+        )
+
         request = partial(
             self.send_app,
             destination,
             app_index=app_index,
-            opcode=HealthOpcode.HEALTH_ATTENTION_SET_UNACKNOWLEDGED,
-            params=dict(
-                attention=attention,
-            ),
+            opcode=HealthOpcode.HEALTH_FAULT_GET,
+            params=dict(company_id=company_id),
         )
 
-        await self.repeat(request)
+        status = await self.query(request, status)
+        return status["params"]
+
+    async def fault_clear(
+        self, destination: int, app_index: int, company_id: int
+    ) -> Any:
+        status = self.expect_app(
+            destination,
+            app_index=app_index,
+            destination=None,
+            opcode=HealthOpcode.HEALTH_FAULT_STATUS,
+            params=dict(company_id=company_id),
+        )
+
+        request = partial(
+            self.send_app,
+            destination,
+            app_index=app_index,
+            opcode=HealthOpcode.HEALTH_FAULT_CLEAR,
+            params=dict(company_id=company_id),
+        )
+
+        status = await self.query(request, status)
+        return status["params"]
+
+    async def fault_test(
+        self, destination: int, app_index: int, test_id: int, company_id: int
+    ) -> Any:
+        status = self.expect_app(
+            destination,
+            app_index=app_index,
+            destination=None,
+            opcode=HealthOpcode.HEALTH_FAULT_STATUS,
+            params=dict(test_id=test_id, company_id=company_id),
+        )
+
+        request = partial(
+            self.send_app,
+            destination,
+            app_index=app_index,
+            opcode=HealthOpcode.HEALTH_FAULT_TEST,
+            params=dict(test_id=test_id, company_id=company_id),
+        )
+
+        status = await self.query(request, status)
+        return status["params"]
+
+    async def period_get(self, destination: int, app_index: int) -> int:
+        status = self.expect_app(
+            destination,
+            app_index=app_index,
+            destination=None,
+            opcode=HealthOpcode.HEALTH_PERIOD_STATUS,
+            params=dict(),
+        )
+
+        request = partial(
+            self.send_app,
+            destination,
+            app_index=app_index,
+            opcode=HealthOpcode.HEALTH_PERIOD_GET,
+            params=dict(),
+        )
+
+        status = await self.query(request, status)
+        return status["params"]["fast_period_divisor"]
+
+    async def period_set(
+        self, destination: int, app_index: int, fast_period_divisor: int
+    ) -> int:
+        status = self.expect_app(
+            destination,
+            app_index=app_index,
+            destination=None,
+            opcode=HealthOpcode.HEALTH_PERIOD_STATUS,
+            params=dict(fast_period_divisor=fast_period_divisor),
+        )
+
+        request = partial(
+            self.send_app,
+            destination,
+            app_index=app_index,
+            opcode=HealthOpcode.HEALTH_PERIOD_SET,
+            params=dict(fast_period_divisor=fast_period_divisor),
+        )
+
+        status = await self.query(request, status)
+        return status["params"]["fast_period_divisor"]
+
+    async def get_faults(
+        self,
+        nodes: Iterable[int],
+        app_index: int,
+        company_id: int,
+        *,
+        send_interval: float = 0.1,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Read registered faults of many nodes.
+
+        :return: Fault status of each node, or None if it didn't respond
+        """
+        nodes = list(nodes)
+
+        requests = {
+            node: partial(
+                self.send_app,
+                node,
+                app_index=app_index,
+                opcode=HealthOpcode.HEALTH_FAULT_GET,
+                params=dict(company_id=company_id),
+            )
+            for node in nodes
+        }
+
+        statuses = {
+            node: self.expect_app(
+                node,
+                app_index=app_index,
+                destination=None,
+                opcode=HealthOpcode.HEALTH_FAULT_STATUS,
+                params=dict(company_id=company_id),
+            )
+            for node in nodes
+        }
+
+        results = await self.bulk_query(
+            requests,
+            statuses,
+            send_interval=send_interval,
+            progress_callback=progress_callback,
+            timeout=timeout or len(nodes) * 0.5,
+            scheduler=scheduler,
+        )
+
+        return {
+            node: None if isinstance(result, Exception) else result["params"]
+            for node, result in results.items()
+        }
 
 
 class DebugServer(Model):
@@ -1029,18 +1720,11 @@ class DebugClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    PRIORITY = Priority.DIAGNOSTICS
 
-    async def get_param(
-        self,
-        nodes: Iterable[int],
-        net_index: int,
-        request: int,
-        status: int,
-        *,
-        send_interval: float = 1.0,
-        progress_callback: Optional[ProgressCallback] = None,
-        timeout: Optional[float] = None,
-    ) -> Dict[int, Optional[Any]]:
+    def _param_queries(
+        self, nodes: Iterable[int], net_index: int, request: int, status: int
+    ):
         requests = {
             node: partial(
                 self.send_dev,
@@ -1062,6 +1746,44 @@ class DebugClient(Model):
             for node in nodes
         }
 
+        return requests, statuses
+
+    async def get_param_iter(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        request: int,
+        status: int,
+        *,
+        send_interval: float = 1.0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, Optional[Any]]]:
+        """
+        Streaming variant of :py:func:`get_param`, yielding `(node, data)`
+        as soon as each node responds, or `(node, None)` when it times out.
+        """
+        requests, statuses = self._param_queries(nodes, net_index, request, status)
+
+        async for node, result in self.bulk_query_iter(
+            requests, statuses, send_interval=send_interval, timeout=timeout
+        ):
+            yield node, (
+                None if isinstance(result, Exception) else result["params"]["data"]
+            )
+
+    async def get_param(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        request: int,
+        status: int,
+        *,
+        send_interval: float = 1.0,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        requests, statuses = self._param_queries(nodes, net_index, request, status)
+
         async def _progress_callback(address, result, done, total):
             if isinstance(result, TimeoutError):
                 self.logger.warning("Callback timeout for addr %s", address)
@@ -1160,33 +1882,160 @@ class DebugClient(Model):
             timeout=max(5, len(nodes) * 2),
         )
 
+    def _arap_page_queries(self, nodes: Iterable[int], net_index: int, page: int):
+        requests = {
+            node: partial(
+                self.send_dev,
+                node,
+                net_index=net_index,
+                opcode=DebugOpcode.SILVAIR_DEBUG,
+                params=dict(
+                    subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_GET,
+                    payload=dict(page=page),
+                ),
+            )
+            for node in nodes
+        }
+
+        statuses = {
+            node: self.expect_dev(
+                node,
+                net_index=0,
+                opcode=DebugOpcode.SILVAIR_DEBUG,
+                params=dict(
+                    subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_STATUS,
+                    payload=dict(current_page=page),
+                ),
+            )
+            for node in nodes
+        }
+
+        return requests, statuses
+
     async def get_arap_content(
         self,
         nodes: Sequence[int],
         app_index: int,
         *,
+        send_interval: float = 0.5,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[int, Optional[ArapTable]]:
+        """
+        Get full ARAP lists, following pages until each node's last one.
+
+        Page `n` is requested from all nodes that have it at once, so the
+        number of rounds depends on the longest list, not on the number of
+        nodes.
+
+        :return: ARAP table per node, or None if any of its pages was lost
+        """
+        # entries of each node by page index, so a repeated page counts once
+        pages = defaultdict(dict)  # type: Dict[int, Dict[int, Mapping[int, Any]]]
+        last_pages = {}  # type: Dict[int, int]
+        failed = set()
+
+        pending = list(nodes)
+        page = 0
+
+        while pending:
+            requests, statuses = self._arap_page_queries(pending, app_index, page)
+
+            results = await self.bulk_query(
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=max(2.5, len(pending) * 1.0),
+                progress_callback=progress_callback,
+            )
+
+            for node, result in results.items():
+                if isinstance(result, Exception):
+                    failed.add(node)
+                    continue
+
+                payload = message_params(result)["payload"]
+                if payload["current_page"] != page:
+                    failed.add(node)
+                    continue
+
+                pages[node][page] = payload["nodes"]
+                last_pages[node] = payload["last_page"]
+
+            page += 1
+            pending = [
+                node
+                for node in pending
+                if node not in failed and last_pages[node] >= page
+            ]
+
+        tables = {}  # type: Dict[int, Optional[ArapTable]]
+        for node in nodes:
+            if node in failed:
+                tables[node] = None
+                continue
+
+            table = tables[node] = ArapTable(array("H"), array("B"), array("L"))
+            for _, entries in sorted(pages[node].items()):
+                for address, entry in sorted(entries.items()):
+                    table.addresses.append(address)
+                    table.ivi.append(entry["ivi"])
+                    table.sequence.append(entry["sequence"])
+
+        return tables
+
+
+class NetworkDiagnosticClient(Model):
+    MODEL_ID = (0x0136, 0x0014)
+    OPCODES = {
+        NetworkDiagnosticServerOpcode.SILVAIR_NDS,
+    }
+    PUBLISH = True
+    SUBSCRIBE = True
+    PRIORITY = Priority.DIAGNOSTICS
+
+    async def set_subscription(
+        self,
+        nodes: Iterable[int],
+        app_index: int,
+        destination: int,
+        period: int,
+        *,
+        send_interval: float = 0.1,
         progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
     ) -> Dict[int, Optional[Any]]:
+        """
+        Ask nodes to collect their registry of received messages for `period`
+        seconds and report it to `destination`.
+
+        :return: Subscription status of each node, or None if it didn't respond
+        """
+        nodes = list(nodes)
+
         requests = {
             node: partial(
-                self.send_dev,
+                self.send_app,
                 node,
-                net_index=app_index,
-                opcode=DebugOpcode.SILVAIR_DEBUG,
+                app_index=app_index,
+                opcode=NetworkDiagnosticServerOpcode.SILVAIR_NDS,
                 params=dict(
-                    subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_GET,
-                    data=dict(page=0),
+                    subopcode=NetworkDiagnosticServerSubOpcode.SUBSCRIPTION_SET,
+                    payload=dict(destination=destination, period=period),
                 ),
             )
             for node in nodes
         }
 
         statuses = {
-            node: self.expect_dev(
+            node: self.expect_app(
                 node,
-                net_index=0,
-                opcode=DebugOpcode.SILVAIR_DEBUG,
-                params=dict(subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_STATUS),
+                app_index=app_index,
+                destination=None,
+                opcode=NetworkDiagnosticServerOpcode.SILVAIR_NDS,
+                params=dict(
+                    subopcode=NetworkDiagnosticServerSubOpcode.SUBSCRIPTION_STATUS,
+                    payload=dict(destination=destination),
+                ),
             )
             for node in nodes
         }
@@ -1194,24 +2043,51 @@ class DebugClient(Model):
         results = await self.bulk_query(
             requests,
             statuses,
-            send_interval=0.5,
-            timeout=max(2.5, len(nodes) * 1.0),
+            send_interval=send_interval,
+            timeout=timeout or len(nodes) * 0.5,
             progress_callback=progress_callback,
         )
 
         return {
-            node: None if isinstance(result, Exception) else result["params"]["data"]
+            node: None if isinstance(result, Exception) else result["params"]["payload"]
             for node, result in results.items()
         }
 
-
-class NetworkDiagnosticClient(Model):
-    MODEL_ID = (0x0136, 0x0014)
-    OPCODES = {
-        NetworkDiagnosticServerOpcode.SILVAIR_NDS,
-    }
-    PUBLISH = True
-    SUBSCRIBE = True
+    async def registry_records(
+        self, *, graph: Optional[HopGraph] = None
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Yield `(reporter, records)` for every subscription status received
+        by this model, until the generator is closed.
+
+        If `graph` is given, it's updated with each report before the report
+        is yielded.
+        """
+        reports = asyncio.Queue()  # type: asyncio.Queue[Tuple[int, Any]]
+
+        def _received(source, app_index, destination, message):
+            # pylint: disable=W0613
+            params = message_params(message)
+            if (
+                params["subopcode"]
+                == NetworkDiagnosticServerSubOpcode.SUBSCRIPTION_STATUS
+            ):
+                reports.put_nowait((source, params["payload"]["record"]))
+
+        callbacks = self.app_message_callbacks[
+            NetworkDiagnosticServerOpcode.SILVAIR_NDS
+        ]
+        callbacks.add(_received)
+
+        try:
+            while True:
+                reporter, records = await reports.get()
+                if graph is not None:
+                    graph.update(reporter, records)
+
+                yield reporter, records
+        finally:
+            callbacks.discard(_received)
 
 
 class NetworkDiagnosticSetupClient(Model):
@@ -1220,6 +2096,83 @@ class NetworkDiagnosticSetupClient(Model):
         NetworkDiagnosticSetupServerOpcode.SILVAIR_NDS_SETUP,
     }
     PUBLISH = True
+    PRIORITY = Priority.CONFIG
+
+    async def set_publication(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        destination: int,
+        count: int,
+        period: float,
+        ttl: int,
+        *,
+        publication_net_index: Optional[int] = None,
+        send_interval: float = 0.1,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Configure where nodes publish their registry reports.
+
+        :param destination: Address the reports are sent to
+        :param count: Number of reports to publish
+        :param period: Interval between reports, in seconds
+        :param ttl: TTL of the reports
+        :param publication_net_index: Network key used for reports, defaults
+            to `net_index`
+        :return: Publication status of each node, or None if it didn't respond
+        """
+        nodes = list(nodes)
+        payload = dict(
+            destination=destination,
+            count=count,
+            period=period,
+            ttl=ttl,
+            net_key_index=(
+                net_index if publication_net_index is None else publication_net_index
+            ),
+        )
+
+        requests = {
+            node: partial(
+                self.send_dev,
+                node,
+                net_index=net_index,
+                opcode=NetworkDiagnosticSetupServerOpcode.SILVAIR_NDS_SETUP,
+                params=dict(
+                    subopcode=NetworkDiagnosticSetupServerSubOpcode.PUBLICATION_SET,
+                    payload=payload,
+                ),
+            )
+            for node in nodes
+        }
+
+        statuses = {
+            node: self.expect_dev(
+                node,
+                net_index=net_index,
+                opcode=NetworkDiagnosticSetupServerOpcode.SILVAIR_NDS_SETUP,
+                params=dict(
+                    subopcode=NetworkDiagnosticSetupServerSubOpcode.PUBLICATION_STATUS,
+                    payload=dict(destination=destination),
+                ),
+            )
+            for node in nodes
+        }
+
+        results = await self.bulk_query(
+            requests,
+            statuses,
+            send_interval=send_interval,
+            timeout=timeout or len(nodes) * 0.5,
+            progress_callback=progress_callback,
+        )
+
+        return {
+            node: None if isinstance(result, Exception) else result["params"]["payload"]
+            for node, result in results.items()
+        }
 
 
 class GenericOnOffServer(Model):
@@ -1232,6 +2185,21 @@ class GenericOnOffServer(Model):
     PUBLISH = True
     SUBSCRIBE = True
 
+    def __init__(self, element: "Element"):
+        super().__init__(element)
+        self.onoff = 0
+
+    def update_onoff(self, onoff: int):
+        """
+        Set the published OnOff state, publishing it at once if it changed.
+        """
+        if onoff != self.onoff:
+            self.onoff = onoff
+            self.state_changed()
+
+    def publication_message(self) -> Optional[Tuple[int, MessageDescription]]:
+        return GenericOnOffOpcode.GENERIC_ONOFF_STATUS, dict(present_onoff=self.onoff)
+
 
 class GenericOnOffClient(Model):
     MODEL_ID = (None, 0x1001)
@@ -1240,6 +2208,7 @@ class GenericOnOffClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    CACHED_OPCODES = {GenericOnOffOpcode.GENERIC_ONOFF_STATUS}
 
     async def set_onoff(
         self,
@@ -1249,8 +2218,9 @@ class GenericOnOffClient(Model):
         delay: float = 0.5,
         send_interval: float = 0.07,
     ) -> int:
+        self.invalidate_statuses([destination])
         current_delay = delay
-        tid = self.tid()
+        tid = self.tid(destination)
 
         status = self.expect_app(
             destination,
@@ -1260,22 +2230,22 @@ class GenericOnOffClient(Model):
             params=dict(present_onoff=onoff),
         )
 
+        template = MessageTemplate(
+            GenericOnOffOpcode.GENERIC_ONOFF_SET,
+            dict(
+                onoff=onoff,
+                tid=tid,
+                transition_time=0,
+                delay=current_delay,
+            ),
+        )
+
         async def request():
             nonlocal current_delay
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=GenericOnOffOpcode.GENERIC_ONOFF_SET,
-                params=dict(
-                    onoff=onoff,
-                    tid=tid,
-                    transition_time=0,
-                    delay=current_delay,
-                ),
-            )
+            data = template.render(delay=current_delay)
             current_delay = max(0.0, current_delay - send_interval)
 
-            return await ret
+            return await self._send_app(destination, app_index, data)
 
         status = await self.query(
             request, status, send_interval=send_interval, timeout=1
@@ -1292,26 +2262,37 @@ class GenericOnOffClient(Model):
         send_interval: float = 0.07,
         transition_time: float = 0,
         retransmissions: int = 6,
+        coalesce: bool = False,
     ):
+        self.invalidate_statuses([destination])
         current_delay = delay
-        tid = self.tid()
+        tid = self.tid(destination)
+
+        template = MessageTemplate(
+            GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED,
+            dict(
+                onoff=onoff,
+                tid=tid,
+                transition_time=transition_time,
+                delay=current_delay,
+            ),
+        )
 
         async def request():
             nonlocal current_delay
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED,
-                params=dict(
-                    onoff=onoff,
-                    tid=tid,
-                    transition_time=transition_time,
-                    delay=current_delay,
-                ),
-            )
+            data = template.render(delay=current_delay)
             current_delay = max(0.0, current_delay - send_interval)
 
-            return await ret
+            return await self._send_app(destination, app_index, data)
+
+        if coalesce:
+            await self.repeat_latest(
+                (destination, GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED),
+                request,
+                retransmissions=retransmissions,
+                send_interval=send_interval,
+            )
+            return
 
         await self.repeat(
             request,
@@ -1326,7 +2307,15 @@ class GenericOnOffClient(Model):
         *,
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
+        group: Optional[int] = None,
+        refresh: bool = False,
     ) -> Dict[int, Optional[Any]]:
+        cached, nodes = self.cached_statuses(
+            nodes, GenericOnOffOpcode.GENERIC_ONOFF_STATUS, refresh
+        )
+        if not nodes:
+            return cached
+
         requests = {
             node: partial(
                 self.send_app,
@@ -1349,16 +2338,34 @@ class GenericOnOffClient(Model):
             for node in nodes
         }
 
-        results = await self.bulk_query(
-            requests,
-            statuses,
-            send_interval=send_interval,
-            timeout=timeout or len(nodes) * 0.5,
-        )
+        if group is None:
+            results = await self.bulk_query(
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
+        else:
+            results = await self.fan_in_query(
+                partial(
+                    self.send_app,
+                    group,
+                    app_index=app_index,
+                    opcode=GenericOnOffOpcode.GENERIC_ONOFF_GET,
+                    params=dict(),
+                ),
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
 
         return {
-            node: None if isinstance(result, Exception) else result["params"]
-            for node, result in results.items()
+            **cached,
+            **{
+                node: None if isinstance(result, Exception) else result["params"]
+                for node, result in results.items()
+            },
         }
 
 
@@ -1378,6 +2385,7 @@ class SceneClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    CACHED_OPCODES = {SceneOpcode.SCENE_STATUS}
 
     async def recall_scene_unack(
         self,
@@ -1386,26 +2394,27 @@ class SceneClient(Model):
         scene_number: int,
         transition_time: float,
     ):
-        tid = self.tid()
+        self.invalidate_statuses([destination])
+        tid = self.tid(destination)
         current_delay = 0.5
         send_interval = 0.075
 
+        template = MessageTemplate(
+            SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
+            dict(
+                scene_number=scene_number,
+                tid=tid,
+                transition_time=transition_time,
+                delay=current_delay,
+            ),
+        )
+
         async def request():
             nonlocal current_delay
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
-                params=dict(
-                    scene_number=scene_number,
-                    tid=tid,
-                    transition_time=transition_time,
-                    delay=current_delay,
-                ),
-            )
+            data = template.render(delay=current_delay)
             current_delay = max(0.0, current_delay - send_interval)
 
-            return await ret
+            return await self._send_app(destination, app_index, data)
 
         await self.repeat(request, retransmissions=6, send_interval=send_interval)
 
@@ -1416,7 +2425,13 @@ class SceneClient(Model):
         *,
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
+        group: Optional[int] = None,
+        refresh: bool = False,
     ):
+        cached, nodes = self.cached_statuses(nodes, SceneOpcode.SCENE_STATUS, refresh)
+        if not nodes:
+            return cached
+
         requests = {
             node: partial(
                 self.send_app,
@@ -1439,18 +2454,237 @@ class SceneClient(Model):
             for node in nodes
         }
 
-        results = await self.bulk_query(
-            requests,
-            statuses,
-            send_interval=send_interval,
-            timeout=timeout or len(nodes) * 0.5,
-        )
+        if group is None:
+            results = await self.bulk_query(
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
+        else:
+            results = await self.fan_in_query(
+                partial(
+                    self.send_app,
+                    group,
+                    app_index=app_index,
+                    opcode=SceneOpcode.SCENE_GET,
+                    params=dict(),
+                ),
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
 
         return {
-            node: None if isinstance(result, Exception) else result["params"]
-            for node, result in results.items()
+            **cached,
+            **{
+                node: None if isinstance(result, Exception) else result["params"]
+                for node, result in results.items()
+            },
         }
 
+    async def _verified_group_query(
+        self,
+        nodes: Sequence[int],
+        app_index: int,
+        opcode: int,
+        params: Mapping[str, Any],
+        status_opcode: int,
+        confirmed: Callable[[Any], bool],
+        *,
+        group: Optional[int],
+        rounds: int,
+        fan_in_timeout: float,
+        send_interval: float,
+        timeout: Optional[float],
+    ) -> Dict[int, Optional[Any]]:
+        results = {node: None for node in nodes}  # type: Dict[int, Optional[Any]]
+        pending = list(nodes)
+
+        for attempt in range(rounds):
+            requests = {
+                node: partial(
+                    self.send_app,
+                    node,
+                    app_index=app_index,
+                    opcode=opcode,
+                    params=params,
+                )
+                for node in pending
+            }
+
+            statuses = {
+                node: self.expect_app(
+                    node,
+                    app_index=app_index,
+                    destination=None,
+                    opcode=status_opcode,
+                    params=dict(),
+                )
+                for node in pending
+            }
+
+            if group is not None and attempt == 0:
+                replies = await self.fan_in_query(
+                    partial(
+                        self.send_app,
+                        group,
+                        app_index=app_index,
+                        opcode=opcode,
+                        params=params,
+                    ),
+                    requests,
+                    statuses,
+                    fan_in_timeout=fan_in_timeout,
+                    send_interval=send_interval,
+                    timeout=timeout or len(pending) * 0.5,
+                )
+            else:
+                replies = await self.bulk_query(
+                    requests,
+                    statuses,
+                    send_interval=send_interval,
+                    timeout=timeout or len(pending) * 0.5,
+                )
+
+            for node, reply in replies.items():
+                if not isinstance(reply, Exception) and confirmed(reply["params"]):
+                    results[node] = reply["params"]
+
+            pending = [node for node in pending if results[node] is None]
+            if not pending:
+                break
+
+        return results
+
+    async def recall_scene(
+        self,
+        nodes: Sequence[int],
+        app_index: int,
+        scene_number: int,
+        *,
+        transition_time: Optional[float] = None,
+        group: Optional[int] = None,
+        rounds: int = 2,
+        fan_in_timeout: float = 2.0,
+        send_interval: float = 0.1,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Recall a scene on `nodes` and confirm it with their statuses.
+
+        If `group` is given, the first round is a single message sent to the
+        group. Nodes that stay silent, or report a different scene, are retried
+        individually, for up to `rounds` rounds in total.
+
+        :return: Scene status of each node, or None if it didn't confirm the
+            scene
+        """
+        self.invalidate_statuses([*nodes, group])
+        params = dict(scene_number=scene_number, tid=self.tid(group))
+        if transition_time is not None:
+            params.update(transition_time=transition_time, delay=0)
+
+        def confirmed(status):
+            return status["status_code"] == SceneStatusCode.SUCCESS and (
+                scene_number in (status["current_scene"], status.get("target_scene"))
+            )
+
+        return await self._verified_group_query(
+            nodes,
+            app_index,
+            SceneOpcode.SCENE_RECALL,
+            params,
+            SceneOpcode.SCENE_STATUS,
+            confirmed,
+            group=group,
+            rounds=rounds,
+            fan_in_timeout=fan_in_timeout,
+            send_interval=send_interval,
+            timeout=timeout,
+        )
+
+    async def store_scene(
+        self,
+        nodes: Sequence[int],
+        app_index: int,
+        scene_number: int,
+        *,
+        group: Optional[int] = None,
+        rounds: int = 2,
+        fan_in_timeout: float = 2.0,
+        send_interval: float = 0.1,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Store current state of `nodes` as a scene, see :py:func:`recall_scene`.
+
+        :return: Scene register status of each node, or None if it didn't
+            confirm the scene
+        """
+        self.invalidate_statuses([*nodes, group])
+
+        def confirmed(status):
+            return (
+                status["status_code"] == SceneStatusCode.SUCCESS
+                and scene_number in status["scenes"]
+            )
+
+        return await self._verified_group_query(
+            nodes,
+            app_index,
+            SceneOpcode.SCENE_STORE,
+            dict(scene_number=scene_number),
+            SceneOpcode.SCENE_REGISTER_STATUS,
+            confirmed,
+            group=group,
+            rounds=rounds,
+            fan_in_timeout=fan_in_timeout,
+            send_interval=send_interval,
+            timeout=timeout,
+        )
+
+    async def delete_scene(
+        self,
+        nodes: Sequence[int],
+        app_index: int,
+        scene_number: int,
+        *,
+        group: Optional[int] = None,
+        rounds: int = 2,
+        fan_in_timeout: float = 2.0,
+        send_interval: float = 0.1,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, Optional[Any]]:
+        """
+        Delete a scene from `nodes`, see :py:func:`recall_scene`.
+
+        :return: Scene register status of each node, or None if it didn't
+            confirm the deletion
+        """
+        self.invalidate_statuses([*nodes, group])
+
+        def confirmed(status):
+            return (
+                status["status_code"] == SceneStatusCode.SUCCESS
+                and scene_number not in status["scenes"]
+            )
+
+        return await self._verified_group_query(
+            nodes,
+            app_index,
+            SceneOpcode.SCENE_DELETE,
+            dict(scene_number=scene_number),
+            SceneOpcode.SCENE_REGISTER_STATUS,
+            confirmed,
+            group=group,
+            rounds=rounds,
+            fan_in_timeout=fan_in_timeout,
+            send_interval=send_interval,
+            timeout=timeout,
+        )
+
 
 class GenericLevelClient(Model):
     MODEL_ID = (None, 0x1003)
@@ -1475,26 +2709,36 @@ class GenericLevelClient(Model):
         send_interval: float = 0.07,
         transition_time: float = 0,
         retransmissions: int = 6,
+        coalesce: bool = False,
     ):
-        tid = self.tid()
+        tid = self.tid(destination)
         current_delay = delay
 
+        template = MessageTemplate(
+            GenericLevelOpcode.GENERIC_LEVEL_SET_UNACKNOWLEDGED,
+            dict(
+                level=level,
+                tid=tid,
+                transition_time=transition_time,
+                delay=current_delay,
+            ),
+        )
+
         async def request():
             nonlocal current_delay
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=GenericLevelOpcode.GENERIC_LEVEL_SET_UNACKNOWLEDGED,
-                params=dict(
-                    level=level,
-                    tid=tid,
-                    transition_time=transition_time,
-                    delay=current_delay,
-                ),
-            )
+            data = template.render(delay=current_delay)
             current_delay = max(0.0, current_delay - send_interval)
 
-            return await ret
+            return await self._send_app(destination, app_index, data)
+
+        if coalesce:
+            await self.repeat_latest(
+                (destination, GenericLevelOpcode.GENERIC_LEVEL_SET_UNACKNOWLEDGED),
+                request,
+                retransmissions=retransmissions,
+                send_interval=send_interval,
+            )
+            return
 
         await self.repeat(
             request,
@@ -1514,6 +2758,24 @@ class LightLightnessServer(Model):
     PUBLISH = True
     SUBSCRIBE = True
 
+    def __init__(self, element: "Element"):
+        super().__init__(element)
+        self.lightness = 0
+
+    def update_lightness(self, lightness: int):
+        """
+        Set the published Lightness state, publishing it at once if it changed.
+        """
+        if lightness != self.lightness:
+            self.lightness = lightness
+            self.state_changed()
+
+    def publication_message(self) -> Optional[Tuple[int, MessageDescription]]:
+        return (
+            LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS,
+            dict(present_lightness=self.lightness),
+        )
+
 
 class LightLightnessSetupServer(Model):
     MODEL_ID = (None, 0x1301)
@@ -1534,6 +2796,7 @@ class LightLightnessClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    CACHED_OPCODES = {LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS}
 
     async def set_lightness_range_unack(
         self,
@@ -1545,18 +2808,15 @@ class LightLightnessClient(Model):
         retransmissions: int = 6,
         send_interval: float = 0.075,
     ) -> None:
-        async def request():
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=LightLightnessSetupOpcode.LIGHT_LIGHTNESS_SETUP_RANGE_SET_UNACKNOWLEDGED,
-                params=dict(
-                    range_min=min_lightness,
-                    range_max=max_lightness,
-                ),
-            )
+        template = MessageTemplate(
+            LightLightnessSetupOpcode.LIGHT_LIGHTNESS_SETUP_RANGE_SET_UNACKNOWLEDGED,
+            dict(
+                range_min=min_lightness,
+                range_max=max_lightness,
+            ),
+        )
 
-            return await ret
+        request = partial(self._send_app, destination, app_index, template.render())
 
         await self.repeat(
             request, retransmissions=retransmissions, send_interval=send_interval
@@ -1578,7 +2838,9 @@ class LightLightnessClient(Model):
             app_index=app_index,
             opcode=LightLightnessSetupOpcode.LIGHT_LIGHTNESS_SETUP_RANGE_SET,
             params=dict(
-                range_min=min_lightness, range_max=max_lightness, tid=self.tid()
+                range_min=min_lightness,
+                range_max=max_lightness,
+                tid=self.tid(destination),
             ),
         )
 
@@ -1648,7 +2910,15 @@ class LightLightnessClient(Model):
         *,
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
+        group: Optional[int] = None,
+        refresh: bool = False,
     ) -> Dict[int, Optional[Any]]:
+        cached, nodes = self.cached_statuses(
+            nodes, LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS, refresh
+        )
+        if not nodes:
+            return cached
+
         requests = {
             node: partial(
                 self.send_app,
@@ -1671,16 +2941,34 @@ class LightLightnessClient(Model):
             for node in nodes
         }
 
-        results = await self.bulk_query(
-            requests,
-            statuses,
-            send_interval=send_interval,
-            timeout=timeout or len(nodes) * 0.5,
-        )
+        if group is None:
+            results = await self.bulk_query(
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
+        else:
+            results = await self.fan_in_query(
+                partial(
+                    self.send_app,
+                    group,
+                    app_index=app_index,
+                    opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_GET,
+                    params=dict(),
+                ),
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
 
         return {
-            node: None if isinstance(result, Exception) else result["params"]
-            for node, result in results.items()
+            **cached,
+            **{
+                node: None if isinstance(result, Exception) else result["params"]
+                for node, result in results.items()
+            },
         }
 
     async def set_lightness_unack(
@@ -1693,26 +2981,37 @@ class LightLightnessClient(Model):
         delay: float = 0.5,
         retransmissions: int = 6,
         send_interval: float = 0.075,
+        coalesce: bool = False,
     ) -> None:
-        tid = self.tid()
+        self.invalidate_statuses([destination])
+        tid = self.tid(destination)
         remaining_delay = delay
 
+        template = MessageTemplate(
+            LightLightnessOpcode.LIGHT_LIGHTNESS_SET_UNACKNOWLEDGED,
+            dict(
+                lightness=lightness,
+                delay=remaining_delay,
+                tid=tid,
+                transition_time=transition_time,
+            ),
+        )
+
         async def request():
             nonlocal remaining_delay
-            ret = self.send_app(
-                destination,
-                app_index=app_index,
-                opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_SET_UNACKNOWLEDGED,
-                params=dict(
-                    lightness=lightness,
-                    delay=remaining_delay,
-                    tid=tid,
-                    transition_time=transition_time,
-                ),
-            )
+            data = template.render(delay=remaining_delay)
             remaining_delay = max(0.0, remaining_delay - send_interval)
 
-            return await ret
+            return await self._send_app(destination, app_index, data)
+
+        if coalesce:
+            await self.repeat_latest(
+                (destination, LightLightnessOpcode.LIGHT_LIGHTNESS_SET_UNACKNOWLEDGED),
+                request,
+                retransmissions=retransmissions,
+                send_interval=send_interval,
+            )
+            return
 
         await self.repeat(
             request, retransmissions=retransmissions, send_interval=send_interval
@@ -1728,13 +3027,14 @@ class LightLightnessClient(Model):
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
     ) -> Dict[int, Optional[Any]]:
+        self.invalidate_statuses(nodes)
         requests = {
             node: partial(
                 self.send_app,
                 node,
                 app_index=app_index,
                 opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_SET,
-                params=dict(lightness=lightness, tid=self.tid()),
+                params=dict(lightness=lightness, tid=self.tid(node)),
             )
             for node in nodes
         }
@@ -1824,6 +3124,7 @@ class SensorClient(Model):
         *,
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
+        group: Optional[int] = None,
     ) -> Dict[int, Optional[Any]]:
         requests = {
             node: partial(
@@ -1847,12 +3148,27 @@ class SensorClient(Model):
             for node in nodes
         }
 
-        results = await self.bulk_query(
-            requests,
-            statuses,
-            send_interval=send_interval,
-            timeout=timeout or len(nodes) * 0.5,
-        )
+        if group is None:
+            results = await self.bulk_query(
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
+        else:
+            results = await self.fan_in_query(
+                partial(
+                    self.send_app,
+                    group,
+                    app_index=app_index,
+                    opcode=SensorOpcode.SENSOR_GET,
+                    params=dict(property_id=property_id),
+                ),
+                requests,
+                statuses,
+                send_interval=send_interval,
+                timeout=timeout or len(nodes) * 0.5,
+            )
 
         return {
             node: None if isinstance(result, Exception) else result["params"]
@@ -1878,6 +3194,7 @@ class LightCTLClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    CACHED_OPCODES = {LightCTLOpcode.LIGHT_CTL_TEMPERATURE_STATUS}
 
     async def get_ctl(
         self,
@@ -1886,7 +3203,14 @@ class LightCTLClient(Model):
         *,
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
+        refresh: bool = False,
     ) -> Dict[int, Optional[Any]]:
+        cached, nodes = self.cached_statuses(
+            nodes, LightCTLOpcode.LIGHT_CTL_TEMPERATURE_STATUS, refresh
+        )
+        if not nodes:
+            return cached
+
         requests = {
             node: partial(
                 self.send_app,
@@ -1917,10 +3241,61 @@ class LightCTLClient(Model):
         )
 
         return {
-            node: None if isinstance(result, Exception) else result["params"]
-            for node, result in results.items()
+            **cached,
+            **{
+                node: None if isinstance(result, Exception) else result["params"]
+                for node, result in results.items()
+            },
         }
 
+    async def set_ctl_temperature_unack(
+        self,
+        destination: int,
+        app_index: int,
+        ctl_temperature: int,
+        transition_time: float = 0,
+        *,
+        ctl_delta_uv: int = 0,
+        delay: float = 0.5,
+        retransmissions: int = 6,
+        send_interval: float = 0.075,
+        coalesce: bool = False,
+    ) -> None:
+        self.invalidate_statuses([destination])
+        tid = self.tid(destination)
+        remaining_delay = delay
+
+        template = MessageTemplate(
+            LightCTLOpcode.LIGHT_CTL_TEMPERATURE_SET_UNACKNOWLEDGED,
+            dict(
+                ctl_temperature=ctl_temperature,
+                ctl_delta_uv=ctl_delta_uv,
+                tid=tid,
+                transition_time=transition_time,
+                delay=remaining_delay,
+            ),
+        )
+
+        async def request():
+            nonlocal remaining_delay
+            data = template.render(delay=remaining_delay)
+            remaining_delay = max(0.0, remaining_delay - send_interval)
+
+            return await self._send_app(destination, app_index, data)
+
+        if coalesce:
+            await self.repeat_latest(
+                (destination, LightCTLOpcode.LIGHT_CTL_TEMPERATURE_SET_UNACKNOWLEDGED),
+                request,
+                retransmissions=retransmissions,
+                send_interval=send_interval,
+            )
+            return
+
+        await self.repeat(
+            request, retransmissions=retransmissions, send_interval=send_interval
+        )
+
     async def set_ctl(
         self,
         nodes: Sequence[int],
@@ -1930,6 +3305,7 @@ class LightCTLClient(Model):
         send_interval: float = 0.1,
         timeout: Optional[float] = None,
     ) -> Dict[int, Optional[Any]]:
+        self.invalidate_statuses(nodes)
         requests = {
             node: partial(
                 self.send_app,
@@ -1937,7 +3313,7 @@ class LightCTLClient(Model):
                 app_index=app_index,
                 opcode=LightCTLOpcode.LIGHT_CTL_TEMPERATURE_SET,
                 params=dict(
-                    ctl_temperature=ctl_temperature, ctl_delta_uv=0, tid=self.tid()
+                    ctl_temperature=ctl_temperature, ctl_delta_uv=0, tid=self.tid(node)
                 ),
             )
             for node in nodes
@@ -2041,6 +3417,7 @@ class GatewayConfigClient(Model):
     }
     PUBLISH = True
     SUBSCRIBE = True
+    PRIORITY = Priority.CONFIG
 
     async def configuration_get(self, destination: int, net_index: int):
         request = partial(
@@ -2360,6 +3737,172 @@ class GatewayConfigClient(Model):
         )
         return await self.query(request, status, timeout=1.0)
 
+    @staticmethod
+    def _configuration_changes(
+        current: Mapping[str, Any], desired: GatewayConfiguration
+    ) -> Dict[str, Any]:
+        actual = GatewayConfiguration(
+            mtu=current["mtu_size"],
+            mac=str(current["mac_address"]).lower(),
+            server=(str(current["server_address"]), current["server_port_number"]),
+            reconnect=current["reconnect_interval"],
+            dns=str(current["dns_ip_address"]),
+            ip=str(current["ip_address"]),
+            gateway=str(current["gateway_ip_address"]),
+            netmask=current["netmask"],
+        )
+
+        wanted = desired._replace(
+            mac=desired.mac and desired.mac.lower(),
+            server=desired.server and (desired.server[0], desired.server[1]),
+            dns=desired.dns and str(desired.dns),
+            ip=desired.ip and str(desired.ip),
+            gateway=desired.gateway and str(desired.gateway),
+        )
+
+        return {
+            field: value
+            for field, value in wanted._asdict().items()
+            if value is not None and value != getattr(actual, field)
+        }
+
+    async def update_configuration(
+        self,
+        destination: int,
+        net_index: int,
+        configuration: GatewayConfiguration,
+        *,
+        max_separate: int = 1,
+    ) -> Any:
+        """
+        Bring a gateway to `configuration`, sending only what differs.
+
+        Current configuration is read first. Up to `max_separate` changed
+        fields are sent with their own set messages. When more fields change,
+        they are sent together in a single configuration set, which keeps the
+        gateway's current values of all other fields and its DHCP mode.
+
+        If anything was sent, the configuration is read once more and compared
+        with the desired one.
+
+        :return: Configuration status of the gateway
+        :raise ModelOperationError: If the gateway doesn't report the desired
+            configuration afterwards
+        """
+        status = await self.configuration_get(destination, net_index)
+        current = status["params"]["payload"]
+
+        changes = self._configuration_changes(current, configuration)
+        if not changes:
+            return current
+
+        if len(changes) <= max_separate:
+            setters = dict(
+                mtu=self.mtu_set,
+                mac=self.mac_set,
+                server=self.server_set,
+                reconnect=self.reconnect_set,
+                dns=self.dns_set,
+                ip=self.ip_set,
+                gateway=self.gateway_set,
+                netmask=self.netmask_set,
+            )
+
+            for field, value in changes.items():
+                await setters[field](destination, net_index, value)
+        else:
+            flags = current["flags"]
+            static = flags == DhcpFlag.DHCP_DISABLED or any(
+                field in changes for field in ("ip", "gateway", "netmask")
+            )
+            dns = (
+                static or flags == DhcpFlag.DHCP_ENABLED_STATIC_DNS or "dns" in changes
+            )
+
+            merged = dict(
+                mtu=current["mtu_size"],
+                mac=str(current["mac_address"]),
+                server=(str(current["server_address"]), current["server_port_number"]),
+                reconnect=current["reconnect_interval"],
+                dns=str(current["dns_ip_address"]) if dns else None,
+                ip=str(current["ip_address"]) if static else None,
+                gateway=str(current["gateway_ip_address"]) if static else None,
+                netmask=current["netmask"] if static else None,
+            )
+            merged.update(changes)
+
+            await self.configuration_set(destination, net_index, **merged)
+
+        status = await self.configuration_get(destination, net_index)
+        current = status["params"]["payload"]
+
+        remaining = self._configuration_changes(current, configuration)
+        if remaining:
+            raise ModelOperationError(
+                "Gateway %04x not configured: %s" % (destination, sorted(remaining)),
+                status,
+            )
+
+        return current
+
+    async def apply_gateway_configuration(
+        self,
+        configurations: Mapping[int, GatewayConfiguration],
+        net_index: int,
+        *,
+        concurrency: int = 8,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[int, Optional[Exception]]:
+        """
+        Run :py:func:`update_configuration` on many gateways at once.
+
+        :param configurations: Desired configuration per gateway address
+        :param concurrency: Number of gateways configured at the same time
+        :param progress_callback: Called with `(node, result, results,
+            configurations)` when a gateway is finished
+        :return: None for each configured gateway, or the exception that
+            stopped it
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        results = {}  # type: Dict[int, Optional[Exception]]
+
+        async def configure(node, configuration):
+            async with semaphore:
+                try:
+                    await self.update_configuration(node, net_index, configuration)
+                except (asyncio.TimeoutError, ModelOperationError) as ex:
+                    self.logger.warning("Cannot configure gateway %04x: %r", node, ex)
+                    results[node] = ex
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:  # pylint: disable=broad-except
+                    self.logger.exception("Cannot configure gateway %04x", node)
+                    results[node] = ex
+                else:
+                    results[node] = None
+
+            if progress_callback is not None:
+                aw = progress_callback(node, results[node], results, configurations)
+                if inspect.isawaitable(aw):
+                    await aw
+
+        outcomes = await asyncio.gather(
+            *(
+                configure(node, configuration)
+                for node, configuration in configurations.items()
+            ),
+            return_exceptions=True,
+        )
+
+        # only a failing progress callback gets here
+        for node, outcome in zip(configurations, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(
+                    "Progress callback failed for %04x: %r", node, outcome
+                )
+
+        return {node: results[node] for node in configurations}
+
 
 class LightExtendedControllerSetupClient(Model):
     MODEL_ID = (0x0136, 0x0012)
@@ -2368,6 +3911,7 @@ class LightExtendedControllerSetupClient(Model):
     }
     PUBLISH = False
     SUBSCRIBE = True
+    PRIORITY = Priority.CONFIG
 
     async def get_property(
         self,
@@ -2434,6 +3978,113 @@ class LightExtendedControllerSetupClient(Model):
             for node, result in results.items()
         }
 
+    async def get_properties(
+        self,
+        nodes: Iterable[int],
+        net_index: int,
+        property_ids: Iterable[int],
+        *,
+        outstanding: int = 2,
+        send_interval: float = 0.05,
+        timeout: float = 2.0,
+        retransmissions: int = 2,
+    ) -> PropertyTable:
+        """
+        Read several properties from many nodes at once.
+
+        Each node has up to `outstanding` requests waiting for a response.
+        Requests are sent round-robin across nodes, so a slow node only holds
+        its own slots, and a node gets its next property as soon as one of its
+        requests is answered.
+
+        :param outstanding: Maximum number of unanswered requests per node
+        :param timeout: Time to wait for a single response, counted from the
+            moment its request is sent
+        :param retransmissions: Number of retries of an unanswered request
+        :return: Table with a row per node and a column per property. Values
+            of properties that could not be read are None. Repeated property
+            IDs get a single column.
+        """
+        nodes = list(nodes)
+        property_ids = list(dict.fromkeys(property_ids))
+        columns = {
+            property_id: column for column, property_id in enumerate(property_ids)
+        }
+
+        table = PropertyTable(
+            nodes, property_ids, [[None] * len(property_ids) for _ in nodes]
+        )
+
+        queued = {
+            row: deque((property_id, 0) for property_id in property_ids)
+            for row in range(len(nodes))
+        }
+        in_flight = {}  # type: Dict[asyncio.Future, Tuple[int, int, int]]
+        busy = [0] * len(nodes)
+
+        async def send(row: int):
+            property_id, attempt = queued[row].popleft()
+
+            status = self.expect_dev(
+                nodes[row],
+                net_index=net_index,
+                opcode=LightExtendedControllerOpcode.SILVAIR_LEC,
+                params=dict(
+                    subopcode=LightExtendedControllerSubOpcode.PROPERTY_STATUS,
+                    payload=dict(id=property_id),
+                ),
+            )
+            in_flight[status] = (row, property_id, attempt)
+            busy[row] += 1
+
+            await self.send_dev(
+                nodes[row],
+                net_index=net_index,
+                opcode=LightExtendedControllerOpcode.SILVAIR_LEC,
+                params=dict(
+                    subopcode=LightExtendedControllerSubOpcode.PROPERTY_GET,
+                    payload=dict(id=property_id),
+                ),
+            )
+
+            # the shaper may hold the request, so the wait starts once it's sent
+            if not status.done():
+                handle = asyncio.get_event_loop().call_later(timeout, status.cancel)
+                status.add_done_callback(lambda _: handle.cancel())
+
+            await asyncio.sleep(send_interval)
+
+        try:
+            while in_flight or any(queued.values()):
+                for row in range(len(nodes)):
+                    if queued[row] and busy[row] < outstanding:
+                        await send(row)
+
+                if not in_flight:
+                    continue
+
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for status in done:
+                    row, property_id, attempt = in_flight.pop(status)
+                    busy[row] -= 1
+
+                    if status.cancelled():
+                        if attempt < retransmissions:
+                            queued[row].append((property_id, attempt + 1))
+                        continue
+
+                    table.values[row][columns[property_id]] = message_params(
+                        status.result()
+                    )["payload"]["value"]
+        finally:
+            for status in in_flight:
+                status.cancel()
+
+        return table
+
     async def get_auto_resume_mode(
         self, nodes: Sequence[int], net_index: int
     ) -> Dict[int, Optional[Any]]:
@@ -2458,6 +4109,10 @@ class LightExtendedControllerSetupClient(Model):
 
 
 class TimeServer(Model):
+    """
+    Publishes time read from :py:attr:`clock`, once it's set.
+    """
+
     MODEL_ID = (None, 0x1200)
     OPCODES = {
         TimeOpcode.TIME_GET,
@@ -2470,6 +4125,27 @@ class TimeServer(Model):
     PUBLISH = True
     SUBSCRIBE = True
 
+    def __init__(self, element: "Element"):
+        super().__init__(element)
+        self.clock = None  # type: Optional[Callable[[], datetime]]
+        self.uncertainty = timedelta(0)
+        self.tai_utc_delta = timedelta(0)
+        self.time_authority = False
+
+    def publication_message(self) -> Optional[Tuple[int, MessageDescription]]:
+        if self.clock is None:
+            return None
+
+        return (
+            TimeOpcode.TIME_STATUS,
+            dict(
+                date=self.clock(),
+                uncertainty=self.uncertainty,
+                tai_utc_delta=self.tai_utc_delta,
+                time_authority=self.time_authority,
+            ),
+        )
+
 
 class TimeSetupServer(Model):
     MODEL_ID = (None, 0x1201)
@@ -0,0 +1,240 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements periodic publication of model state.
+"""
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Dict, List, Optional, Tuple
+
+__all__ = [
+    "PublicationScheduler",
+]
+
+
+class _Entry:
+    __slots__ = ("model", "tick", "origin", "interval", "remaining")
+
+    def __init__(self, model: "Model"):
+        self.model = model
+        self.tick = 0
+        self.origin = 0
+        self.interval = 1
+        self.remaining = 0
+
+
+class PublicationScheduler:
+    """
+    Publishes state of many models on their configured periods.
+
+    All models share a single timer wheel of `slots` slots, advanced every
+    `resolution` seconds by one task. A model is placed in the slot of its
+    next publication, so each tick only looks at the models due around that
+    time, no matter how many are registered.
+
+    The period is taken from the model's
+    :py:attr:`bluetooth_mesh.models.base.ModelConfig.publication_period` at
+    every publication, so period changes made by a Configuration Client take
+    effect after the current period ends. Models with no period are skipped
+    until :py:func:`reschedule` is called. Models can also publish right
+    away, restarting their period, when their state changes, see
+    :py:func:`publish_now`.
+
+    Each publication is followed by the number of copies set in the model's
+    :py:attr:`bluetooth_mesh.models.base.ModelConfig.publication_retransmit`,
+    spaced by its interval and driven by the same wheel. The setting is read
+    when a publication starts, so changes apply to the next one.
+
+    Publications due at the same tick are sent concurrently, `batch` at a
+    time, through the application's shaper if it has one.
+
+    Models publish the message returned by their
+    :py:func:`bluetooth_mesh.models.base.Model.publication_message`.
+
+    :param resolution: Length of a tick, in seconds
+    :param slots: Number of slots in the wheel
+    :param batch: Number of publications sent at the same time
+    """
+
+    def __init__(
+        self,
+        *,
+        resolution: float = 0.1,
+        slots: int = 512,
+        batch: int = 16,
+        logger: logging.Logger = None,
+    ):
+        self.resolution = resolution
+        self.batch = batch
+        self.logger = logger or logging.getLogger(type(self).__name__)
+
+        self.published = 0
+        self.failed = 0
+
+        self._tick = 0
+        self._wheel = [[] for _ in range(slots)]  # type: List[List[_Entry]]
+        self._entries = {}  # type: Dict[Model, _Entry]
+        self._runner = None  # type: Optional[asyncio.Future]
+
+    def _ticks(self, seconds: float) -> int:
+        return max(1, round(seconds / self.resolution))
+
+    def _place(self, entry: _Entry, delay: int):
+        entry.tick = self._tick + delay
+        self._wheel[entry.tick % len(self._wheel)].append(entry)
+
+    def _period(self, model: "Model") -> Optional[int]:
+        period = model.configuration.publication_period
+        if not period:
+            return None
+
+        return self._ticks(period.total_seconds())
+
+    def _retransmit(self, model: "Model") -> Tuple[int, int]:
+        retransmit = model.configuration.publication_retransmit
+        if not retransmit:
+            return 0, 1
+
+        return (
+            retransmit["count"],
+            self._ticks(retransmit["interval"].total_seconds()),
+        )
+
+    def add(self, model: "Model"):
+        """
+        Start publishing state of `model`.
+        """
+        self._entries[model] = _Entry(model)
+        model.publication_scheduler = self
+
+        self.reschedule(model)
+
+    def add_element(self, element: "Element"):
+        """
+        Start publishing state of all publishing models of `element`.
+        """
+        for model_class in element.MODELS:
+            if model_class.PUBLISH:
+                self.add(element[model_class])
+
+    def remove(self, model: "Model"):
+        entry = self._entries.pop(model, None)
+        if entry is not None:
+            model.publication_scheduler = None
+            entry.tick = -1
+
+    def _restart(self, model: "Model") -> Optional[_Entry]:
+        old = self._entries.get(model)
+        if old is None:
+            return None
+
+        # entries are never taken out of slots, only superseded
+        entry = _Entry(model)
+        old.tick = -1
+        self._entries[model] = entry
+        return entry
+
+    def reschedule(self, model: "Model"):
+        """
+        Restart the period of `model`, e.g. after its configuration changed.
+        """
+        entry = self._restart(model)
+        if entry is None:
+            return
+
+        period = self._period(model)
+        if period is not None:
+            self._place(entry, period)
+
+    def publish_now(self, model: "Model"):
+        """
+        Publish state of `model` at the next tick and restart its period,
+        e.g. after the state changed.
+        """
+        entry = self._restart(model)
+        if entry is not None:
+            self._place(entry, 1)
+
+    async def _publish(self, entry: _Entry):
+        message = entry.model.publication_message()
+        if message is None:
+            return
+
+        try:
+            await entry.model.publish(*message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            self.failed += 1
+            self.logger.exception("Publication of %s failed", entry.model)
+        else:
+            self.published += 1
+
+    def _advance(self) -> List[_Entry]:
+        self._tick += 1
+        slot = self._wheel[self._tick % len(self._wheel)]
+
+        due = [entry for entry in slot if entry.tick == self._tick]
+        slot[:] = [entry for entry in slot if entry.tick > self._tick]
+
+        for entry in due:
+            if entry.remaining:
+                entry.remaining -= 1
+            else:
+                entry.origin = self._tick
+                entry.remaining, entry.interval = self._retransmit(entry.model)
+
+            if entry.remaining:
+                self._place(entry, entry.interval)
+                continue
+
+            # the period counts from the first copy, not the last retransmission
+            period = self._period(entry.model)
+            if period is not None:
+                self._place(entry, max(1, entry.origin + period - self._tick))
+
+        return due
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        next_tick = loop.time()
+
+        while True:
+            next_tick += self.resolution
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            due = self._advance()
+            for i in range(0, len(due), self.batch):
+                await asyncio.gather(
+                    *(self._publish(entry) for entry in due[i : i + self.batch])
+                )
+
+    def start(self):
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
@@ -0,0 +1,207 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements congestion-controlled sending of bulk requests.
+"""
+import asyncio
+import heapq
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, Hashable, List, Mapping, Tuple
+
+__all__ = [
+    "AdaptiveScheduler",
+]
+
+
+class AdaptiveScheduler:
+    """
+    Sends requests of :py:func:`bluetooth_mesh.models.Model.bulk_query` within
+    a congestion window.
+
+    The window limits how many requests may await a response at the same
+    time. It grows while responses arrive (by one per response until it
+    reaches the threshold, then by one per window's worth of responses) and
+    is halved when a request goes unanswered, at most once per
+    `retry_interval`.
+
+    Each destination keeps its own retry state: an unanswered request is
+    resent after `retry_interval`, doubling with every attempt up to
+    `max_retry_interval`. Destinations with fewer attempts are always served
+    first, so every node gets its first request before anyone gets a retry.
+
+    Regardless of the window, no more than `max_rate` messages per second are
+    sent. The cap, the window and the counters are shared by all bulk queries
+    using the same scheduler instance.
+
+    :param initial_window: Initial number of outstanding requests
+    :param min_window: Lower bound of the window
+    :param max_window: Upper bound of the window
+    :param max_rate: Global cap on messages per second
+    :param retry_interval: Time to wait for a response before a retry
+    :param max_retry_interval: Upper bound of per-destination retry backoff
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_window: float = 4,
+        min_window: float = 1,
+        max_window: float = 64,
+        max_rate: float = 20.0,
+        retry_interval: float = 1.0,
+        max_retry_interval: float = 8.0,
+    ):
+        self.window = float(initial_window)
+        self.min_window = min_window
+        self.max_window = max_window
+        self.threshold = float(max_window)
+        self.max_rate = max_rate
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self.in_flight = 0
+        self.sent = 0
+        self.retries = 0
+        self.responses = 0
+        self.timeouts = 0
+
+        self._next_send = 0.0
+        self._last_backoff = None
+
+    def on_response(self):
+        self.responses += 1
+
+        if self.window < self.threshold:
+            self.window += 1
+        else:
+            self.window += 1 / self.window
+
+        self.window = min(self.window, self.max_window)
+
+    def on_timeout(self, now: float):
+        self.timeouts += 1
+
+        # losses from a single burst should shrink the window only once
+        if self._last_backoff is not None:
+            if now - self._last_backoff < self.retry_interval:
+                return
+
+        self._last_backoff = now
+        self.threshold = max(self.min_window, self.window / 2)
+        self.window = self.threshold
+
+    def _retry_interval(self, attempts: int) -> float:
+        return min(self.retry_interval * 2 ** (attempts - 1), self.max_retry_interval)
+
+    async def run(
+        self,
+        requests: Mapping[Hashable, Callable[[], Awaitable[None]]],
+        statuses: Mapping[Hashable, asyncio.Future],
+    ):
+        """
+        Send `requests` until all `statuses` are done.
+
+        Keys removed from `requests` are treated as done as well.
+        """
+        loop = asyncio.get_event_loop()
+        wakeup = asyncio.Event()
+
+        attempts = {}  # type: Dict[Hashable, int]
+        deadlines = {}  # type: Dict[Hashable, float]
+        queue = [
+            (0, seq, key) for seq, key in enumerate(requests)
+        ]  # type: List[Tuple[int, int, Hashable]]
+        seq = len(queue)
+
+        def pending(key):
+            return key in requests and not statuses[key].done()
+
+        def land(key):
+            if deadlines.pop(key, None) is None:
+                return False
+
+            self.in_flight -= 1
+            return True
+
+        def done_callback(key):
+            def done(future):
+                if land(key) and not future.cancelled():
+                    self.on_response()
+                wakeup.set()
+
+            return done
+
+        for key in requests:
+            statuses[key].add_done_callback(done_callback(key))
+
+        try:
+            while True:
+                now = loop.time()
+
+                for key, deadline in list(deadlines.items()):
+                    if deadline > now:
+                        continue
+
+                    land(key)
+                    self.on_timeout(now)
+
+                    if pending(key):
+                        heapq.heappush(queue, (attempts[key], seq, key))
+                        seq += 1
+
+                while queue and not pending(queue[0][2]):
+                    heapq.heappop(queue)
+
+                if not queue and not deadlines:
+                    return
+
+                can_send = queue and self.in_flight < int(self.window)
+
+                if can_send and now >= self._next_send:
+                    count, _, key = heapq.heappop(queue)
+                    attempts[key] = count + 1
+
+                    if count:
+                        self.retries += 1
+
+                    deadlines[key] = now + self._retry_interval(count + 1)
+                    self.in_flight += 1
+                    self.sent += 1
+                    self._next_send = now + 1 / self.max_rate
+
+                    await requests[key]()
+                    continue
+
+                # the window may also be held by other bulk queries, so poll
+                # at the rate limit if there is nothing to wait for here
+                wake_at = min(deadlines.values(), default=now + 1 / self.max_rate)
+                if can_send:
+                    wake_at = min(wake_at, self._next_send)
+
+                wakeup.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        wakeup.wait(), timeout=max(0.0, wake_at - now)
+                    )
+        finally:
+            for key in list(deadlines):
+                land(key)
@@ -0,0 +1,390 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements long-running collection of sensor readings.
+"""
+import asyncio
+import heapq
+import logging
+from array import array
+from collections import defaultdict
+from contextlib import suppress
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from bluetooth_mesh.messages.sensor import SensorOpcode
+from bluetooth_mesh.models.models import SensorClient
+from bluetooth_mesh.utils import message_params
+
+__all__ = [
+    "Aggregate",
+    "SampleSeries",
+    "SensorCollector",
+]
+
+
+_STATUS_FIELDS = {"format", "length", "sensor_setting_property_id"}
+
+
+def descriptor_interval(value: int) -> Optional[float]:
+    """
+    Decode sensor measurement period or update interval, in seconds.
+
+    Both are encoded as 1.1 ** (value - 64) seconds, with 0 meaning "not
+    applicable".
+    """
+    if not value:
+        return None
+
+    return 1.1 ** (value - 64)
+
+
+def sample_value(item: Mapping[str, Any]) -> Optional[float]:
+    """
+    Numeric value of a single sensor status item, if it has one.
+    """
+    for key, value in item.items():
+        if key in _STATUS_FIELDS:
+            continue
+
+        if isinstance(value, Mapping):
+            value = next(
+                (v for v in value.values() if isinstance(v, (int, float))), None
+            )
+
+        # booleans, e.g. presence detected, are recorded as 0 and 1
+        if isinstance(value, (int, float)):
+            return float(value)
+
+        return None
+
+    return None
+
+
+class Aggregate(NamedTuple):
+    start: float
+    minimum: float
+    maximum: float
+    mean: float
+    count: int
+
+
+class SampleSeries:
+    """
+    Fixed-size history of a single sensor property.
+
+    The last `size` samples are kept as they are. Older history is kept as
+    `buckets` aggregates (minimum, maximum, mean and count), each covering
+    `bucket` seconds. Both are ring buffers backed by arrays, so memory use
+    doesn't depend on how long the collector runs.
+    """
+
+    def __init__(self, size: int = 16, bucket: float = 600.0, buckets: int = 24):
+        self.size = size
+        self.bucket = bucket
+
+        self._times = array("d", [0.0]) * size
+        self._values = array("d", [0.0]) * size
+        self._count = 0
+
+        self._starts = array("d", [float("-inf")]) * buckets
+        self._minimums = array("d", [0.0]) * buckets
+        self._maximums = array("d", [0.0]) * buckets
+        self._sums = array("d", [0.0]) * buckets
+        self._counts = array("L", [0]) * buckets
+
+    def add(self, time: float, value: float):
+        slot = self._count % self.size
+        self._times[slot] = time
+        self._values[slot] = value
+        self._count += 1
+
+        start = time - time % self.bucket
+        slot = int(start // self.bucket) % len(self._starts)
+
+        if self._starts[slot] != start:
+            self._starts[slot] = start
+            self._minimums[slot] = self._maximums[slot] = value
+            self._sums[slot] = value
+            self._counts[slot] = 1
+            return
+
+        self._minimums[slot] = min(self._minimums[slot], value)
+        self._maximums[slot] = max(self._maximums[slot], value)
+        self._sums[slot] += value
+        self._counts[slot] += 1
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    @property
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self._count:
+            return None
+
+        slot = (self._count - 1) % self.size
+        return self._times[slot], self._values[slot]
+
+    def samples(self) -> List[Tuple[float, float]]:
+        """
+        Raw samples, oldest first.
+        """
+        first = max(0, self._count - self.size)
+        return [
+            (self._times[i % self.size], self._values[i % self.size])
+            for i in range(first, self._count)
+        ]
+
+    def aggregates(self) -> List[Aggregate]:
+        """
+        Downsampled history, oldest first.
+        """
+        return sorted(
+            Aggregate(
+                start=self._starts[slot],
+                minimum=self._minimums[slot],
+                maximum=self._maximums[slot],
+                mean=self._sums[slot] / self._counts[slot],
+                count=self._counts[slot],
+            )
+            for slot in range(len(self._starts))
+            if self._counts[slot]
+        )
+
+
+class SensorCollector:
+    """
+    Polls sensor properties of many nodes and records their values.
+
+    Each (node, property) is polled at its own interval, taken from the
+    sensor descriptor: the longer of the update interval and the measurement
+    period, but no shorter than `min_interval`. Properties without timing in
+    the descriptor are polled every `default_interval`.
+
+    Status messages received by `client` are recorded whether they were
+    requested or not. An unsolicited status postpones the next poll of that
+    property by a full interval, so sensors that publish on their own are
+    polled only when they stop doing so.
+
+    Polls due at the same time are batched per property and sent with
+    :py:func:`bluetooth_mesh.models.SensorClient.get_sensor`. The schedule
+    holds a single entry per (node, property): a status only moves the due
+    time, and the entry is moved when it reaches the top of the schedule.
+
+    :param client: Sensor client used for descriptors, polls and statuses
+    :param app_index: Application key index
+    :param extract: Function returning a numeric value of a status item
+    """
+
+    def __init__(
+        self,
+        client: SensorClient,
+        app_index: int,
+        *,
+        min_interval: float = 10.0,
+        default_interval: float = 60.0,
+        size: int = 16,
+        bucket: float = 600.0,
+        buckets: int = 24,
+        extract: Callable[[Mapping[str, Any]], Optional[float]] = sample_value,
+    ):
+        self.client = client
+        self.app_index = app_index
+        self.min_interval = min_interval
+        self.default_interval = default_interval
+        self.extract = extract
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self._series_args = dict(size=size, bucket=bucket, buckets=buckets)
+        self.series = {}  # type: Dict[Tuple[int, int], SampleSeries]
+        self.intervals = {}  # type: Dict[Tuple[int, int], float]
+
+        self._due = {}  # type: Dict[Tuple[int, int], float]
+        self._queued = {}  # type: Dict[Tuple[int, int], float]
+        self._schedule = []  # type: List[Tuple[float, int, int]]
+        self._poller = None  # type: Optional[asyncio.Future]
+        self._wakeup = asyncio.Event()
+
+    def _time(self) -> float:
+        return asyncio.get_event_loop().time()
+
+    def _reschedule(self, key: Tuple[int, int], due: float):
+        self._due[key] = due
+
+        # a later due time is applied when the queued entry comes up
+        queued = self._queued.get(key)
+        if queued is not None and queued <= due:
+            return
+
+        self._queued[key] = due
+        heapq.heappush(self._schedule, (due, *key))
+        self._wakeup.set()
+
+    def _prune(self):
+        """
+        Drop superseded entries from the top of the schedule, and move
+        postponed ones to their due time, until the top entry is due.
+        """
+        while self._schedule:
+            queued, node, property_id = self._schedule[0]
+            key = (node, property_id)
+
+            if self._queued.get(key) != queued:
+                heapq.heappop(self._schedule)
+                continue
+
+            due = self._due[key]
+            if due > queued:
+                self._queued[key] = due
+                heapq.heapreplace(self._schedule, (due, *key))
+                continue
+
+            return
+
+    def add(self, node: int, property_id: int, interval: Optional[float] = None):
+        """
+        Start polling `property_id` of `node` every `interval` seconds.
+        """
+        key = (node, property_id)
+        self.intervals[key] = max(
+            self.min_interval,
+            self.default_interval if interval is None else interval,
+        )
+        self._reschedule(key, self._time())
+
+    def add_descriptors(self, node: int, descriptors: Iterable[Mapping[str, Any]]):
+        for descriptor in descriptors:
+            intervals = [
+                descriptor_interval(descriptor.get(field, 0))
+                for field in ("sensor_update_interval", "sensor_measurement_period")
+            ]
+            intervals = [interval for interval in intervals if interval is not None]
+
+            self.add(
+                node,
+                int(descriptor["sensor_property_id"]),
+                max(intervals) if intervals else None,
+            )
+
+    async def discover(self, nodes: Iterable[int], **kwargs):
+        """
+        Read sensor descriptors of `nodes` and schedule all their properties.
+        """
+        descriptors = await self.client.get_descriptor(
+            list(nodes), self.app_index, **kwargs
+        )
+
+        for node, status in descriptors.items():
+            if status is None:
+                self.logger.warning("No sensor descriptor from %04x", node)
+                continue
+
+            self.add_descriptors(node, status)
+
+    def record(self, node: int, items: Iterable[Mapping[str, Any]]):
+        """
+        Record values from a sensor status of `node`.
+        """
+        now = self._time()
+
+        for item in items:
+            key = (node, int(item["sensor_setting_property_id"]))
+            value = self.extract(item)
+            if value is None:
+                continue
+
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = SampleSeries(**self._series_args)
+
+            series.add(now, value)
+
+            interval = self.intervals.get(key)
+            if interval is not None:
+                self._reschedule(key, now + interval)
+
+    def _status_received(self, source, app_index, destination, message):
+        # pylint: disable=W0613
+        self.record(source, message_params(message))
+
+    async def _poll(self):
+        while True:
+            self._prune()
+
+            if not self._schedule:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._schedule[0][0] - self._time()
+            if delay > 0:
+                self._wakeup.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                continue
+
+            now = self._time()
+            batches = defaultdict(list)  # type: Dict[int, List[int]]
+
+            while self._schedule and self._schedule[0][0] <= now:
+                _, node, property_id = heapq.heappop(self._schedule)
+                key = (node, property_id)
+                del self._queued[key]
+
+                batches[property_id].append(node)
+                # retry after a full interval if nothing comes back
+                self._reschedule(key, now + self.intervals[key])
+                self._prune()
+
+            for property_id, nodes in batches.items():
+                try:
+                    await self.client.get_sensor(nodes, self.app_index, property_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # pylint: disable=broad-except
+                    self.logger.exception("Polling %s failed", property_id)
+
+    def start(self):
+        self.client.app_message_callbacks[SensorOpcode.SENSOR_STATUS].add(
+            self._status_received
+        )
+        self._poller = asyncio.ensure_future(self._poll())
+
+    async def stop(self):
+        self.client.app_message_callbacks[SensorOpcode.SENSOR_STATUS].discard(
+            self._status_received
+        )
+
+        if self._poller is not None:
+            self._poller.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._poller
+            self._poller = None
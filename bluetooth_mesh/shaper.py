@@ -0,0 +1,190 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements application-wide shaping of outbound messages.
+"""
+import asyncio
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+__all__ = [
+    "OutboundShaper",
+    "Priority",
+]
+
+
+class Priority(IntEnum):
+    """
+    Traffic classes, served strictly in order: a queued interactive message
+    always goes before any queued configuration or diagnostic one.
+    """
+
+    INTERACTIVE = 0
+    CONFIG = 1
+    DIAGNOSTICS = 2
+
+
+class OutboundShaper:
+    """
+    Token bucket shared by all models of an application.
+
+    Every outbound message takes one token. Tokens are refilled at `rate` per
+    second, up to `burst`. When the bucket is empty, messages are queued per
+    priority class and, within a class, per destination. Destinations are
+    served round-robin, so a bulk query to a hundred nodes does not delay a
+    single message to another node by a hundred slots.
+
+    Publications don't have a destination and are queued under `None`.
+
+    :param rate: Sustained number of messages per second
+    :param burst: Number of messages that may be sent back-to-back
+    """
+
+    def __init__(self, *, rate: float = 20.0, burst: float = 8):
+        self.rate = rate
+        self.burst = burst
+
+        self.sent = 0
+        self.delayed = 0
+
+        self._tokens = float(burst)
+        self._updated = None  # type: Optional[float]
+        self._queues = {
+            priority: OrderedDict() for priority in Priority
+        }  # type: Dict[Priority, OrderedDict[Optional[int], Deque[asyncio.Future]]]
+        self._dispatcher = None  # type: Optional[asyncio.Future]
+
+    def _refill(self, now: float):
+        if self._updated is not None:
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+        self._updated = now
+
+    def _queued(self) -> bool:
+        return any(self._queues.values())
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for queues in self._queues.values():
+            while queues:
+                destination, waiters = next(iter(queues.items()))
+                waiter = waiters.popleft()
+
+                if waiters:
+                    queues.move_to_end(destination)
+                else:
+                    del queues[destination]
+
+                if not waiter.done():
+                    return waiter
+
+        return None
+
+    async def _dispatch(self):
+        loop = asyncio.get_event_loop()
+
+        try:
+            while self._queued():
+                self._refill(loop.time())
+
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    continue
+
+                waiter = self._next_waiter()
+                if waiter is not None:
+                    self._tokens -= 1
+                    waiter.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    async def _acquire(self, priority: Priority, destination: Optional[int]):
+        self._refill(asyncio.get_event_loop().time())
+
+        if self._tokens >= 1 and not self._queued():
+            self._tokens -= 1
+            return
+
+        waiter = asyncio.Future()
+        waiters = self._queues[priority].setdefault(destination, deque())
+        waiters.append(waiter)
+        self.delayed += 1
+
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            waiter.cancel()
+            queues = self._queues[priority]
+            waiters = queues.get(destination)
+            if waiters is not None:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    del queues[destination]
+            raise
+
+    async def submit(
+        self,
+        priority: Priority,
+        destination: Optional[int],
+        send: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Wait for a token, then call `send`.
+
+        :param priority: Traffic class of the message
+        :param destination: Destination address, or None for publications
+        :param send: Coroutine function that actually sends the message
+        """
+        await self._acquire(priority, destination)
+        self.sent += 1
+        return await send()
+
+    def queue_depth(self) -> Dict[Priority, int]:
+        """
+        Number of messages waiting for a token, per priority class.
+        """
+        return {
+            priority: sum(
+                sum(not waiter.done() for waiter in waiters)
+                for waiters in queues.values()
+            )
+            for priority, queues in self._queues.items()
+        }
+
+    def destination_depth(self) -> Dict[Optional[int], int]:
+        """
+        Number of messages waiting for a token, per destination.
+        """
+        depth = {}  # type: Dict[Optional[int], int]
+
+        for queues in self._queues.values():
+            for destination, waiters in queues.items():
+                pending = sum(not waiter.done() for waiter in waiters)
+                if pending:
+                    depth[destination] = depth.get(destination, 0) + pending
+
+        return depth
@@ -0,0 +1,96 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import time
+from unittest import mock
+from uuid import UUID
+
+import pytest
+
+from bluetooth_mesh.composition import CompositionDataCache
+from bluetooth_mesh.messages.config import ConfigCompositionDataStatus
+
+
+@pytest.fixture
+def cache_class(tmp_path):
+    class TestCompositionDataCache(CompositionDataCache):
+        PATH = str(tmp_path)
+
+    return TestCompositionDataCache
+
+
+@pytest.fixture
+def composition():
+    return ConfigCompositionDataStatus.parse(
+        bytes.fromhex("0036010200030000000a00010001000000")
+    )
+
+
+def test_cache_roundtrip(cache_class, composition):
+    cache = cache_class()
+    cache.put(0x0100, composition, fingerprint="1.2.3")
+
+    reloaded = cache_class()
+
+    assert reloaded.get(0x0100, "1.2.3") == composition
+    assert reloaded.get(0x0100, "1.2.3", identity=(0x0136, 0x0002, 0x0003))
+    assert reloaded.hits == 2
+
+
+def test_cache_miss_on_changed_fingerprint_or_identity(cache_class, composition):
+    cache = cache_class()
+    node = UUID(int=1)
+    cache.put(node, composition, fingerprint="1.2.3")
+
+    assert cache.get(node, "1.2.4") is None
+    assert cache.get(node, "1.2.3", identity=(0x0136, 0x0002, 0x0004)) is None
+    assert cache.get(0x0100, "1.2.3") is None
+    assert cache.misses == 3
+
+    cache.drop(node)
+    assert cache.get(node, "1.2.3") is None
+
+
+def test_cache_saves_batch_once(cache_class, composition):
+    cache = cache_class()
+    cache.put(0x0100, composition, save=False)
+    cache.put(0x0200, composition, save=False)
+
+    assert cache_class().get(0x0100) is None
+
+    cache.save()
+
+    reloaded = cache_class()
+    assert reloaded.get(0x0100) == composition
+    assert reloaded.get(0x0200) == composition
+
+
+def test_cache_entries_expire_after_max_age(cache_class, composition):
+    cache = cache_class(max_age=60)
+    cache.put(0x0100, composition)
+
+    assert cache.get(0x0100) == composition
+
+    with mock.patch("time.time", return_value=time.time() + 61):
+        assert cache.get(0x0100) is None
+
+    assert cache_class().get(0x0100) == composition
@@ -0,0 +1,293 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import ConfigClient, Element, GenericOnOffServer
+from bluetooth_mesh.composition import CompositionDataCache
+from bluetooth_mesh.crypto import ApplicationKey
+from bluetooth_mesh.messages.config import (
+    ConfigCompositionDataStatus,
+    ConfigOpcode,
+    GATTNamespaceDescriptor,
+)
+from bluetooth_mesh.models import NodeConfiguration
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+from bluetooth_mesh.utils import ModelOperationError
+
+
+class ConfigElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [ConfigClient]
+
+
+@pytest.fixture
+def config_client(element_path) -> ConfigClient:
+    element = ConfigElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    client = ConfigClient(element)
+
+    client.calls = []
+
+    def step(name):
+        async def call(node, net_index, **kwargs):
+            client.calls.append((node, name))
+
+        return asynctest.CoroutineMock(side_effect=call)
+
+    client.add_app_key = step("app_key")
+    client.update_app_key = step("app_key_update")
+    client.delete_app_key = step("app_key_delete")
+    client.bind_app_key = step("binding")
+    client.unbind_app_key = step("unbinding")
+    client.add_subscription = step("subscription")
+    client.del_subscription = step("subscription_delete")
+    client.set_publication = step("publication")
+    return client
+
+
+@pytest.fixture
+def configuration():
+    return NodeConfiguration(
+        app_keys=[(0, 0, ApplicationKey(bytes(16)))],
+        bindings=[(0x0001, 0, GenericOnOffServer)],
+        subscriptions=[(0x0001, 0xC000, GenericOnOffServer)],
+        publications=[(0x0001, 0xC001, 0, GenericOnOffServer)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_apply_configuration_in_dependency_order(config_client, configuration):
+    results = await config_client.apply_configuration(
+        {0x0100: configuration, 0x0200: configuration}, 0
+    )
+
+    assert results == {0x0100: None, 0x0200: None}
+
+    for node in (0x0100, 0x0200):
+        assert [name for addr, name in config_client.calls if addr == node] == [
+            "app_key",
+            "binding",
+            "subscription",
+            "publication",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_apply_configuration_resumes_after_failure(config_client, configuration):
+    error = ModelOperationError("Cannot add subscription")
+    config_client.add_subscription.side_effect = error
+    applied = set()
+
+    results = await config_client.apply_configuration(
+        {0x0100: configuration}, 0, applied=applied
+    )
+
+    assert results == {0x0100: error}
+    assert config_client.calls == [(0x0100, "app_key"), (0x0100, "binding")]
+
+    config_client.calls.clear()
+    config_client.add_subscription.side_effect = None
+
+    results = await config_client.apply_configuration(
+        {0x0100: configuration}, 0, applied=applied
+    )
+
+    assert results == {0x0100: None}
+    assert config_client.calls == [(0x0100, "publication")]
+    assert len(applied) == 4
+
+
+@pytest.mark.asyncio
+async def test_apply_configuration_reruns_changed_steps(config_client, configuration):
+    applied = set()
+    await config_client.apply_configuration({0x0100: configuration}, 0, applied=applied)
+    config_client.calls.clear()
+
+    changed = configuration._replace(
+        app_keys=[(0, 0, ApplicationKey(bytes(range(16))))],
+        publications=[(0x0001, 0xC002, 0, GenericOnOffServer)],
+    )
+    await config_client.apply_configuration({0x0100: changed}, 0, applied=applied)
+
+    # the node already stores a key at index 0
+    assert config_client.calls == [
+        (0x0100, "app_key_update"),
+        (0x0100, "publication"),
+    ]
+    assert len(applied) == 4
+
+
+@pytest.mark.asyncio
+async def test_apply_configuration_removes_dropped_settings(
+    config_client, configuration
+):
+    applied = set()
+    await config_client.apply_configuration({0x0100: configuration}, 0, applied=applied)
+    config_client.calls.clear()
+
+    changed = NodeConfiguration(
+        app_keys=[(0, 1, ApplicationKey(bytes(range(16))))],
+        bindings=[(0x0001, 1, GenericOnOffServer)],
+        subscriptions=[(0x0001, 0xC002, GenericOnOffServer)],
+        publications=[],
+    )
+    await config_client.apply_configuration(
+        {0x0100: changed}, 0, previous={0x0100: configuration}, applied=applied
+    )
+
+    assert config_client.calls == [
+        (0x0100, "publication"),
+        (0x0100, "subscription_delete"),
+        (0x0100, "unbinding"),
+        (0x0100, "app_key_delete"),
+        (0x0100, "app_key"),
+        (0x0100, "binding"),
+        (0x0100, "subscription"),
+    ]
+    assert config_client.set_publication.call_args[1]["publication_address"] == 0
+    assert len(applied) == 3
+
+    # going back re-adds what was removed
+    config_client.calls.clear()
+    await config_client.apply_configuration(
+        {0x0100: configuration}, 0, previous={0x0100: changed}, applied=applied
+    )
+    assert [name for _, name in config_client.calls][-4:] == [
+        "app_key",
+        "binding",
+        "subscription",
+        "publication",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_apply_configuration_isolates_unexpected_errors(
+    config_client, configuration
+):
+    error = RuntimeError("Unexpected")
+
+    async def bind(node, net_index, **kwargs):
+        # pylint: disable=W0613
+        if node == 0x0100:
+            raise error
+
+    config_client.bind_app_key.side_effect = bind
+
+    results = await config_client.apply_configuration(
+        {0x0100: configuration, 0x0200: configuration}, 0
+    )
+
+    assert results == {0x0100: error, 0x0200: None}
+
+
+@pytest.mark.asyncio
+async def test_get_param_iter_streams_results(config_client):
+    ttls = {0x0100: 5, 0x0200: 7}
+
+    async def send_dev(destination, net_index, opcode, params):
+        # pylint: disable=W0613
+        if destination not in ttls:
+            return
+
+        message = dict(
+            opcode=ConfigOpcode.CONFIG_DEFAULT_TTL_STATUS,
+            params=dict(ttl=ttls[destination]),
+        )
+        asyncio.get_event_loop().call_soon(
+            config_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    config_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    results = [
+        item
+        async for item in config_client.get_param_iter(
+            [0x0100, 0x0200, 0x0300],
+            0,
+            dict(opcode=ConfigOpcode.CONFIG_DEFAULT_TTL_GET, params=None),
+            dict(opcode=ConfigOpcode.CONFIG_DEFAULT_TTL_STATUS, params=None),
+            send_interval=0.01,
+            timeout=0.1,
+        )
+    ]
+
+    assert sorted(results[:2]) == [(0x0100, dict(ttl=5)), (0x0200, dict(ttl=7))]
+    assert results[2] == (0x0300, None)
+
+
+@pytest.mark.asyncio
+async def test_get_composition_data_checks_identity(config_client, tmp_path):
+    class TestCompositionDataCache(CompositionDataCache):
+        PATH = str(tmp_path)
+
+    composition = ConfigCompositionDataStatus.parse(
+        bytes.fromhex("0036010200030000000a00010001000000")
+    )
+    cache = TestCompositionDataCache()
+    cache.put(0x0100, composition)
+    cache.put(0x0200, composition)
+
+    config_client.get_param = asynctest.CoroutineMock(
+        return_value={0x0200: composition}
+    )
+
+    with mock.patch.object(cache, "save", wraps=cache.save) as save:
+        results = await config_client.get_composition_data(
+            [0x0100, 0x0200],
+            0,
+            cache=cache,
+            identities={
+                0x0100: (0x0136, 0x0002, 0x0003),
+                0x0200: (0x0136, 0x0002, 0x0004),
+            },
+        )
+
+    assert results == {0x0100: composition, 0x0200: composition}
+    assert config_client.get_param.call_args[0][0] == [0x0200]
+    save.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_get_composition_data_accepts_iterable(config_client, tmp_path):
+    class TestCompositionDataCache(CompositionDataCache):
+        PATH = str(tmp_path)
+
+    composition = ConfigCompositionDataStatus.parse(
+        bytes.fromhex("0036010200030000000a00010001000000")
+    )
+    cache = TestCompositionDataCache()
+    cache.put(0x0100, composition, "1.0")
+
+    probe = asynctest.CoroutineMock(return_value={0x0100: "1.0", 0x0200: "1.0"})
+    config_client.get_param = asynctest.CoroutineMock(return_value={0x0200: None})
+
+    results = await config_client.get_composition_data(
+        (node for node in [0x0100, 0x0200]), 0, cache=cache, probe=probe
+    )
+
+    assert results == {0x0100: composition, 0x0200: None}
+    assert probe.call_args[0][0] == [0x0100, 0x0200]
+    assert config_client.get_param.call_args[0][0] == [0x0200]
@@ -21,7 +21,7 @@
 #
 import pytest
 
-from bluetooth_mesh.utils import construct_match
+from bluetooth_mesh.utils import compile_match, construct_match
 
 
 @pytest.mark.parametrize(
@@ -47,10 +47,19 @@ from bluetooth_mesh.utils import construct_match
             dict(a=42, b=[1, 2, 3]),
             dict(b=[1, 2, 3]),
         ),
+        pytest.param(
+            dict(a=42, b=dict(c=[dict(d=1, e=2)])),
+            dict(a=..., b=dict(c=[dict(d=1)]), f=3),
+        ),
+        pytest.param(
+            dict(a=42, _io=None),
+            dict(a=42, _io=1),
+        ),
     ],
 )
 def test_construct_match(received, expected):
     assert construct_match(received, expected)
+    assert compile_match(expected)(received)
 
 
 @pytest.mark.parametrize(
@@ -72,7 +81,12 @@ def test_construct_match(received, expected):
             dict(a=42, b=[1, 2, 3]),
             dict(a=42, b=[1, 3]),
         ),
+        pytest.param(
+            dict(a=42, b=dict(c=[dict(d=1, e=2)])),
+            dict(b=dict(c=[dict(d=2)])),
+        ),
     ],
 )
 def test_construct_doesnt_match(received, expected):
     assert not construct_match(received, expected)
+    assert not compile_match(expected)(received)
@@ -0,0 +1,165 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import DebugClient, Element
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.silvair.debug import DebugOpcode, DebugSubOpcode
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+
+
+class DebugElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [DebugClient]
+
+
+@pytest.fixture
+def debug_client(element_path) -> DebugClient:
+    element = DebugElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return DebugClient(element)
+
+
+@pytest.mark.asyncio
+async def test_arap_content_follows_pages(debug_client):
+    pages = {
+        0x0100: [{0x0010: 5, 0x0011: 7}, {0x0012: 9}],
+        0x0200: [{0x0020: 1}],
+    }
+
+    async def send_dev(destination, net_index, opcode, params):
+        page = params["payload"]["page"]
+        message = dict(
+            opcode=DebugOpcode.SILVAIR_DEBUG,
+            params=dict(
+                subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_STATUS,
+                payload=dict(
+                    current_page=page,
+                    last_page=len(pages[destination]) - 1,
+                    nodes={
+                        address: dict(ivi=0, sequence=sequence)
+                        for address, sequence in pages[destination][page].items()
+                    },
+                ),
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            debug_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    debug_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    tables = await debug_client.get_arap_content([0x0100, 0x0200], 0)
+
+    assert list(tables[0x0100].addresses) == [0x0010, 0x0011, 0x0012]
+    assert list(tables[0x0100].sequence) == [5, 7, 9]
+    assert list(tables[0x0200].addresses) == [0x0020]
+    assert debug_client.send_dev.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_arap_content_ignores_repeated_pages(debug_client):
+    pages = [{0x0010: 5}, {0x0011: 7}]
+
+    def status(page):
+        return AccessMessage.parse(
+            AccessMessage.build(
+                dict(
+                    opcode=DebugOpcode.SILVAIR_DEBUG,
+                    params=dict(
+                        subopcode=DebugSubOpcode.ARAP_LIST_CONTENT_STATUS,
+                        payload=dict(
+                            current_page=page,
+                            last_page=len(pages) - 1,
+                            nodes={
+                                address: dict(ivi=0, sequence=sequence)
+                                for address, sequence in pages[page].items()
+                            },
+                        ),
+                    ),
+                )
+            )
+        )
+
+    async def send_dev(destination, net_index, opcode, params):
+        page = params["payload"]["page"]
+        loop = asyncio.get_event_loop()
+
+        # a late copy of every earlier page arrives first
+        for earlier in range(page + 1):
+            loop.call_soon(
+                debug_client.dev_key_message_received,
+                destination,
+                True,
+                0,
+                status(earlier),
+            )
+
+    debug_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    tables = await debug_client.get_arap_content([0x0100], 0)
+
+    assert list(tables[0x0100].addresses) == [0x0010, 0x0011]
+    assert list(tables[0x0100].sequence) == [5, 7]
+
+
+@pytest.mark.asyncio
+async def test_get_param_iter_streams_results(debug_client):
+    uptimes = {0x0100: 10, 0x0200: 20}
+
+    async def send_dev(destination, net_index, opcode, params):
+        # pylint: disable=W0613
+        if destination not in uptimes:
+            return
+
+        message = dict(
+            opcode=DebugOpcode.SILVAIR_DEBUG,
+            params=dict(
+                subopcode=DebugSubOpcode.UPTIME_STATUS,
+                data=dict(uptime=uptimes[destination]),
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            debug_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    debug_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    results = [
+        item
+        async for item in debug_client.get_param_iter(
+            [0x0100, 0x0200, 0x0300],
+            0,
+            DebugSubOpcode.UPTIME_GET,
+            DebugSubOpcode.UPTIME_STATUS,
+            send_interval=0.01,
+            timeout=0.1,
+        )
+    ]
+
+    assert sorted(results[:2]) == [(0x0100, dict(uptime=10)), (0x0200, dict(uptime=20))]
+    assert results[2] == (0x0300, None)
@@ -0,0 +1,121 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+
+import pytest
+
+from bluetooth_mesh.dispatch import DispatchQueue, Overflow
+
+
+@pytest.mark.asyncio
+async def test_messages_are_handled_by_workers():
+    queue = DispatchQueue()
+    handled = []
+
+    queue.put_nowait(handled.append, 1)
+    queue.put_nowait(handled.append, 2)
+    assert handled == []
+
+    await asyncio.sleep(0)
+    assert handled == [1, 2]
+    assert queue.processed == 2
+
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_on_overflow():
+    queue = DispatchQueue(maxsize=2)
+    handled = []
+
+    for i in range(4):
+        queue.put_nowait(handled.append, i)
+
+    await asyncio.sleep(0)
+    assert handled == [2, 3]
+    assert queue.dropped == 2
+
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_block_on_overflow_keeps_order():
+    queue = DispatchQueue(maxsize=1, overflow=Overflow.BLOCK, backlog=3)
+    handled = []
+
+    async def handle(i):
+        await asyncio.sleep(0)
+        handled.append(i)
+
+    for i in range(4):
+        queue.put_nowait(handle, i)
+
+    assert len(queue) == 4
+    assert queue.blocked == 3
+
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert handled == [0, 1, 2, 3]
+    assert queue.dropped == 0
+    assert len(queue) == 0
+
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_block_on_overflow_bounds_backlog():
+    queue = DispatchQueue(maxsize=2, overflow=Overflow.BLOCK, backlog=2)
+    handled = []
+
+    for i in range(6):
+        queue.put_nowait(handled.append, i)
+
+    assert len(queue) == 4
+    assert (queue.blocked, queue.dropped) == (2, 2)
+
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    # the newest messages are discarded, the rest keep their order
+    assert handled == [0, 1, 2, 3]
+
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_handler_exception_does_not_stop_worker():
+    queue = DispatchQueue()
+    handled = []
+
+    def fail():
+        raise ValueError()
+
+    queue.put_nowait(fail)
+    queue.put_nowait(handled.append, 1)
+
+    await asyncio.sleep(0)
+    assert handled == [1]
+    assert queue.processed == 2
+
+    await queue.close()
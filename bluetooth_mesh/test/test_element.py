@@ -21,11 +21,13 @@
 #
 # pylint: disable=W0621
 
+import asyncio
 from unittest.mock import MagicMock
 
 import pytest
 
 from bluetooth_mesh import Element
+from bluetooth_mesh.dispatch import DispatchQueue
 from bluetooth_mesh.messages import AccessMessage
 from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
 from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
@@ -36,6 +38,7 @@ class MockModel(MagicMock):
     MODEL_ID = (None, 0x1001)
     OPCODES = {GenericOnOffOpcode.GENERIC_ONOFF_STATUS}
     INSTANCES = []
+    dispatch_queue = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(
@@ -48,6 +51,7 @@ class MockVenforModel(MagicMock):
     MODEL_ID = (0x6666, 0x9999)
     OPCODES = {GenericOnOffOpcode.GENERIC_ONOFF_SET}
     INSTANCES = []
+    dispatch_queue = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(
@@ -115,3 +119,21 @@ def test_update_vendor_model_configuration(element):
     MockVenforModel.INSTANCES[0].update_configuration.assert_called_once_with(
         model_config
     )
+
+
+@pytest.mark.asyncio
+async def test_message_received_via_dispatch_queue(
+    element, source, app_index, status_encoded
+):
+    model = MockModel.INSTANCES[0]
+    model.dispatch_queue = DispatchQueue()
+
+    element.message_received(source, app_index, False, status_encoded)
+    model.message_received.assert_not_called()
+
+    await asyncio.sleep(0)
+    model.message_received.assert_called_once_with(
+        source, app_index, False, AccessMessage.parse(status_encoded)
+    )
+
+    await model.dispatch_queue.close()
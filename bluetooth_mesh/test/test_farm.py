@@ -0,0 +1,260 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+from functools import partial
+
+import pytest
+
+from bluetooth_mesh import Application, Element, LightLightnessClient
+from bluetooth_mesh.farm import (
+    VirtualFarm,
+    VirtualGatewayConfigServer,
+    VirtualLightLightnessServer,
+    VirtualNode,
+    VirtualOnOffServer,
+)
+from bluetooth_mesh.messages.config import (
+    ConfigOpcode,
+    GATTNamespaceDescriptor,
+    StatusCode,
+)
+from bluetooth_mesh.messages.generic.light.lightness import LightLightnessOpcode
+from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
+from bluetooth_mesh.messages.silvair.gateway_config_server import (
+    GatewayConfigServerOpcode,
+    GatewayConfigServerSubOpcode,
+)
+from bluetooth_mesh.utils import message_params
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(VirtualNode, "time", lambda self: now[0])
+    return now
+
+
+@pytest.fixture
+def farm(clock):
+    # pylint: disable=W0613
+    farm = VirtualFarm(seed=0)
+    farm.add_nodes(4)
+    return farm
+
+
+def test_onoff_transition(farm, clock):
+    farm.deliver(
+        0x0001,
+        0x0100,
+        GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED,
+        dict(onoff=1, tid=1, transition_time=2.0, delay=1.0),
+    )
+
+    def status():
+        ((node, opcode, params),) = farm.deliver(
+            0x0001, 0x0100, GenericOnOffOpcode.GENERIC_ONOFF_GET, None
+        )
+        assert (node, opcode) == (0x0100, GenericOnOffOpcode.GENERIC_ONOFF_STATUS)
+        return params
+
+    assert status() == dict(present_onoff=0, target_onoff=1, remaining_time=3.0)
+
+    clock[0] = 1.5
+    assert status() == dict(present_onoff=1, target_onoff=1, remaining_time=1.5)
+
+    clock[0] = 3.0
+    assert status() == dict(present_onoff=1)
+
+
+def test_lightness_transition(farm, clock):
+    ((_, opcode, params),) = farm.deliver(
+        0x0001,
+        0x0101,
+        LightLightnessOpcode.LIGHT_LIGHTNESS_SET,
+        dict(lightness=1000, tid=1, transition_time=1.0, delay=0),
+    )
+    assert opcode == LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS
+    assert params == dict(
+        present_lightness=0, target_lightness=1000, remaining_time=1.0
+    )
+
+    clock[0] = 0.25
+    assert farm.nodes[0x0101][VirtualLightLightnessServer].get(0x0001, 0x0101, None)[
+        1
+    ] == dict(present_lightness=250, target_lightness=1000, remaining_time=0.75)
+
+
+def test_repeated_tid_is_ignored(farm, clock):
+    server = farm.nodes[0x0100][VirtualOnOffServer]
+    message = dict(onoff=1, tid=7, transition_time=0, delay=0)
+
+    server.set_unack(0x0001, 0x0100, message)
+    server.set_unack(0x0001, 0x0100, dict(message, onoff=0))
+    assert server.present == 1
+
+    # same TID from another source is a new transaction
+    server.set_unack(0x0002, 0x0100, dict(message, onoff=0))
+    assert server.present == 0
+
+    server.set_unack(0x0001, 0x0100, dict(message, onoff=1))
+    assert server.present == 0
+
+    clock[0] = 7.0
+    server.set_unack(0x0001, 0x0100, dict(message, onoff=1))
+    assert server.present == 1
+
+
+def test_group_delivery_after_subscription(farm):
+    params = dict(
+        element_address=0x0102,
+        address=0xC000,
+        model=dict(model_id=0x1000),
+    )
+    ((_, opcode, status),) = farm.deliver(
+        0x0001, 0x0102, ConfigOpcode.CONFIG_MODEL_SUBSCRIPTION_ADD, params
+    )
+    assert opcode == ConfigOpcode.CONFIG_MODEL_SUBSCRIPTION_STATUS
+    assert status == dict(params, status=StatusCode.SUCCESS)
+
+    farm.subscribe(0xC000, 0x0103)
+
+    replies = farm.deliver(
+        0x0001,
+        0xC000,
+        GenericOnOffOpcode.GENERIC_ONOFF_SET,
+        dict(onoff=1, tid=1, transition_time=0, delay=0),
+    )
+    assert [node for node, *_ in replies] == [0x0102, 0x0103]
+    assert farm.nodes[0x0100][VirtualOnOffServer].present == 0
+
+
+def test_loss(clock):
+    # pylint: disable=W0613
+    farm = VirtualFarm(loss=0.5, seed=1)
+    farm.add_nodes(200)
+    for address in farm.nodes:
+        farm.subscribe(0xC000, address)
+
+    replies = farm.deliver(0x0001, 0xC000, GenericOnOffOpcode.GENERIC_ONOFF_GET, None)
+
+    # each of 200 nodes may lose the request or the reply
+    assert 0 < len(replies) < farm.delivered < 200
+    assert farm.lost == 200 - len(replies)
+
+
+def test_gateway_configuration(clock):
+    # pylint: disable=W0613
+    farm = VirtualFarm()
+    node = farm.add_node(0x0100, [VirtualGatewayConfigServer])
+
+    ((_, opcode, params),) = farm.deliver(
+        0x0001,
+        0x0100,
+        GatewayConfigServerOpcode.SILVAIR_GATEWAY,
+        dict(
+            subopcode=GatewayConfigServerSubOpcode.RECONNECT_INTERVAL_SET,
+            payload=dict(reconnect_interval=30),
+        ),
+    )
+
+    assert opcode == GatewayConfigServerOpcode.SILVAIR_GATEWAY
+    assert (
+        params["subopcode"] == GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_STATUS
+    )
+    assert params["payload"]["reconnect_interval"] == 30
+    assert node[VirtualGatewayConfigServer].configuration["reconnect_interval"] == 30
+
+
+def test_same_tid_to_group_and_member(farm):
+    farm.subscribe(0xC000, 0x0100)
+    server = farm.nodes[0x0100][VirtualOnOffServer]
+    message = dict(onoff=1, tid=0, transition_time=0, delay=0)
+
+    farm.deliver(
+        0x0001, 0xC000, GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED, message
+    )
+    assert server.present == 1
+
+    # TIDs are allocated per destination, so this is another transaction
+    farm.deliver(
+        0x0001,
+        0x0100,
+        GenericOnOffOpcode.GENERIC_ONOFF_SET_UNACKNOWLEDGED,
+        dict(message, onoff=0),
+    )
+    assert server.present == 0
+
+
+class LightnessElement(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [LightLightnessClient]
+
+
+class FarmApplication(Application):
+    ELEMENTS = {0: LightnessElement}
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_against_attached_farm(event_loop):
+    farm = VirtualFarm(latency=0.001, jitter=0.001, loss=0.1, seed=0)
+    nodes = farm.add_nodes(200)
+    for node in nodes:
+        farm.subscribe(0xC000, node)
+
+    application = FarmApplication(event_loop)
+    farm.attach(application)
+    client = application.elements[0][LightLightnessClient]
+
+    await client.set_lightness_unack(
+        0xC000, 0, 1000, 0, delay=0, retransmissions=3, send_interval=0.001
+    )
+
+    results = await client.bulk_query(
+        {
+            node: partial(
+                client.send_app,
+                node,
+                app_index=0,
+                opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_GET,
+                params=dict(),
+            )
+            for node in nodes
+        },
+        {
+            node: client.expect_app(
+                node,
+                app_index=0,
+                destination=None,
+                opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS,
+                params=dict(),
+            )
+            for node in nodes
+        },
+        send_interval=0.001,
+        timeout=5,
+    )
+
+    assert farm.lost
+    assert {
+        node: message_params(status)["present_lightness"]
+        for node, status in results.items()
+    } == {node: 1000 for node in nodes}
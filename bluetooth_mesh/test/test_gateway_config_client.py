@@ -0,0 +1,197 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, GatewayConfigClient, GatewayConfiguration
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.silvair.gateway_config_server import (
+    DhcpFlag,
+    GatewayConfigServerOpcode,
+    GatewayConfigServerSubOpcode,
+    StatusCode,
+)
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+from bluetooth_mesh.utils import ModelOperationError
+
+SETTERS = {
+    GatewayConfigServerSubOpcode.MTU_SIZE_SET,
+    GatewayConfigServerSubOpcode.RECONNECT_INTERVAL_SET,
+    GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_SET,
+}
+
+
+class GatewayElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [GatewayConfigClient]
+
+
+@pytest.fixture
+def gateway_client(element_path) -> GatewayConfigClient:
+    element = GatewayElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return GatewayConfigClient(element)
+
+
+@pytest.fixture
+def gateways(gateway_client):
+    states = {}
+    # gateways that ignore set messages
+    broken = set()
+
+    def state(node):
+        return states.setdefault(
+            node,
+            dict(
+                chip_revision_id=1,
+                mtu_size=1500,
+                mac_address="01:02:03:04:05:06",
+                server_port_number=8080,
+                reconnect_interval=10,
+                server_address_length=4,
+                server_address="host",
+                dns_ip_address="8.8.8.8",
+                ip_address="0.0.0.0",
+                gateway_ip_address="0.0.0.0",
+                netmask=0,
+                flags=DhcpFlag.DHCP_ENABLED_STATIC_DNS,
+                status_code=StatusCode.STATUS_SUCCESS,
+            ),
+        )
+
+    async def send_dev(destination, net_index, opcode, params):
+        current = state(destination)
+
+        if params["subopcode"] in SETTERS and destination not in broken:
+            current.update(params["payload"])
+
+        message = dict(
+            opcode=GatewayConfigServerOpcode.SILVAIR_GATEWAY,
+            params=dict(
+                subopcode=GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_STATUS,
+                payload=dict(current),
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            gateway_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    gateway_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+    return states, broken
+
+
+def subopcodes(gateway_client):
+    return [
+        call[1]["params"]["subopcode"]
+        for call in gateway_client.send_dev.await_args_list
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_configuration_skips_unchanged(gateway_client, gateways):
+    await gateway_client.update_configuration(
+        0x0100, 0, GatewayConfiguration(mtu=1500, mac="01:02:03:04:05:06")
+    )
+
+    assert subopcodes(gateway_client) == [
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_configuration_sends_single_change(gateway_client, gateways):
+    status = await gateway_client.update_configuration(
+        0x0100, 0, GatewayConfiguration(mtu=1200, reconnect=10)
+    )
+
+    assert status["mtu_size"] == 1200
+    assert subopcodes(gateway_client) == [
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET,
+        GatewayConfigServerSubOpcode.MTU_SIZE_SET,
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_configuration_merges_changes(gateway_client, gateways):
+    status = await gateway_client.update_configuration(
+        0x0100, 0, GatewayConfiguration(mtu=1200, reconnect=30, server=("other", 80))
+    )
+
+    assert (status["mtu_size"], status["reconnect_interval"]) == (1200, 30)
+    assert status["server_address"] == "other"
+    assert subopcodes(gateway_client) == [
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET,
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_SET,
+        GatewayConfigServerSubOpcode.GATEWAY_CONFIGURATION_GET,
+    ]
+
+    # DHCP with static DNS is kept: DNS is sent, static addresses are not
+    payload = gateway_client.send_dev.await_args_list[1][1]["params"]["payload"]
+    assert payload["dns_ip_address"] == "8.8.8.8"
+    assert "ip_address" not in payload
+
+
+@pytest.mark.asyncio
+async def test_apply_gateway_configuration(gateway_client, gateways):
+    _, broken = gateways
+    broken.add(0x0200)
+
+    results = await gateway_client.apply_gateway_configuration(
+        {
+            0x0100: GatewayConfiguration(reconnect=30),
+            0x0200: GatewayConfiguration(reconnect=30),
+        },
+        0,
+    )
+
+    assert results[0x0100] is None
+    assert isinstance(results[0x0200], ModelOperationError)
+
+
+@pytest.mark.asyncio
+async def test_apply_gateway_configuration_isolates_unexpected_errors(
+    gateway_client, gateways
+):
+    # pylint: disable=W0613
+    error = RuntimeError("Unexpected")
+    update_configuration = gateway_client.update_configuration
+
+    async def update(node, net_index, configuration):
+        if node == 0x0200:
+            raise error
+        return await update_configuration(node, net_index, configuration)
+
+    gateway_client.update_configuration = update
+
+    results = await gateway_client.apply_gateway_configuration(
+        {
+            0x0100: GatewayConfiguration(reconnect=30),
+            0x0200: GatewayConfiguration(reconnect=30),
+        },
+        0,
+    )
+
+    assert results == {0x0100: None, 0x0200: error}
@@ -0,0 +1,177 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, HealthClient
+from bluetooth_mesh.faults import FaultChange, FaultMonitor
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.health import HealthOpcode
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+
+
+class HealthElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [HealthClient]
+
+
+@pytest.fixture
+def health_client(element_path) -> HealthClient:
+    element = HealthElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return HealthClient(element)
+
+
+def fault_status(opcode, fault_array, company_id=0x0136):
+    return dict(
+        opcode=opcode,
+        params=dict(test_id=0, company_id=company_id, fault_array=fault_array),
+    )
+
+
+@pytest.fixture
+def faulty_nodes(health_client):
+    faults = {0x0100: [0x01], 0x0200: []}
+
+    async def send_app(destination, app_index, opcode, params):
+        message = fault_status(HealthOpcode.HEALTH_FAULT_STATUS, faults[destination])
+        asyncio.get_event_loop().call_soon(
+            health_client.message_received, destination, 0, None, message
+        )
+
+    health_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+    return faults
+
+
+@pytest.mark.asyncio
+async def test_get_faults(health_client, faulty_nodes):
+    statuses = await health_client.get_faults(
+        [0x0100, 0x0200], 0, 0x0136, scheduler=AdaptiveScheduler(max_rate=1000)
+    )
+
+    assert statuses[0x0100]["fault_array"] == [0x01]
+    assert statuses[0x0200]["fault_array"] == []
+
+
+@pytest.mark.asyncio
+async def test_monitor_reports_only_changes(health_client, faulty_nodes):
+    changes = []
+    monitor = FaultMonitor(
+        health_client,
+        0,
+        0x0136,
+        callback=changes.append,
+        scheduler=AdaptiveScheduler(max_rate=1000),
+    )
+    monitor.start()
+
+    assert await monitor.refresh([0x0100, 0x0200]) == [
+        FaultChange(node=0x0100, raised=[0x01], cleared=[], registered=True)
+    ]
+
+    health_client.message_received(
+        0x0100,
+        0,
+        None,
+        fault_status(HealthOpcode.HEALTH_CURRENT_STATUS, [0x01, 0xA2]),
+    )
+    health_client.message_received(
+        0x0100,
+        0,
+        None,
+        fault_status(HealthOpcode.HEALTH_CURRENT_STATUS, [0x01, 0xA2]),
+    )
+
+    assert changes == [
+        FaultChange(node=0x0100, raised=[0x01], cleared=[], registered=True),
+        FaultChange(node=0x0100, raised=[0x01, 0xA2], cleared=[]),
+    ]
+    assert monitor.faults(0x0100) == [0x01, 0xA2]
+    assert monitor.faults(0x0100, registered=True) == [0x01]
+
+    # both nodes have reported recently, nothing is polled
+    health_client.send_app.reset_mock()
+    assert await monitor.refresh([0x0100, 0x0200]) == []
+    health_client.send_app.assert_not_called()
+
+    monitor.stop()
+    assert not health_client.app_message_callbacks[HealthOpcode.HEALTH_CURRENT_STATUS]
+
+
+def test_monitor_keeps_current_and_registered_faults_apart(health_client):
+    monitor = FaultMonitor(health_client, 0, 0x0136)
+
+    assert monitor.update(0x0100, [0x00]) is None
+    monitor.update(0x0100, [0x01, 0xA2], registered=True)
+
+    assert monitor.update(0x0100, [0x01]) == FaultChange(
+        node=0x0100, raised=[0x01], cleared=[]
+    )
+    assert monitor.update(0x0100, []) == FaultChange(
+        node=0x0100, raised=[], cleared=[0x01]
+    )
+    assert monitor.faults(0x0100) == []
+    assert monitor.faults(0x0100, registered=True) == [0x01, 0xA2]
+
+
+@pytest.mark.asyncio
+async def test_monitor_logs_callback_errors(health_client, caplog):
+    async def callback(change):
+        raise ValueError(change.node)
+
+    monitor = FaultMonitor(health_client, 0, 0x0136, callback=callback)
+    monitor.start()
+
+    health_client.message_received(
+        0x0100, 0, None, fault_status(HealthOpcode.HEALTH_CURRENT_STATUS, [0x01])
+    )
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert "Fault callback failed: ValueError(256" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_monitor_reads_registered_faults_of_publishing_nodes(
+    health_client, faulty_nodes
+):
+    monitor = FaultMonitor(
+        health_client, 0, 0x0136, scheduler=AdaptiveScheduler(max_rate=1000)
+    )
+    monitor.start()
+
+    message = AccessMessage.parse(
+        AccessMessage.build(fault_status(HealthOpcode.HEALTH_CURRENT_STATUS, [0xA2]))
+    )
+    health_client.message_received(0x0100, 0, None, message)
+
+    assert monitor.faults(0x0100) == [0xA2]
+
+    assert await monitor.refresh([0x0100]) == [
+        FaultChange(node=0x0100, raised=[0x01], cleared=[], registered=True)
+    ]
+    assert monitor.faults(0x0100, registered=True) == [0x01]
@@ -0,0 +1,155 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, LightExtendedControllerSetupClient
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.silvair.light_extended_controller import (
+    LightExtendedControllerOpcode,
+    LightExtendedControllerSubOpcode,
+)
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+
+
+class LightExtendedControllerElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [LightExtendedControllerSetupClient]
+
+
+@pytest.fixture
+def lec_client(element_path) -> LightExtendedControllerSetupClient:
+    element = LightExtendedControllerElementMock(
+        mock.MagicMock(shaper=None), mock.MagicMock()
+    )
+    element.path = element_path
+    return LightExtendedControllerSetupClient(element)
+
+
+@pytest.mark.asyncio
+async def test_get_properties_pipelines_requests(lec_client):
+    outstanding = {}
+    peak = {}
+
+    def respond(destination, property_id):
+        outstanding[destination] -= 1
+        message = dict(
+            opcode=LightExtendedControllerOpcode.SILVAIR_LEC,
+            params=dict(
+                subopcode=LightExtendedControllerSubOpcode.PROPERTY_STATUS,
+                payload=dict(id=property_id, value=destination + property_id),
+            ),
+        )
+        lec_client.dev_key_message_received(destination, True, 0, message)
+
+    async def send_dev(destination, net_index, opcode, params):
+        property_id = params["payload"]["id"]
+        outstanding[destination] = outstanding.get(destination, 0) + 1
+        peak[destination] = max(peak.get(destination, 0), outstanding[destination])
+
+        # node 0x0300 never answers property 2
+        if destination == 0x0300 and property_id == 2:
+            return
+
+        asyncio.get_event_loop().call_later(0.01, respond, destination, property_id)
+
+    lec_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    table = await lec_client.get_properties(
+        [0x0100, 0x0200, 0x0300],
+        0,
+        [1, 2, 3],
+        outstanding=2,
+        send_interval=0,
+        timeout=0.05,
+        retransmissions=1,
+    )
+
+    assert table.nodes == [0x0100, 0x0200, 0x0300]
+    assert table.properties == [1, 2, 3]
+    assert table.values == [
+        [0x0101, 0x0102, 0x0103],
+        [0x0201, 0x0202, 0x0203],
+        [0x0301, None, 0x0303],
+    ]
+    assert max(peak.values()) == 2
+    assert lec_client.send_dev.await_count == 10
+
+
+@pytest.mark.asyncio
+async def test_get_properties_skips_repeated_property_ids(lec_client):
+    async def send_dev(destination, net_index, opcode, params):
+        message = dict(
+            opcode=LightExtendedControllerOpcode.SILVAIR_LEC,
+            params=dict(
+                subopcode=LightExtendedControllerSubOpcode.PROPERTY_STATUS,
+                payload=dict(id=params["payload"]["id"], value=params["payload"]["id"]),
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            lec_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    lec_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    table = await lec_client.get_properties(
+        [0x0100], 0, [1, 2, 1], send_interval=0, timeout=0.05
+    )
+
+    assert table.properties == [1, 2]
+    assert table.values == [[1, 2]]
+    assert lec_client.send_dev.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_properties_times_out_after_sending(lec_client):
+    async def send_dev(destination, net_index, opcode, params):
+        # the shaper holds each request for longer than the timeout
+        await asyncio.sleep(0.1)
+
+        message = dict(
+            opcode=LightExtendedControllerOpcode.SILVAIR_LEC,
+            params=dict(
+                subopcode=LightExtendedControllerSubOpcode.PROPERTY_STATUS,
+                payload=dict(id=params["payload"]["id"], value=destination),
+            ),
+        )
+        asyncio.get_event_loop().call_later(
+            0.01, lec_client.dev_key_message_received, destination, True, 0, message
+        )
+
+    lec_client.send_dev = asynctest.CoroutineMock(side_effect=send_dev)
+
+    table = await lec_client.get_properties(
+        [0x0100, 0x0200],
+        0,
+        [1, 2],
+        send_interval=0,
+        timeout=0.05,
+        retransmissions=0,
+    )
+
+    assert table.values == [[0x0100, 0x0100], [0x0200, 0x0200]]
+    assert lec_client.send_dev.await_count == 4
@@ -20,6 +20,8 @@
 #
 #
 # pylint: disable=redefined-outer-name, invalid-name
+import asyncio
+
 import asynctest
 from asynctest import ANY, call, mock
 
@@ -28,6 +30,7 @@ from bluetooth_mesh.messages import LightLightnessMessage, LightLightnessOpcode
 from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
 from bluetooth_mesh.messages.generic import LightLightnessSetupMessage
 from bluetooth_mesh.messages.generic.light import LightLightnessSetupOpcode
+from bluetooth_mesh.models.base import StateCache
 from bluetooth_mesh.test.fixtures import *  # pylint: disable=unused-wildcard-import, wildcard-import
 
 
@@ -38,7 +41,7 @@ class LLElementMock(Element):
 
 @pytest.fixture
 def light_lightness_client(element_path) -> LightLightnessClient:
-    element = LLElementMock(mock.MagicMock(), mock.MagicMock())
+    element = LLElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
     element.path = element_path
     return LightLightnessClient(element)
 
@@ -130,3 +133,112 @@ async def test_set_lightness_calls_node_interface_with_appropriate_arguments(
     assert light_lightness_client._node_interface.send.await_args_list == [
         call(element_path, destination, app_index, frame) for frame in frames
     ]
+
+
+# pylint: disable=protected-access
+@pytest.mark.asyncio
+async def test_coalesced_set_lightness_cancels_stale_retransmissions(
+    light_lightness_client, destination, app_index
+):
+    light_lightness_client._node_interface.send = asynctest.CoroutineMock()
+
+    stale = asyncio.ensure_future(
+        light_lightness_client.set_lightness_unack(
+            destination, app_index, 100, 0, send_interval=0.01, coalesce=True
+        )
+    )
+    await asyncio.sleep(0.001)
+
+    await light_lightness_client.set_lightness_unack(
+        destination, app_index, 200, 0, send_interval=0.01, coalesce=True
+    )
+    await stale
+
+    sent = [
+        LightLightnessMessage.parse(args[3])["params"]["lightness"]
+        for args, _ in light_lightness_client._node_interface.send.await_args_list
+    ]
+    assert sent == [100] + [200] * 6
+    assert light_lightness_client.coalescer.superseded == 1
+
+
+@pytest.fixture
+def lightness_nodes(light_lightness_client):
+    lightness = {0x0100: 100, 0x0200: 200}
+
+    async def send(element_path, destination, app_index, data):
+        # pylint: disable=W0613
+        params = LightLightnessMessage.parse(data)["params"]
+        targets = list(lightness) if destination == 0xC000 else [destination]
+        lightness.update((node, params["lightness"]) for node in targets)
+
+    async def send_app(destination, app_index, opcode, params):
+        # pylint: disable=W0613
+        message = dict(
+            opcode=LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS,
+            params=dict(present_lightness=lightness[destination]),
+        )
+        asyncio.get_event_loop().call_soon(
+            light_lightness_client.message_received, destination, 0, None, message
+        )
+
+    light_lightness_client._node_interface.send = asynctest.CoroutineMock(
+        side_effect=send
+    )
+    light_lightness_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+    light_lightness_client.state_cache = StateCache(ttl=60)
+    return lightness
+
+
+def present(statuses):
+    return {node: status["present_lightness"] for node, status in statuses.items()}
+
+
+@pytest.mark.asyncio
+async def test_get_lightness_after_write_is_not_served_from_cache(
+    light_lightness_client, lightness_nodes
+):
+    # pylint: disable=W0613
+    client = light_lightness_client
+    nodes = [0x0100, 0x0200]
+
+    assert present(await client.get_lightness(nodes, 0, send_interval=0.01)) == {
+        0x0100: 100,
+        0x0200: 200,
+    }
+    queried = client.send_app.await_count
+
+    await client.get_lightness(nodes, 0, send_interval=0.01)
+    assert client.send_app.await_count == queried
+
+    await client.set_lightness_unack(
+        0x0100, 0, 500, 0, retransmissions=1, send_interval=0.01
+    )
+    queried = client.send_app.await_count
+
+    assert present(await client.get_lightness(nodes, 0, send_interval=0.01)) == {
+        0x0100: 500,
+        0x0200: 200,
+    }
+    assert client.send_app.await_args_list[queried][0][0] == 0x0100
+    assert client.send_app.await_count == queried + 1
+
+
+@pytest.mark.asyncio
+async def test_group_write_invalidates_whole_cache(
+    light_lightness_client, lightness_nodes
+):
+    # pylint: disable=W0613
+    client = light_lightness_client
+    nodes = [0x0100, 0x0200]
+
+    await client.get_lightness(nodes, 0, send_interval=0.01)
+    await client.set_lightness_unack(
+        0xC000, 0, 700, 0, retransmissions=1, send_interval=0.01
+    )
+
+    assert len(client.state_cache) == 0
+    assert present(await client.get_lightness(nodes, 0, send_interval=0.01)) == {
+        0x0100: 700,
+        0x0200: 700,
+    }
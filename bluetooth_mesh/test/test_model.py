@@ -22,16 +22,23 @@
 # pylint: disable=W0621
 
 import asyncio
+import logging
 from asyncio import Future
 from functools import partial
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
 import asynctest
 import pytest
 
-from bluetooth_mesh import Model
+from bluetooth_mesh import Element, Model
 from bluetooth_mesh.interfaces import NodeInterface
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
 from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
+from bluetooth_mesh.messages.scene import SceneOpcode
+from bluetooth_mesh.models.base import MessageTemplate, StateCache, TransactionCache
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+from bluetooth_mesh.shaper import OutboundShaper
 from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
 
 
@@ -44,6 +51,7 @@ def node_interface():
 def element_mock(element_path, node_interface):
     element_mock = MagicMock()
     element_mock.application.node_interface = node_interface
+    element_mock.application.shaper = None
     element_mock.path = element_path
     return element_mock
 
@@ -82,6 +90,25 @@ async def test_multiple_expect(model, status_parsed, source, app_index):
     assert status_parsed == await status2
 
 
+@pytest.mark.asyncio
+async def test_expect_indexed_by_source(model, status_parsed, source, app_index):
+    status = model.expect_app(source, app_index, None, status_parsed["opcode"], {})
+    other = model.expect_app(source + 1, app_index, None, status_parsed["opcode"], {})
+    model.message_received(source, app_index, 0x0010, status_parsed)
+    assert status_parsed == await status
+    assert not other.done()
+    assert len(model.app_expectations) == 1
+
+
+@pytest.mark.asyncio
+async def test_expect_destination(model, status_parsed, source, app_index):
+    status = model.expect_app(source, app_index, 0x0010, status_parsed["opcode"], {})
+    model.message_received(source, app_index, 0x0020, status_parsed)
+    assert not status.done()
+    model.message_received(source, app_index, 0x0010, status_parsed)
+    assert status_parsed == await status
+
+
 def test_app_single_repeatable_callback(model, status_parsed, source, app_index):
     listener_mock = MagicMock(return_value=False)
     model.app_message_callbacks[status_parsed["opcode"]].add(listener_mock)
@@ -213,6 +240,27 @@ async def test_send_dev(
     )
 
 
+@pytest.mark.asyncio
+async def test_send_does_not_parse_messages_at_info_level(
+    model, status_parsed, destination, app_index, net_index, node_interface
+):
+    model.logger = logging.getLogger("test_send")
+    model.logger.setLevel(logging.INFO)
+
+    with patch.object(AccessMessage, "parse") as parse:
+        for _ in range(100):
+            await model.send_app(
+                destination, app_index, status_parsed["opcode"], status_parsed["params"]
+            )
+            await model.send_dev(
+                destination, net_index, status_parsed["opcode"], status_parsed["params"]
+            )
+
+    parse.assert_not_called()
+    assert node_interface.send.call_count == 100
+    assert node_interface.dev_key_send.call_count == 100
+
+
 @pytest.mark.asyncio
 async def test_repeat(
     model, status_parsed, destination, app_index, element_path, node_interface
@@ -331,3 +379,328 @@ async def test_bulk_query_timeout(
     model.message_received(10, app_index, False, status_parsed)
 
     await query_status
+
+
+@pytest.mark.asyncio
+async def test_expect_removed_when_cancelled(model, status_parsed, source, app_index):
+    status = model.expect_app(source, app_index, None, status_parsed["opcode"], {})
+    assert model.expectation_counts() == {status_parsed["opcode"]: 1}
+
+    status.cancel()
+    await asyncio.sleep(0)
+    assert model.expectation_counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_expect_removed_when_expired(model, status_parsed, source, net_index):
+    status = model.expect_dev(
+        source, net_index, status_parsed["opcode"], {}, timeout=0.01
+    )
+    assert len(model.dev_expectations) == 1
+
+    with pytest.raises(asyncio.CancelledError):
+        await status
+
+    await asyncio.sleep(0)
+    assert len(model.dev_expectations) == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_timeout_removes_expectations(model, status_parsed, app_index):
+    async def request():
+        pass
+
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in range(10)
+    }
+    requests = {addr: request for addr in statuses}
+
+    await model.bulk_query(requests, statuses, send_interval=0.001, timeout=0.01)
+    await asyncio.sleep(0)
+    assert model.expectation_counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_scheduler(model, status_parsed, app_index, node_interface):
+    async def request(dest):
+        await model.send_app(
+            dest, app_index, status_parsed["opcode"], status_parsed["params"]
+        )
+        asyncio.get_event_loop().call_soon(
+            model.message_received, dest, app_index, None, status_parsed
+        )
+
+    requests = {addr: partial(request, addr) for addr in range(10)}
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in range(10)
+    }
+
+    scheduler = AdaptiveScheduler(max_rate=1000)
+    results = await model.bulk_query(requests, statuses, scheduler=scheduler)
+
+    assert results == {addr: status_parsed for addr in range(10)}
+    assert node_interface.send.call_count == 10
+    assert scheduler.responses == 10
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_iter(model, status_parsed, app_index):
+    async def request(dest):
+        asyncio.get_event_loop().call_soon(
+            model.message_received, dest, app_index, None, status_parsed
+        )
+
+    requests = {addr: partial(request, addr) for addr in range(5)}
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in range(5)
+    }
+
+    received = [
+        item
+        async for item in model.bulk_query_iter(requests, statuses, send_interval=0.001)
+    ]
+
+    assert sorted(received) == [(addr, status_parsed) for addr in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_iter_releases_yielded_statuses(
+    model, status_parsed, app_index
+):
+    async def request(dest):
+        asyncio.get_event_loop().call_soon(
+            model.message_received, dest, app_index, None, status_parsed
+        )
+
+    requests = {addr: partial(request, addr) for addr in range(5)}
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in range(5)
+    }
+
+    async for addr, _ in model.bulk_query_iter(requests, statuses, send_interval=0.001):
+        assert addr not in statuses
+        assert addr not in requests
+
+    assert statuses == {}
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_iter_early_exit(model, status_parsed, app_index):
+    async def request(dest):
+        if dest == 0:
+            asyncio.get_event_loop().call_soon(
+                model.message_received, dest, app_index, None, status_parsed
+            )
+
+    requests = {addr: partial(request, addr) for addr in range(5)}
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in range(5)
+    }
+
+    results = model.bulk_query_iter(requests, statuses, send_interval=0.001)
+    async for addr, result in results:
+        assert (addr, result) == (0, status_parsed)
+        break
+    await results.aclose()
+    await asyncio.sleep(0)
+
+    assert all(statuses[addr].cancelled() for addr in range(1, 5))
+    assert model.expectation_counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_fan_in_query(model, status_parsed, app_index):
+    loop = asyncio.get_event_loop()
+    unicast = []
+
+    async def group_request():
+        for addr in range(8):
+            loop.call_soon(
+                model.message_received, addr, app_index, 0xC000, status_parsed
+            )
+
+    async def request(dest):
+        unicast.append(dest)
+        loop.call_soon(model.message_received, dest, app_index, None, status_parsed)
+
+    members = range(10)
+    requests = {addr: partial(request, addr) for addr in members}
+    statuses = {
+        addr: model.expect_app(addr, app_index, None, status_parsed["opcode"], {})
+        for addr in members
+    }
+
+    results = await model.fan_in_query(
+        group_request, requests, statuses, fan_in_timeout=0.01, send_interval=0.001
+    )
+
+    assert results == {addr: status_parsed for addr in members}
+    assert sorted(unicast) == [8, 9]
+
+
+def test_message_template_renders_same_data_as_build():
+    template = MessageTemplate(
+        SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
+        dict(scene_number=1, tid=5, transition_time=0, delay=0.5),
+        fields=("delay", "tid"),
+    )
+
+    assert template.render(delay=0.1, tid=7) == AccessMessage.build(
+        dict(
+            opcode=SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
+            params=dict(scene_number=1, tid=7, transition_time=0, delay=0.1),
+        )
+    )
+    assert template.render() == template.data
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(scene_number=1, tid=5, transition_time=None, delay=0.5),
+        dict(scene_number=1, tid=5, delay=0.5),
+        dict(scene_number=1, tid=5),
+    ],
+)
+def test_message_template_ignores_fields_not_encoded(params):
+    template = MessageTemplate(
+        SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED, params, fields=("delay", "tid")
+    )
+
+    assert template.render(delay=0.1, tid=7) == AccessMessage.build(
+        dict(
+            opcode=SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
+            params={**params, "delay": 0.1, "tid": 7},
+        )
+    )
+
+
+def test_message_template_builds_fields_it_cannot_locate():
+    params = dict(scene_number=1, tid=5, transition_time=0, delay=0.5)
+
+    with patch.object(MessageTemplate, "_locate", side_effect=ValueError):
+        template = MessageTemplate(SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED, params)
+
+    assert template.render(delay=0.1) == AccessMessage.build(
+        dict(
+            opcode=SceneOpcode.SCENE_RECALL_UNACKNOWLEDGED,
+            params={**params, "delay": 0.1},
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_goes_through_application_shaper(
+    model, element_mock, status_parsed, destination, app_index, node_interface
+):
+    element_mock.application.shaper = OutboundShaper(rate=1000, burst=1)
+
+    await model.send_app(
+        destination, app_index, status_parsed["opcode"], status_parsed["params"]
+    )
+    await model.publish(status_parsed["opcode"], status_parsed["params"])
+
+    assert element_mock.application.shaper.sent == 2
+    assert node_interface.send.call_count == 1
+    node_interface.publish.assert_called_once_with(
+        element_mock.path, 0x1001, b"\x82\x04\x00", vendor=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_state_cache_serves_received_statuses(
+    model, status_parsed, source, app_index
+):
+    opcode = status_parsed["opcode"]
+    model.CACHED_OPCODES = {opcode}
+    model.state_cache = StateCache(ttl=10)
+
+    model.message_received(source, app_index, None, status_parsed)
+    model.state_cache.update(source + 1, opcode, dict(present_onoff=1), ttl=-1)
+
+    cached, remaining = model.cached_statuses([source, source + 1], opcode)
+    assert cached == {source: status_parsed["params"]}
+    assert remaining == [source + 1]
+    assert len(model.state_cache) == 1
+
+    cached, remaining = model.cached_statuses([source], opcode, refresh=True)
+    assert cached == {}
+    assert remaining == [source]
+
+
+def test_state_cache_stores_parsed_statuses(model, source, app_index):
+    opcode = GenericOnOffOpcode.GENERIC_ONOFF_STATUS
+    model.CACHED_OPCODES = {opcode}
+    model.state_cache = StateCache(ttl=10)
+
+    message = AccessMessage.parse(
+        AccessMessage.build(dict(opcode=opcode, params=dict(present_onoff=1)))
+    )
+    model.message_received(source, app_index, None, message)
+
+    cached, remaining = model.cached_statuses([source], opcode)
+    assert cached[source]["present_onoff"] == 1
+    assert remaining == []
+
+
+def test_tid_per_destination(model):
+    assert [model.tid(0x0100), model.tid(0x0200), model.tid(0x0100)] == [0, 0, 1]
+    assert model.tid() == 0
+
+
+@pytest.mark.asyncio
+async def test_retransmitted_transaction_dropped(source, app_index):
+    class MockServer(Model):
+        MODEL_ID = (None, 0x1000)
+        OPCODES = {GenericOnOffOpcode.GENERIC_ONOFF_SET}
+
+    class MockElement(Element):
+        MODELS = [MockServer]
+        LOCATION = GATTNamespaceDescriptor.MAIN
+
+    element = MockElement(MagicMock(), 0)
+    server = element[MockServer]
+
+    listener_mock = MagicMock(return_value=False)
+    server.app_message_callbacks[GenericOnOffOpcode.GENERIC_ONOFF_SET].add(
+        listener_mock
+    )
+
+    def data(tid):
+        return AccessMessage.build(
+            dict(
+                opcode=GenericOnOffOpcode.GENERIC_ONOFF_SET,
+                params=dict(onoff=1, tid=tid, transition_time=0, delay=0),
+            )
+        )
+
+    element.message_received(source, app_index, 0xC000, data(3))
+    element.message_received(source, app_index, 0xC000, data(3))
+    # same TID to another destination is another transaction
+    element.message_received(source, app_index, 0x0010, data(3))
+    element.message_received(source, app_index, 0xC000, data(4))
+
+    assert listener_mock.call_count == 3
+    assert (server.transaction_cache.hits, server.transaction_cache.misses) == (1, 3)
+
+
+@pytest.mark.asyncio
+async def test_transaction_cache_bounded():
+    cache = TransactionCache(window=6.0, size=2)
+
+    assert not cache.seen(0x0100, 0x0001, 1)
+    assert not cache.seen(0x0200, 0x0001, 1)
+    assert not cache.seen(0x0300, 0x0001, 1)
+    assert len(cache) == 2
+
+    # the oldest transaction is forgotten
+    assert not cache.seen(0x0100, 0x0001, 1)
+    assert cache.seen(0x0300, 0x0001, 1)
+
+    cache.window = 0
+    assert not cache.seen(0x0300, 0x0001, 1)
@@ -0,0 +1,144 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, NetworkDiagnosticClient
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.silvair.network_diagnostic_server import (
+    NetworkDiagnosticServerOpcode,
+    NetworkDiagnosticServerSubOpcode,
+)
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+from bluetooth_mesh.topology import HopGraph
+
+
+class NetworkDiagnosticElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [NetworkDiagnosticClient]
+
+
+@pytest.fixture
+def nds_client(element_path) -> NetworkDiagnosticClient:
+    element = NetworkDiagnosticElementMock(
+        mock.MagicMock(shaper=None), mock.MagicMock()
+    )
+    element.path = element_path
+    return NetworkDiagnosticClient(element)
+
+
+def record(source, min_hops, count=1):
+    return dict(source=source, count=count, min_hops=min_hops, max_hops=min_hops)
+
+
+def subscription_status(records):
+    return dict(
+        opcode=NetworkDiagnosticServerOpcode.SILVAIR_NDS,
+        params=dict(
+            subopcode=NetworkDiagnosticServerSubOpcode.SUBSCRIPTION_STATUS,
+            payload=dict(
+                destination=0x0001, period=0, max_record_count=32, record=records
+            ),
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_subscription(nds_client):
+    async def send_app(destination, app_index, opcode, params):
+        message = subscription_status([])
+        message["params"]["payload"]["period"] = params["payload"]["period"]
+        asyncio.get_event_loop().call_soon(
+            nds_client.message_received, destination, 0, None, message
+        )
+
+    nds_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    statuses = await nds_client.set_subscription([0x0100, 0x0200], 0, 0x0001, 60)
+
+    assert statuses[0x0100]["period"] == 60
+    assert statuses[0x0200]["destination"] == 0x0001
+
+
+@pytest.mark.asyncio
+async def test_registry_records_update_graph(nds_client):
+    graph = HopGraph()
+    records = nds_client.registry_records(graph=graph)
+    first = asyncio.ensure_future(records.__anext__())
+    await asyncio.sleep(0)
+
+    message = AccessMessage.parse(
+        AccessMessage.build(subscription_status([record(0x0200, 1), record(0x0300, 2)]))
+    )
+    nds_client.message_received(0x0100, 0, 0x0001, message)
+
+    reporter, received = await first
+    assert reporter == 0x0100
+    assert len(received) == 2
+    assert graph.heard_by(0x0100) == {0x0200: 1, 0x0300: 2}
+
+    await records.aclose()
+    assert not nds_client.app_message_callbacks[
+        NetworkDiagnosticServerOpcode.SILVAIR_NDS
+    ]
+
+
+def test_hop_graph_queries():
+    graph = HopGraph()
+    graph.add_node(0x0500)
+    graph.update(0x0100, [record(0x0200, 1), record(0x0300, 2)])
+    graph.update(0x0300, [record(0x0200, 1)])
+    graph.update(0x0400, [record(0x0200, 1), record(0x0100, 1)])
+
+    assert graph.hot_relays(1) == [(0x0200, 3)]
+    assert graph.isolated() == [0x0500]
+    # 0x0300 reaches 0x0100 in 2 hops, but nothing says how it reaches 0x0400
+    assert graph.reachability(0x0400) == {0x0200: 1, 0x0100: 1}
+    assert graph.reachability(0x0400, max_hops=1) == {0x0200: 1, 0x0100: 1}
+
+
+def test_hop_graph_reachability_does_not_add_up_records():
+    graph = HopGraph()
+    graph.update(0x0100, [record(0x0200, 1), record(0x0400, 3), record(0x0600, 4)])
+    graph.update(0x0200, [record(0x0300, 1), record(0x0500, 2)])
+    graph.update(0x0300, [record(0x0600, 1)])
+
+    assert graph.reachability(0x0100) == {
+        0x0200: 1,
+        0x0300: 2,
+        0x0400: 3,
+        0x0600: 3,
+    }
+    assert graph.reachability(0x0100, max_hops=2) == {0x0200: 1, 0x0300: 2}
+
+
+def test_hop_graph_update_replaces_hops():
+    graph = HopGraph()
+    graph.update(0x0100, [record(0x0200, 1)])
+    graph.update(0x0100, [record(0x0200, 3)])
+
+    assert graph.heard_by(0x0100) == {0x0200: 3}
+    assert graph.hot_relays() == []
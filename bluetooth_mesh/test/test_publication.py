@@ -0,0 +1,149 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, GenericOnOffServer, LightLightnessServer
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.generic.light.lightness import LightLightnessOpcode
+from bluetooth_mesh.messages.generic.onoff import GenericOnOffOpcode
+from bluetooth_mesh.messages.time import TimeOpcode
+from bluetooth_mesh.models.base import ModelConfig
+from bluetooth_mesh.models.models import TimeServer
+from bluetooth_mesh.publication import PublicationScheduler
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+
+
+class PublishingElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [GenericOnOffServer, LightLightnessServer, TimeServer]
+
+
+@pytest.fixture
+def element(element_path) -> PublishingElementMock:
+    element = PublishingElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return element
+
+
+@pytest.fixture
+def onoff_server(element) -> GenericOnOffServer:
+    model = element[GenericOnOffServer]
+    model.publish = asynctest.CoroutineMock()
+    model.onoff = 1
+    return model
+
+
+def run(scheduler, ticks):
+    due = []
+    for _ in range(ticks):
+        due.append(len(scheduler._advance()))  # pylint: disable=W0212
+    return due
+
+
+def test_publishes_on_period_with_retransmissions(onoff_server):
+    scheduler = PublicationScheduler(resolution=0.1, slots=8)
+    onoff_server.update_configuration(
+        ModelConfig(
+            publication_period=timedelta(seconds=1),
+            publication_retransmit=dict(count=2, interval=timedelta(seconds=0.2)),
+        )
+    )
+    scheduler.add(onoff_server)
+
+    # period is longer than the wheel, copies at 10, 12, 14, 20, 22, 24
+    due = run(scheduler, 25)
+    assert [tick + 1 for tick, count in enumerate(due) if count] == [
+        10,
+        12,
+        14,
+        20,
+        22,
+        24,
+    ]
+
+
+def test_configuration_change_reschedules(onoff_server):
+    scheduler = PublicationScheduler(resolution=0.1, slots=8)
+    scheduler.add(onoff_server)
+
+    # no period, nothing to publish
+    assert sum(run(scheduler, 20)) == 0
+
+    onoff_server.update_configuration(
+        ModelConfig(publication_period=timedelta(seconds=0.5))
+    )
+    assert sum(run(scheduler, 20)) == 4
+
+    scheduler.remove(onoff_server)
+    assert sum(run(scheduler, 20)) == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_publishes_model_state(onoff_server):
+    scheduler = PublicationScheduler(resolution=0.01)
+    onoff_server.configuration.publication_period = timedelta(seconds=0.02)
+    scheduler.add(onoff_server)
+
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert scheduler.published >= 2
+    onoff_server.publish.assert_awaited_with(
+        GenericOnOffOpcode.GENERIC_ONOFF_STATUS, dict(present_onoff=1)
+    )
+
+
+def test_state_change_publishes_at_once(onoff_server):
+    scheduler = PublicationScheduler(resolution=0.1, slots=8)
+    onoff_server.configuration.publication_period = timedelta(seconds=1)
+    scheduler.add(onoff_server)
+
+    run(scheduler, 5)
+    onoff_server.update_onoff(0)
+    onoff_server.update_onoff(0)
+
+    # published at the next tick, and the period restarts from there
+    due = run(scheduler, 20)
+    assert [tick + 1 for tick, count in enumerate(due) if count] == [1, 11]
+
+
+def test_server_models_publish_state(element):
+    element[LightLightnessServer].update_lightness(0x1234)
+    assert element[LightLightnessServer].publication_message() == (
+        LightLightnessOpcode.LIGHT_LIGHTNESS_STATUS,
+        dict(present_lightness=0x1234),
+    )
+
+    time_server = element[TimeServer]
+    assert time_server.publication_message() is None
+
+    time_server.clock = lambda: datetime(2020, 1, 1, tzinfo=timezone.utc)
+    opcode, params = time_server.publication_message()
+    assert opcode == TimeOpcode.TIME_STATUS
+    assert AccessMessage.build(dict(opcode=opcode, params=params))
@@ -20,6 +20,7 @@
 #
 #
 # pylint: disable=W0621, C0103
+import asyncio
 from unittest import mock
 
 import asynctest
@@ -27,6 +28,8 @@ from asynctest import ANY
 
 from bluetooth_mesh import Element, SceneClient
 from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.scene import SceneOpcode, SceneStatusCode
+from bluetooth_mesh.models.base import StateCache
 from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
 
 
@@ -37,7 +40,7 @@ class SceneElementMock(Element):
 
 @pytest.fixture
 def scene_client(element_path) -> SceneClient:
-    element = SceneElementMock(mock.MagicMock(), mock.MagicMock())
+    element = SceneElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
     element.path = element_path
     return SceneClient(element)
 
@@ -83,18 +86,120 @@ async def test_scene_recall_calls_node_interface_with_appropriate_arguments(
     [pytest.param(1, 0), pytest.param(255, 254), pytest.param(256, 0)],
 )
 async def test_scene_recall_increases_tid(
-    scene_client, number_of_scene_recalls, next_tid
+    scene_client, destination, app_index, number_of_scene_recalls, next_tid
 ):
-    scene_client.send_app = asynctest.CoroutineMock()
+    scene_client._node_interface.send = asynctest.CoroutineMock()
 
     for _ in range(number_of_scene_recalls):
         await scene_client.recall_scene_unack(
-            ANY, ANY, scene_number=ANY, transition_time=ANY
+            destination, app_index, scene_number=1, transition_time=0
         )
 
-    scene_client.send_app.assert_awaited_with(
-        ANY,
-        app_index=ANY,
-        opcode=ANY,
-        params=dict(scene_number=ANY, tid=next_tid, transition_time=ANY, delay=ANY),
+    (_, _, _, data), _ = scene_client._node_interface.send.await_args
+    assert data[4] == next_tid
+
+
+@pytest.mark.asyncio
+async def test_recall_scene_retries_only_unconfirmed_nodes(scene_client):
+    group = 0xC000
+    nodes = [0x0100, 0x0200, 0x0300]
+    # 0x0200 misses the group message, 0x0300 reports a stale scene once
+    scenes = {0x0100: 0, 0x0200: 0, 0x0300: 0}
+    stale = {0x0300}
+
+    async def send_app(destination, app_index, opcode, params):
+        targets = (
+            [node for node in nodes if node != 0x0200]
+            if destination == group
+            else [destination]
+        )
+
+        for node in targets:
+            if node in stale:
+                stale.discard(node)
+            else:
+                scenes[node] = params["scene_number"]
+
+            message = dict(
+                opcode=SceneOpcode.SCENE_STATUS,
+                params=dict(
+                    status_code=SceneStatusCode.SUCCESS, current_scene=scenes[node]
+                ),
+            )
+            asyncio.get_event_loop().call_soon(
+                scene_client.message_received, node, 0, None, message
+            )
+
+    scene_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    results = await scene_client.recall_scene(
+        nodes, 0, 5, group=group, fan_in_timeout=0.05, send_interval=0.01
     )
+
+    assert all(results[node]["current_scene"] == 5 for node in nodes)
+    assert [call[0][0] for call in scene_client.send_app.await_args_list] == [
+        group,
+        0x0200,
+        0x0300,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_store_scene_reports_unconfirmed_nodes(scene_client):
+    async def send_app(destination, app_index, opcode, params):
+        scenes = [params["scene_number"]] if destination == 0x0100 else []
+        message = dict(
+            opcode=SceneOpcode.SCENE_REGISTER_STATUS,
+            params=dict(
+                status_code=SceneStatusCode.SUCCESS,
+                current_scene=0,
+                scenes=scenes + [0] * (16 - len(scenes)),
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            scene_client.message_received, destination, 0, None, message
+        )
+
+    scene_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    results = await scene_client.store_scene([0x0100, 0x0200], 0, 3, send_interval=0.01)
+
+    assert results[0x0100]["scenes"][0] == 3
+    assert results[0x0200] is None
+    assert scene_client.send_app.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_get_scene_after_recall_is_not_served_from_cache(scene_client):
+    # pylint: disable=W0212
+    scene_client.state_cache = StateCache(ttl=60)
+    scene_client._node_interface.send = asynctest.CoroutineMock()
+    scenes = {0x0100: 1, 0x0200: 1}
+
+    async def send_app(destination, app_index, opcode, params):
+        # pylint: disable=W0613
+        message = dict(
+            opcode=SceneOpcode.SCENE_STATUS,
+            params=dict(
+                status_code=SceneStatusCode.SUCCESS,
+                current_scene=scenes[destination],
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            scene_client.message_received, destination, 0, None, message
+        )
+
+    scene_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    await scene_client.get_scene([0x0100, 0x0200], 0, send_interval=0.01)
+    await scene_client.get_scene([0x0100, 0x0200], 0, send_interval=0.01)
+    assert scene_client.send_app.await_count == 2
+
+    with asynctest.patch("asyncio.sleep", new=asynctest.CoroutineMock()):
+        await scene_client.recall_scene_unack(0x0100, 0, 2, 0)
+    scenes[0x0100] = 2
+
+    results = await scene_client.get_scene([0x0100, 0x0200], 0, send_interval=0.01)
+
+    assert results[0x0100]["current_scene"] == 2
+    assert scene_client.send_app.await_count == 3
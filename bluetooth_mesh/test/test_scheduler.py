@@ -0,0 +1,106 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from collections import Counter
+
+import pytest
+
+from bluetooth_mesh.scheduler import AdaptiveScheduler
+
+
+def make_requests(statuses, sent, answer_on=1):
+    loop = asyncio.get_event_loop()
+
+    def request(key):
+        async def send():
+            sent[key] += 1
+            if sent[key] >= answer_on:
+                loop.call_soon(statuses[key].set_result, key)
+
+        return send
+
+    return {key: request(key) for key in statuses}
+
+
+@pytest.mark.asyncio
+async def test_window_grows_on_responses():
+    scheduler = AdaptiveScheduler(initial_window=1, max_rate=1000)
+    statuses = {key: asyncio.Future() for key in range(20)}
+    sent = Counter()
+
+    await scheduler.run(make_requests(statuses, sent), statuses)
+
+    assert all(status.done() for status in statuses.values())
+    assert sent == Counter({key: 1 for key in range(20)})
+    assert scheduler.window > 1
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_back_off_window():
+    scheduler = AdaptiveScheduler(
+        initial_window=8, max_rate=1000, retry_interval=0.01, max_retry_interval=0.02
+    )
+    statuses = {key: asyncio.Future() for key in range(4)}
+    sent = Counter()
+
+    await scheduler.run(make_requests(statuses, sent, answer_on=2), statuses)
+
+    assert sent == Counter({key: 2 for key in range(4)})
+    assert scheduler.retries == 4
+    assert scheduler.timeouts == 4
+    assert scheduler.window < 8
+
+
+@pytest.mark.asyncio
+async def test_fair_ordering():
+    scheduler = AdaptiveScheduler(
+        initial_window=1, min_window=1, max_rate=1000, retry_interval=0.01
+    )
+    statuses = {key: asyncio.Future() for key in range(3)}
+    order = []
+
+    def request(key):
+        async def send():
+            order.append(key)
+            if order.count(key) == 2:
+                asyncio.get_event_loop().call_soon(statuses[key].set_result, key)
+
+        return send
+
+    await scheduler.run({key: request(key) for key in statuses}, statuses)
+
+    assert order[:3] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_rate_cap():
+    scheduler = AdaptiveScheduler(initial_window=64, max_rate=100)
+    statuses = {key: asyncio.Future() for key in range(10)}
+    sent = Counter()
+
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    await scheduler.run(make_requests(statuses, sent), statuses)
+
+    assert loop.time() - start >= 0.09
@@ -0,0 +1,177 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element, SensorClient
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.properties import PropertyID
+from bluetooth_mesh.messages.sensor import SensorOpcode
+from bluetooth_mesh.sensors import (
+    SampleSeries,
+    SensorCollector,
+    descriptor_interval,
+    sample_value,
+)
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+
+TEMPERATURE = PropertyID.PRESENT_AMBIENT_TEMPERATURE
+
+
+class SensorElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [SensorClient]
+
+
+@pytest.fixture
+def sensor_client(element_path) -> SensorClient:
+    element = SensorElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return SensorClient(element)
+
+
+def temperature_status(value):
+    return dict(
+        opcode=SensorOpcode.SENSOR_STATUS,
+        params=[
+            dict(
+                format=0,
+                length=1,
+                sensor_setting_property_id=TEMPERATURE,
+                present_ambient_temperature=dict(temperature=value),
+            )
+        ],
+    )
+
+
+def test_sample_series_is_bounded():
+    series = SampleSeries(size=4, bucket=10.0, buckets=2)
+
+    for time in range(30):
+        series.add(float(time), float(time))
+
+    assert series.samples() == [(26.0, 26.0), (27.0, 27.0), (28.0, 28.0), (29.0, 29.0)]
+    assert series.latest == (29.0, 29.0)
+
+    first, second = series.aggregates()
+    assert (first.start, first.minimum, first.maximum, first.count) == (
+        10.0,
+        10,
+        19,
+        10,
+    )
+    assert (second.start, second.mean) == (20.0, 24.5)
+
+
+def test_descriptor_interval():
+    assert descriptor_interval(0) is None
+    assert descriptor_interval(64) == 1.0
+    assert round(descriptor_interval(66), 2) == 1.21
+
+
+def test_sample_value_records_booleans():
+    item = dict(
+        format=0,
+        length=1,
+        sensor_setting_property_id=PropertyID.PRESENCE_DETECTED,
+        presence_detected=True,
+    )
+
+    assert sample_value(item) == 1.0
+    assert sample_value(dict(item, presence_detected=False)) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_schedule_keeps_single_entry_per_property(sensor_client):
+    # pylint: disable=W0212
+    collector = SensorCollector(sensor_client, 0, min_interval=60)
+    collector.add(0x0100, TEMPERATURE)
+    collector.add(0x0200, TEMPERATURE)
+
+    for value in range(1000):
+        collector.record(0x0100, temperature_status(float(value))["params"])
+
+    assert len(collector._schedule) == 2
+    assert len(collector.series[(0x0100, TEMPERATURE)]) == 16
+
+
+@pytest.mark.asyncio
+async def test_collector_polls_and_merges_publications(sensor_client):
+    async def send_app(destination, app_index, opcode, params):
+        asyncio.get_event_loop().call_soon(
+            sensor_client.message_received,
+            destination,
+            0,
+            None,
+            temperature_status(20.0),
+        )
+
+    sensor_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    collector = SensorCollector(sensor_client, 0, min_interval=0.05)
+    collector.add_descriptors(
+        0x0100,
+        [
+            dict(
+                sensor_property_id=TEMPERATURE,
+                sensor_measurement_period=0,
+                sensor_update_interval=1,
+            )
+        ],
+    )
+    assert collector.intervals[(0x0100, TEMPERATURE)] == 0.05
+
+    collector.start()
+    await asyncio.sleep(0.01)
+    assert sensor_client.send_app.await_count == 1
+
+    # a publication postpones the next poll
+    await asyncio.sleep(0.03)
+    sensor_client.message_received(0x0100, 0, 0x0001, temperature_status(21.5))
+    await asyncio.sleep(0.03)
+    assert sensor_client.send_app.await_count == 1
+
+    await asyncio.sleep(0.04)
+    assert sensor_client.send_app.await_count == 2
+
+    await collector.stop()
+    assert not sensor_client.app_message_callbacks[SensorOpcode.SENSOR_STATUS]
+
+    values = [value for _, value in collector.series[(0x0100, TEMPERATURE)].samples()]
+    assert values == [20.0, 21.5, 20.0]
+
+
+@pytest.mark.asyncio
+async def test_collector_records_parsed_publications(sensor_client):
+    collector = SensorCollector(sensor_client, 0)
+    collector.start()
+
+    message = AccessMessage.parse(AccessMessage.build(temperature_status(21.5)))
+    sensor_client.message_received(0x0100, 0, 0x0001, message)
+    await collector.stop()
+
+    values = [value for _, value in collector.series[(0x0100, TEMPERATURE)].samples()]
+    assert values == [21.5]
@@ -0,0 +1,114 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+
+import pytest
+
+from bluetooth_mesh.shaper import OutboundShaper, Priority
+
+
+def make_send(sent, name):
+    async def send():
+        sent.append(name)
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_immediately():
+    shaper = OutboundShaper(rate=1, burst=3)
+    sent = []
+
+    for i in range(3):
+        await asyncio.wait_for(
+            shaper.submit(Priority.INTERACTIVE, i, make_send(sent, i)), timeout=0.1
+        )
+
+    assert sent == [0, 1, 2]
+    assert shaper.delayed == 0
+
+
+@pytest.mark.asyncio
+async def test_priorities_and_destinations_are_interleaved():
+    shaper = OutboundShaper(rate=1000, burst=1)
+    sent = []
+
+    await shaper.submit(Priority.INTERACTIVE, 0, make_send(sent, "first"))
+
+    tasks = [
+        asyncio.ensure_future(
+            shaper.submit(Priority.DIAGNOSTICS, 1, make_send(sent, "diag"))
+        ),
+        asyncio.ensure_future(
+            shaper.submit(Priority.CONFIG, 2, make_send(sent, "config 2a"))
+        ),
+        asyncio.ensure_future(
+            shaper.submit(Priority.CONFIG, 2, make_send(sent, "config 2b"))
+        ),
+        asyncio.ensure_future(
+            shaper.submit(Priority.CONFIG, 3, make_send(sent, "config 3"))
+        ),
+        asyncio.ensure_future(
+            shaper.submit(Priority.INTERACTIVE, 4, make_send(sent, "interactive"))
+        ),
+    ]
+
+    await asyncio.sleep(0)
+    assert shaper.queue_depth() == {
+        Priority.INTERACTIVE: 1,
+        Priority.CONFIG: 3,
+        Priority.DIAGNOSTICS: 1,
+    }
+    assert shaper.destination_depth() == {1: 1, 2: 2, 3: 1, 4: 1}
+
+    await asyncio.gather(*tasks)
+
+    assert sent == [
+        "first",
+        "interactive",
+        "config 2a",
+        "config 3",
+        "config 2b",
+        "diag",
+    ]
+    assert shaper.queue_depth() == {priority: 0 for priority in Priority}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_message_is_dropped_from_queue():
+    shaper = OutboundShaper(rate=100, burst=1)
+    sent = []
+
+    await shaper.submit(Priority.INTERACTIVE, 0, make_send(sent, "first"))
+
+    cancelled = asyncio.ensure_future(
+        shaper.submit(Priority.INTERACTIVE, 1, make_send(sent, "cancelled"))
+    )
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    assert shaper.destination_depth() == {}
+
+    await shaper.submit(Priority.INTERACTIVE, 2, make_send(sent, "second"))
+    assert sent == ["first", "second"]
@@ -2,12 +2,12 @@ from asyncio import Task
 from asyncio.events import AbstractEventLoop
 from asyncio.futures import Future
 from asyncio.locks import Event
-from asyncio.tasks import gather, wait_for
+from asyncio.tasks import ensure_future, gather, sleep, wait_for
 from functools import partial
 
 import pytest
 
-from bluetooth_mesh.utils import tasklet
+from bluetooth_mesh.utils import Coalescer, tasklet
 
 
 @pytest.mark.asyncio
@@ -92,3 +92,40 @@ async def test_tasklet_grouping(event_loop: AbstractEventLoop):
 
     assert statuses[0].result() == "done"
     assert statuses[1].result() == "done"
+
+
+@pytest.mark.asyncio
+async def test_coalescer_supersedes_running_coroutine():
+    coalescer = Coalescer()
+    gate = Event()
+    finished = []
+
+    async def send(value):
+        await gate.wait()
+        finished.append(value)
+
+    first = ensure_future(coalescer.submit("dst", partial(send, 1)))
+    await sleep(0)
+    second = ensure_future(coalescer.submit("dst", partial(send, 2)))
+    await sleep(0)
+    gate.set()
+
+    assert await gather(first, second) == [False, True]
+    assert finished == [2]
+    assert coalescer.superseded == 1
+    assert coalescer.completed == 1
+    assert coalescer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_coalescer_evicts_oldest_key():
+    coalescer = Coalescer(max_keys=2)
+    gate = Event()
+
+    tasks = [ensure_future(coalescer.submit(key, gate.wait)) for key in ("a", "b", "c")]
+    await sleep(0)
+    assert coalescer.pending == 2
+    gate.set()
+
+    assert await gather(*tasks) == [False, True, True]
+    assert coalescer.evicted == 1
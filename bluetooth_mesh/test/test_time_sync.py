@@ -0,0 +1,167 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+# pylint: disable=W0621
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import asynctest
+
+from bluetooth_mesh import Element
+from bluetooth_mesh.messages import AccessMessage
+from bluetooth_mesh.messages.config import GATTNamespaceDescriptor
+from bluetooth_mesh.messages.time import TimeOpcode
+from bluetooth_mesh.models.models import TimeClient
+from bluetooth_mesh.test.fixtures import *  # pylint: disable=W0614, W0401
+from bluetooth_mesh.timesync import TimeSync
+
+REFERENCE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+TAI_UTC_DELTA = timedelta(seconds=37)
+
+
+class TimeElementMock(Element):
+    LOCATION = GATTNamespaceDescriptor.MAIN
+    MODELS = [TimeClient]
+
+
+@pytest.fixture
+def time_client(element_path) -> TimeClient:
+    element = TimeElementMock(mock.MagicMock(shaper=None), mock.MagicMock())
+    element.path = element_path
+    return TimeClient(element)
+
+
+@pytest.mark.asyncio
+async def test_synchronise_corrects_only_drifting_nodes(time_client):
+    now = [REFERENCE]
+    # node clocks run at different rates (seconds gained per second)
+    rates = {0x0100: 0.0, 0x0200: 0.001, 0x0300: 0.01}
+    clocks = {node: REFERENCE for node in rates}
+
+    async def send_app(destination, app_index, opcode, params):
+        if opcode == TimeOpcode.TIME_SET:
+            clocks[destination] = params["date"]
+
+        message = dict(
+            opcode=TimeOpcode.TIME_STATUS,
+            params=dict(
+                date=clocks[destination],
+                uncertainty=timedelta(milliseconds=10),
+                time_authority=True,
+                tai_utc_delta=TAI_UTC_DELTA,
+            ),
+        )
+        asyncio.get_event_loop().call_soon(
+            time_client.message_received, destination, 0, None, message
+        )
+
+    def advance(seconds):
+        now[0] += timedelta(seconds=seconds)
+        for node, rate in rates.items():
+            clocks[node] += timedelta(seconds=seconds * (1 + rate))
+
+    time_client.send_app = asynctest.CoroutineMock(side_effect=send_app)
+
+    sync = TimeSync(
+        time_client,
+        0,
+        TAI_UTC_DELTA,
+        tolerance=1.0,
+        horizon=0,
+        latency=0.1,
+        clock=lambda: now[0],
+    )
+
+    assert await sync.synchronise(rates) == {}
+
+    advance(600)
+    corrected = await sync.synchronise(rates)
+
+    # 0x0300 is 6s off, 0x0200 only 0.6s, within tolerance
+    assert list(corrected) == [0x0300]
+    assert round(sync.drift[0x0300], 3) == 0.01
+    assert 0x0300 not in sync.estimates
+    assert not time_client.app_message_callbacks[TimeOpcode.TIME_STATUS]
+
+
+@pytest.mark.asyncio
+async def test_synchronise_skips_nodes_that_did_not_respond(time_client):
+    sync = TimeSync(time_client, 0, TAI_UTC_DELTA, tolerance=1.0, horizon=0)
+
+    status = dict(
+        uncertainty=timedelta(0), tai_utc_delta=TAI_UTC_DELTA, time_authority=True
+    )
+    sync.record(0x0100, dict(status, date=REFERENCE + timedelta(seconds=5)), REFERENCE)
+    assert sync.out_of_tolerance() == [0x0100]
+
+    time_client.get_time = asynctest.CoroutineMock(return_value={0x0100: None})
+    time_client.set_time = asynctest.CoroutineMock(return_value={})
+
+    assert await sync.synchronise([0x0100]) == {}
+    time_client.set_time.assert_not_called()
+
+
+def test_out_of_tolerance_orders_by_drift(time_client):
+    sync = TimeSync(time_client, 0, TAI_UTC_DELTA, tolerance=1.0, horizon=100)
+
+    status = dict(
+        uncertainty=timedelta(0), tai_utc_delta=TAI_UTC_DELTA, time_authority=True
+    )
+
+    for node, rate in ((0x0100, 0.02), (0x0200, 0.05), (0x0300, 0.0)):
+        for second in (0, 10):
+            received = REFERENCE + timedelta(seconds=second)
+            date = received + timedelta(seconds=second * rate)
+            sync.record(node, dict(status, date=date), received)
+
+    sync.record(
+        0x0400,
+        dict(status, date=REFERENCE, tai_utc_delta=timedelta(seconds=36)),
+        REFERENCE,
+    )
+
+    assert sync.out_of_tolerance() == [0x0200, 0x0100, 0x0400]
+
+
+def test_tracks_parsed_time_statuses(time_client):
+    sync = TimeSync(
+        time_client, 0, TAI_UTC_DELTA, tolerance=1.0, horizon=0, clock=lambda: REFERENCE
+    )
+    sync.start()
+
+    message = AccessMessage.parse(
+        AccessMessage.build(
+            dict(
+                opcode=TimeOpcode.TIME_STATUS,
+                params=dict(
+                    date=REFERENCE + timedelta(seconds=5),
+                    uncertainty=timedelta(milliseconds=10),
+                    time_authority=True,
+                    tai_utc_delta=TAI_UTC_DELTA,
+                ),
+            )
+        )
+    )
+    time_client.message_received(0x0100, 0, None, message)
+    sync.stop()
+
+    assert sync.out_of_tolerance() == [0x0100]
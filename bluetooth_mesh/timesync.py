@@ -0,0 +1,215 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements fleet-wide time synchronisation.
+"""
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Tuple
+
+from bluetooth_mesh.messages.time import TimeOpcode
+from bluetooth_mesh.models.models import TimeClient
+from bluetooth_mesh.utils import message_params
+
+__all__ = [
+    "ClockEstimate",
+    "TimeSync",
+]
+
+
+class ClockEstimate(NamedTuple):
+    #: Node time minus reference time, in seconds
+    offset: float
+    #: Change of offset per second of reference time
+    drift: float
+    #: Bound of the offset error, in seconds
+    uncertainty: float
+    #: Node's TAI-UTC delta differs from the reference one
+    tai_utc_mismatch: bool
+
+
+def _slope(samples: Iterable[Tuple[float, float]]) -> float:
+    samples = list(samples)
+    count = len(samples)
+    mean_x = sum(x for x, _ in samples) / count
+    mean_y = sum(y for _, y in samples) / count
+
+    variance = sum((x - mean_x) ** 2 for x, _ in samples)
+    if not variance:
+        return 0.0
+
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance
+
+
+class TimeSync:
+    """
+    Keeps node clocks within `tolerance` of the reference clock.
+
+    Every received time status is compared with the reference time of its
+    arrival. The offset is known only up to the uncertainty reported by the
+    node plus `latency`, the allowance for delivery of the status. Drift is
+    the least-squares slope of the offsets since the last correction.
+
+    A node is corrected only if, beyond its uncertainty, it's off by more
+    than `tolerance` now or will be after `horizon` seconds at its current
+    drift, or if it uses a different TAI-UTC delta. Nodes that drift the
+    fastest are corrected first, and at most `max_corrections` per cycle.
+
+    :param client: Time client used for reads and corrections
+    :param app_index: Application key index
+    :param tai_utc_delta: Current TAI-UTC delta
+    :param clock: Reference clock, returning an aware datetime
+    """
+
+    def __init__(
+        self,
+        client: TimeClient,
+        app_index: int,
+        tai_utc_delta: timedelta,
+        *,
+        tolerance: float = 1.0,
+        horizon: float = 3600.0,
+        latency: float = 0.5,
+        uncertainty: timedelta = timedelta(milliseconds=100),
+        max_corrections: int = 16,
+        history: int = 8,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.client = client
+        self.app_index = app_index
+        self.tai_utc_delta = tai_utc_delta
+        self.tolerance = tolerance
+        self.horizon = horizon
+        self.latency = latency
+        self.uncertainty = uncertainty
+        self.max_corrections = max_corrections
+        self.history = history
+        self.clock = clock
+
+        self.samples = {}  # type: Dict[int, Deque[Tuple[float, float]]]
+        self.estimates = {}  # type: Dict[int, ClockEstimate]
+        self.drift = {}  # type: Dict[int, float]
+        self.corrections = 0
+
+    def record(self, node: int, status: Any, received: datetime):
+        """
+        Update the estimate of `node` from a time status that arrived at
+        `received` reference time.
+        """
+        if status["date"] is None:
+            return
+
+        offset = (status["date"] - received).total_seconds()
+        samples = self.samples.setdefault(node, deque(maxlen=self.history))
+        samples.append((received.timestamp(), offset))
+
+        if len(samples) > 1:
+            self.drift[node] = _slope(samples)
+
+        self.estimates[node] = ClockEstimate(
+            offset=offset,
+            drift=self.drift.get(node, 0.0),
+            uncertainty=status["uncertainty"].total_seconds() + self.latency,
+            tai_utc_mismatch=status["tai_utc_delta"] != self.tai_utc_delta,
+        )
+
+    def _status_received(self, source, app_index, destination, message):
+        # pylint: disable=W0613
+        self.record(source, message_params(message), self.clock())
+
+    def start(self):
+        """
+        Keep tracking time statuses between cycles, including published ones.
+        """
+        self.client.app_message_callbacks[TimeOpcode.TIME_STATUS].add(
+            self._status_received
+        )
+
+    def stop(self):
+        self.client.app_message_callbacks[TimeOpcode.TIME_STATUS].discard(
+            self._status_received
+        )
+
+    def out_of_tolerance(self) -> List[int]:
+        """
+        Nodes needing a correction, fastest drifting first.
+        """
+        nodes = []
+
+        for node, estimate in self.estimates.items():
+            predicted = estimate.offset + estimate.drift * self.horizon
+            error = max(abs(estimate.offset), abs(predicted)) - estimate.uncertainty
+
+            if error > self.tolerance or estimate.tai_utc_mismatch:
+                nodes.append(node)
+
+        return sorted(
+            nodes,
+            key=lambda node: (
+                abs(self.estimates[node].drift),
+                abs(self.estimates[node].offset),
+            ),
+            reverse=True,
+        )
+
+    async def synchronise(self, nodes: Iterable[int]) -> Dict[int, Any]:
+        """
+        Sample time of `nodes` and correct the ones outside tolerance.
+
+        :return: Time statuses returned by corrected nodes
+        """
+        nodes = list(nodes)
+
+        callbacks = self.client.app_message_callbacks[TimeOpcode.TIME_STATUS]
+        started = self._status_received in callbacks
+        callbacks.add(self._status_received)
+
+        try:
+            statuses = await self.client.get_time(nodes, self.app_index)
+        finally:
+            if not started:
+                callbacks.discard(self._status_received)
+
+        # don't correct nodes on estimates from earlier cycles
+        sampled = {node for node, status in statuses.items() if status is not None}
+        corrections = [node for node in self.out_of_tolerance() if node in sampled]
+        corrections = corrections[: self.max_corrections]
+
+        if not corrections:
+            return {}
+
+        results = await self.client.set_time(
+            corrections,
+            self.app_index,
+            date=self.clock(),
+            tai_utc_delta=self.tai_utc_delta,
+            uncertainty=self.uncertainty,
+            time_authority=True,
+        )
+
+        for node, status in results.items():
+            if status is not None:
+                self.corrections += 1
+                self.samples.pop(node, None)
+                self.estimates.pop(node, None)
+
+        return results
@@ -0,0 +1,197 @@
+#
+# python-bluetooth-mesh - Bluetooth Mesh for Python
+#
+# Copyright (C) 2019  SILVAIR sp. z o.o.
+#
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+#
+"""
+This module implements a hop-distance graph built from Network Diagnostic
+registry records.
+"""
+import heapq
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+__all__ = [
+    "HopGraph",
+]
+
+
+class HopGraph:
+    """
+    Directed graph of "who hears whom", updated one registry record at a time.
+
+    Each node reporting its Network Diagnostic registry adds edges from the
+    record sources to itself, labelled with the minimum hop count and the
+    number of received messages. Nodes are numbered densely as they appear,
+    and each node keeps its incoming edges in parallel arrays (source index,
+    hops, count), so an update touches only the reporting node's arrays and
+    the graph never needs to be rebuilt.
+
+    A source heard with `min_hops` equal to 1 is a direct radio neighbour.
+    """
+
+    def __init__(self):
+        self.addresses = array("H")
+        self._index = {}  # type: Dict[int, int]
+
+        self._sources = []  # type: List[array]
+        self._hops = []  # type: List[array]
+        self._counts = []  # type: List[array]
+        self._slots = []  # type: List[Dict[int, int]]
+
+        # number of nodes hearing each node directly
+        self._direct = array("L")
+
+    def _node(self, address: int) -> int:
+        index = self._index.get(address)
+
+        if index is None:
+            index = self._index[address] = len(self.addresses)
+            self.addresses.append(address)
+            self._sources.append(array("H"))
+            self._hops.append(array("B"))
+            self._counts.append(array("L"))
+            self._slots.append({})
+            self._direct.append(0)
+
+        return index
+
+    def add_node(self, address: int):
+        """
+        Make `address` known to the graph, even if it has no edges yet.
+        """
+        self._node(address)
+
+    def update(self, reporter: int, records: Iterable[Mapping[str, Any]]):
+        """
+        Add registry records reported by `reporter`.
+
+        Records for an already known source replace the previous hop count.
+        """
+        target = self._node(reporter)
+        sources = self._sources[target]
+        hops = self._hops[target]
+        counts = self._counts[target]
+        slots = self._slots[target]
+
+        for record in records:
+            source = self._node(record["source"])
+            min_hops = record["min_hops"]
+            slot = slots.get(source)
+
+            if slot is None:
+                slot = slots[source] = len(sources)
+                sources.append(source)
+                hops.append(min_hops)
+                counts.append(record["count"])
+
+                if min_hops == 1:
+                    self._direct[source] += 1
+                continue
+
+            if (hops[slot] == 1) != (min_hops == 1):
+                self._direct[source] += 1 if min_hops == 1 else -1
+
+            hops[slot] = min_hops
+            counts[slot] = record["count"]
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def heard_by(self, address: int) -> Dict[int, int]:
+        """
+        Sources heard by `address`, with their minimum hop counts.
+        """
+        target = self._index[address]
+
+        return {
+            self.addresses[source]: hops
+            for source, hops in zip(self._sources[target], self._hops[target])
+        }
+
+    def hot_relays(self, count: int = 10) -> List[Tuple[int, int]]:
+        """
+        Nodes heard directly by the largest number of other nodes.
+
+        :return: Up to `count` tuples of (address, number of direct listeners)
+        """
+        top = heapq.nlargest(
+            count, range(len(self._direct)), key=self._direct.__getitem__
+        )
+
+        return [
+            (self.addresses[index], self._direct[index])
+            for index in top
+            if self._direct[index]
+        ]
+
+    def isolated(self) -> List[int]:
+        """
+        Nodes that neither hear nor are heard by anyone.
+        """
+        heard = set()
+        for sources in self._sources:
+            heard.update(sources)
+
+        return [
+            address
+            for index, address in enumerate(self.addresses)
+            if not self._sources[index] and index not in heard
+        ]
+
+    def reachability(self, address: int, max_hops: int = 0x7F) -> Dict[int, int]:
+        """
+        Nodes whose messages reach `address` within `max_hops`, with the
+        smallest hop count.
+
+        Hop counts in registry records are already end-to-end, so they're
+        never added up. A source is either heard by `address` itself, with
+        the recorded hop count, or connected to it through a chain of direct
+        radio neighbours, one hop per link.
+        """
+        start = self._index[address]
+
+        distance = {
+            source: hops
+            for source, hops in zip(self._sources[start], self._hops[start])
+            if hops <= max_hops
+        }
+
+        frontier = [start]
+        visited = {start}
+        hops = 0
+
+        while frontier and hops < max_hops:
+            hops += 1
+            neighbours = []
+
+            for target in frontier:
+                for source, edge in zip(self._sources[target], self._hops[target]):
+                    if edge != 1 or source in visited:
+                        continue
+
+                    visited.add(source)
+                    neighbours.append(source)
+                    if hops < distance.get(source, max_hops + 1):
+                        distance[source] = hops
+
+            frontier = neighbours
+
+        distance.pop(start, None)
+        return {self.addresses[index]: hops for index, hops in distance.items()}
@@ -23,9 +23,10 @@ import asyncio
 import itertools
 import logging
 from asyncio.tasks import Task
+from collections import OrderedDict
 from concurrent.futures._base import CancelledError
 from contextlib import suppress
-from functools import wraps
+from functools import partial, wraps
 from inspect import isawaitable
 from typing import (
     Any,
@@ -34,12 +35,14 @@ from typing import (
     Dict,
     Hashable,
     Iterable,
+    List,
     Mapping,
     Optional,
     Tuple,
     TypeVar,
 )
 
+from construct import Container
 from typing_extensions import Protocol
 
 try:
@@ -55,6 +58,33 @@ ProgressCallback = Callable[[Hashable, Any, Mapping, Mapping], None]
 T = TypeVar("T")
 
 
+def message_params(message: ParsedMeshMessage) -> Any:
+    """
+    Parameters of a parsed access message.
+
+    Compiled parsers name the parameters after the opcode instead of aliasing
+    them as "params", so both names are tried. Likewise, payloads of messages
+    with a subopcode are named after it, so they're aliased as "payload".
+    """
+    try:
+        params = message["params"]
+    except KeyError:
+        opcode = message["opcode"]
+        params = message.get(getattr(opcode, "name", "").lower())
+
+    if (
+        isinstance(params, Mapping)
+        and "subopcode" in params
+        and "payload" not in params
+    ):
+        subopcode = params["subopcode"]
+        params = Container(
+            params, payload=params.get(getattr(subopcode, "name", "").lower())
+        )
+
+    return params
+
+
 def chunks(iterable: Iterable[T], n: int, fillvalue: Optional[T] = None):
     """Collect data into fixed-length chunks or blocks"""
     # chunks('ABCDEFG', 3, 'x') --> ABC DEF Gxx"
@@ -167,6 +197,62 @@ def construct_match(received, expected):
     return match(received, expected)
 
 
+_MISSING = object()
+
+
+def _compile_checks(expected, path, checks):
+    if expected is Any or expected is ...:
+        return
+
+    if isinstance(expected, dict):
+        for key, value in expected.items():
+            if not key.startswith("_"):
+                _compile_checks(value, path + (key,), checks)
+        return
+
+    if isinstance(expected, list):
+        items = [compile_match(i) for i in expected]
+
+        def match_list(received):
+            return len(received) == len(items) and all(
+                match(i) for match, i in zip(items, received)
+            )
+
+        checks.append((path, match_list))
+        return
+
+    checks.append((path, lambda received: received == expected))
+
+
+def compile_match(expected) -> Callable[[Any], bool]:
+    """
+    Compile `expected` into a matcher equivalent to :py:func:`construct_match`.
+
+    The pattern is flattened once into a list of (path, check) pairs, one per
+    constrained field, so matching a message costs only as much as the number
+    of fields that are not wildcards. Keys present in the pattern but missing
+    from the received message are ignored, just like in
+    :py:func:`construct_match`.
+    """
+    checks = []  # type: List[Tuple[Tuple[str, ...], Callable[[Any], bool]]]
+    _compile_checks(expected, (), checks)
+
+    def match(received) -> bool:
+        for path, check in checks:
+            value = received
+            for key in path:
+                value = value.get(key, _MISSING)
+                if value is _MISSING:
+                    break
+            else:
+                if not check(value):
+                    return False
+
+        return True
+
+    return match
+
+
 class AnyCoroutine(Protocol):
     def __call__(self, *args: Any, **kwargs: Any) -> Awaitable[Any]:
         ...
@@ -229,3 +315,76 @@ def tasklet(coro: AnyCoroutine) -> Respawn:
         lambda *args, **kwargs: 1
     )  # All tasks belong to one group by default
     return respawn
+
+
+class Coalescer:
+    """
+    Last-writer-wins runner: at most one coroutine is running for any given
+    key, and submitting a new one cancels the previous one.
+
+    Use case: a slider sends a stream of values to the same node. Each value
+    is retransmitted a few times, but once a newer value is submitted, the
+    older one is not worth sending anymore - its retransmissions (including
+    messages still waiting in an outbound queue) are cancelled.
+
+    Finished keys are forgotten immediately. If more than `max_keys` keys are
+    running at the same time, the oldest one is cancelled to keep memory
+    bounded.
+
+    :param max_keys: Maximum number of keys running at the same time
+    """
+
+    def __init__(self, max_keys: int = 256):
+        self.max_keys = max_keys
+        self.tasks = OrderedDict()  # type: OrderedDict[Hashable, Task]
+
+        self.submitted = 0
+        self.completed = 0
+        self.superseded = 0
+        self.evicted = 0
+
+    def _done(self, key: Hashable, task: Task):
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+
+        if not task.cancelled():
+            self.completed += 1
+
+    async def submit(self, key: Hashable, coro: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Run `coro` for `key`, superseding a previous one.
+
+        :return: True if `coro` finished, False if it was superseded by a newer
+            one (or evicted).
+        """
+        self.submitted += 1
+
+        previous = self.tasks.pop(key, None)
+        if previous is not None and not previous.done():
+            self.superseded += 1
+            previous.cancel()
+
+        while len(self.tasks) >= self.max_keys:
+            _, oldest = self.tasks.popitem(last=False)
+            self.evicted += 1
+            oldest.cancel()
+
+        task = create_task(coro())
+        task.add_done_callback(partial(self._done, key))
+        self.tasks[key] = task
+
+        try:
+            await asyncio.wait([task])
+        except CancelledError:
+            task.cancel()
+            raise
+
+        if task.cancelled():
+            return False
+
+        task.result()
+        return True
+
+    @property
+    def pending(self) -> int:
+        return len(self.tasks)